@@ -0,0 +1,118 @@
+"""Effective-date activation schedule
+
+Rule effective_from / effective_to strings are parsed once into UTC
+timestamps. The instants at which the set of active rules changes form a
+sorted schedule; whatever is derived from the active set (e.g. the candidate
+rule index) is rebuilt only when evaluation reaches the next boundary, so
+evaluation reads the clock once per request and never per rule.
+
+A rule is active while effective_from <= now <= effective_to. Date-only values
+mean midnight UTC and naive timestamps are taken as UTC, which matches the
+previous ISO-string comparison for the formats the UI stores. Values that do
+not parse keep their ISO-string comparison against the time the schedule was
+built and are then treated as fixed.
+"""
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generic, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+NEVER = float('inf')
+ALWAYS = float('-inf')
+
+
+def parse_instant(value: str) -> float:
+    """ISO date or datetime -> POSIX timestamp; naive values are UTC"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class EffectiveWindow:
+    __slots__ = ('start', 'end')
+
+    def __init__(self, start: float = ALWAYS, end: float = NEVER):
+        self.start = start
+        self.end = end
+
+    @property
+    def is_unbounded(self) -> bool:
+        return self.start == ALWAYS and self.end == NEVER
+
+    def contains(self, now: float) -> bool:
+        return self.start <= now <= self.end
+
+
+def effective_window(rule: Dict[str, Any], built_at: Optional[datetime] = None) -> EffectiveWindow:
+    window = EffectiveWindow()
+    effective_from = rule.get('effective_from')
+    effective_to = rule.get('effective_to')
+    if effective_from:
+        try:
+            window.start = parse_instant(effective_from)
+        except (TypeError, ValueError):
+            now_iso = (built_at or datetime.now(timezone.utc)).isoformat()
+            logger.warning(f"Rule {rule.get('id')}: unparseable effective_from {effective_from!r}")
+            window.start = NEVER if now_iso < effective_from else ALWAYS
+    if effective_to:
+        try:
+            window.end = parse_instant(effective_to)
+        except (TypeError, ValueError):
+            now_iso = (built_at or datetime.now(timezone.utc)).isoformat()
+            logger.warning(f"Rule {rule.get('id')}: unparseable effective_to {effective_to!r}")
+            window.end = ALWAYS if now_iso > effective_to else NEVER
+    return window
+
+
+class ActivationSchedule(Generic[T]):
+    """Caches build(active) for the current interval between activation boundaries.
+
+    active is a tuple of booleans parallel to the windows. at(now) only calls
+    build again once now leaves the interval the cached value was built for.
+    """
+
+    def __init__(self, windows: Sequence[EffectiveWindow], build: Callable[[Tuple[bool, ...]], T]):
+        self.windows = tuple(windows)
+        self._build = build
+        self._starts = sorted({w.start for w in self.windows if w.start not in (ALWAYS, NEVER)})
+        self._ends = sorted({w.end for w in self.windows if w.end not in (ALWAYS, NEVER)})
+        self._lock = threading.Lock()
+        # (value, last start crossed, last end crossed, next start, next end)
+        self._current: Optional[Tuple[T, float, float, float, float]] = None
+        if not self._starts and not self._ends:
+            self._current = (build(tuple(w.contains(0.0) for w in self.windows)), ALWAYS, ALWAYS, NEVER, NEVER)
+
+    @property
+    def boundaries(self) -> Tuple[float, ...]:
+        return tuple(sorted(set(self._starts) | set(self._ends)))
+
+    @staticmethod
+    def _covers(current, now: float) -> bool:
+        # A window opens when now reaches its start and closes once now passes its end
+        return current is not None and current[1] <= now < current[3] and current[2] < now <= current[4]
+
+    def at(self, now: float) -> T:
+        current = self._current
+        if self._covers(current, now):
+            return current[0]
+        with self._lock:
+            current = self._current
+            if self._covers(current, now):
+                return current[0]
+            value = self._build(tuple(w.contains(now) for w in self.windows))
+            i = bisect_right(self._starts, now)
+            j = bisect_left(self._ends, now)
+            self._current = (
+                value,
+                self._starts[i - 1] if i else ALWAYS,
+                self._ends[j - 1] if j else ALWAYS,
+                self._starts[i] if i < len(self._starts) else NEVER,
+                self._ends[j] if j < len(self._ends) else NEVER
+            )
+            return value
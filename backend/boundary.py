@@ -0,0 +1,136 @@
+"""Decision-boundary search over one numeric proposal field
+
+How a proposal's decision changes as one numeric field moves through a range
+(the largest sum assured that still passes, the smallest premium) follows
+from the compiled ruleset. Threshold atoms, equality tests, scorecard
+parameter bands and grid axes that read the field itself only change at their
+bound points (see field_breakpoints), so the decision is constant on each
+point and on each open gap between consecutive points. Evaluating once per
+point and once per gap gives the exact intervals.
+
+Some readers have no usable points: derived fields (sa_to_income_ratio reads
+sum_assured), nested paths and string tests. With any of those, the range is
+also sampled evenly, and wherever two neighbouring samples disagree the
+change point is bisected down to the tolerance (to adjacent integers for
+integer fields). Such a result is not exact: an interval narrower than the
+sample spacing can be missed.
+
+Risk loading never changes the decision, so risk bands add no points.
+"""
+import math
+from typing import Callable, Hashable, List, Sequence, Tuple
+
+from fields import source_keys
+from grid_index import Interval
+
+Decide = Callable[[float], Hashable]
+DecisionInterval = Tuple[Interval, Hashable]
+
+# Evenly spaced samples added when the breakpoints are incomplete
+SAMPLES = 64
+
+
+def field_breakpoints(pipeline, key: str) -> Tuple[List[float], bool]:
+    """(points, complete) of a numeric top-level proposal key in a ProductPipeline"""
+    points, complete = pipeline.atoms.breakpoints(key)
+    for scorecard in pipeline.compiled_scorecards:
+        for param in scorecard.parameters:
+            if param.field == key:
+                points.extend(param.lookup.points)
+            elif key in source_keys(param.field):
+                complete = False
+    for grid in pipeline.compiled_grids:
+        for field, axis in ((grid.row_field, grid.rows), (grid.col_field, grid.cols)):
+            if field == key:
+                points.extend(axis.breakpoints())
+            elif key in source_keys(field):
+                complete = False
+    return points, complete
+
+
+def _merge(pieces: Sequence[DecisionInterval]) -> List[DecisionInterval]:
+    """Join adjacent pieces with the same decision"""
+    merged: List[DecisionInterval] = []
+    for interval, decision in pieces:
+        if merged and merged[-1][1] == decision:
+            (low, low_inclusive, _, _), _ = merged[-1]
+            merged[-1] = ((low, low_inclusive, interval[2], interval[3]), decision)
+        else:
+            merged.append((interval, decision))
+    return merged
+
+
+def _exact_pieces(decide: Decide, knots: List[float], integer: bool) -> List[DecisionInterval]:
+    """One piece per knot and per gap between knots, each evaluated once"""
+    pieces: List[DecisionInterval] = []
+    for i, knot in enumerate(knots):
+        if i:
+            previous = knots[i - 1]
+            if integer and knot - previous > 1:
+                pieces.append(((previous + 1, True, knot - 1, True), decide(previous + 1)))
+            elif not integer:
+                middle = previous + (knot - previous) / 2
+                if previous < middle < knot:
+                    pieces.append(((previous, False, knot, False), decide(middle)))
+        pieces.append(((knot, True, knot, True), decide(knot)))
+    return pieces
+
+
+def _bisected_pieces(decide: Decide, knots: List[float], integer: bool, tolerance: float) -> List[DecisionInterval]:
+    """Pieces from sampled decisions, each change bisected until its samples are tolerance apart"""
+    samples = [(x, decide(x)) for x in knots]
+    refined = samples[:1]
+    for x, decision in samples[1:]:
+        stack = [(refined[-1], (x, decision))]
+        while stack:
+            (a, a_decision), (b, b_decision) = stack.pop()
+            middle = (a + b) // 2 if integer else a + (b - a) / 2
+            if a_decision == b_decision or b - a <= tolerance or not a < middle < b:
+                refined.append((b, b_decision))
+                continue
+            middle_decision = decide(middle)
+            stack.append(((middle, middle_decision), (b, b_decision)))
+            stack.append(((a, a_decision), (middle, middle_decision)))
+    # Each run of equal decisions reaches up to the first sample of the next
+    pieces: List[DecisionInterval] = []
+    for i, (x, decision) in enumerate(refined):
+        if i + 1 == len(refined):
+            pieces.append(((x, True, x, True), decision))
+        elif integer:
+            pieces.append(((x, True, refined[i + 1][0] - 1, True), decision))
+        else:
+            pieces.append(((x, True, refined[i + 1][0], False), decision))
+    return pieces
+
+
+def search_boundaries(decide: Decide, low: float, high: float, points: Sequence[float], complete: bool,
+                      integer: bool = False, tolerance: float = 0.0) -> Tuple[List[DecisionInterval], bool]:
+    """(intervals covering [low, high] with their decide() value, exact).
+
+    decide(x) evaluates the proposal with the field set to x (an int when
+    integer). points and complete are as from field_breakpoints; tolerance is
+    the bisection resolution for float fields when complete is False.
+    """
+    if integer:
+        low, high = math.ceil(low), math.floor(high)
+    if low > high:
+        raise ValueError("Empty range")
+    knots = {low, high}
+    inside = [p for p in points if low <= p <= high]
+    if integer:
+        knots.update(k for p in inside for k in (math.floor(p), math.ceil(p)))
+    else:
+        knots.update(inside)
+    if complete:
+        return _merge(_exact_pieces(decide, sorted(knots), integer)), True
+
+    step = (high - low) / SAMPLES
+    if integer:
+        exhaustive = high - low <= SAMPLES
+        knots.update(range(low, high + 1) if exhaustive else (low + math.floor(i * step) for i in range(SAMPLES)))
+        tolerance = 1
+    else:
+        exhaustive = False
+        knots.update(low + i * step for i in range(SAMPLES))
+        tolerance = tolerance if tolerance > 0 else step / 2 ** 20
+    return _merge(_bisected_pieces(decide, sorted(knots), integer, tolerance)), exhaustive
@@ -0,0 +1,407 @@
+"""Evaluation pipeline
+
+The one implementation of the underwriting decision for a proposal: staged
+rules in execution order (unassigned rules last), then the legacy scorecard
+and grid phases (see scorecard_index and grid_index), then risk-band loading
+(see risk_index). Rules, scorecards and grids come from the snapshot's
+pipeline for the proposal's product. The single-proposal endpoint runs it
+directly. The columnar batch engine evaluates every phase for many rows at
+once from the same compiled forms, so bulk results agree with it.
+
+Callers choose how much trace to record:
+    none     - decision only; no clock reads or trace entries
+    summary  - one entry per stage with its status, triggered count and time
+    full     - stage entries plus an entry per executed rule with its input
+               values and time
+
+Trace entries are small slotted records that reference the snapshot's rule
+and stage dicts; trace_json() turns them into the StageExecutionTrace /
+RuleExecutionTrace JSON shape once, at the response boundary.
+"""
+import time
+from enum import Enum
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Tuple
+
+from fields import source_keys
+from grid_index import CompiledGrid
+from rule_compiler import Memo
+from scorecard_index import CompiledScorecard
+from stage_cache import MISS, OutcomeCache
+
+# Mirror CaseTypeEnum, ReasonFlagEnum and RuleCategoryEnum in server.py
+CASE_NORMAL = 0
+CASE_DIRECT_ACCEPT = 1
+CASE_DIRECT_FAIL = -1
+CASE_GCRP = 3
+REASON_STP_PASS_SKIP = 0
+REASON_STP_FAIL_PRINT = 1
+CATEGORY_VALIDATION = "validation"
+
+UNASSIGNED_STAGE = {"id": "unassigned", "name": "Unassigned Rules", "execution_order": 999}
+
+
+class TraceLevel(str, Enum):
+    NONE = "none"
+    SUMMARY = "summary"
+    FULL = "full"
+
+
+class RuleTrace:
+    """One executed rule; input values are resolved only when rendered"""
+    __slots__ = ('rule', 'compiled', 'triggered', 'execution_time_ms')
+
+    def __init__(self, rule: Dict[str, Any], compiled, triggered: bool, execution_time_ms: float):
+        self.rule = rule
+        self.compiled = compiled
+        self.triggered = triggered
+        self.execution_time_ms = execution_time_ms
+
+    def to_json(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        rule = self.rule
+        return {
+            "rule_id": rule['id'],
+            "rule_name": rule['name'],
+            "category": rule['category'],
+            "triggered": self.triggered,
+            "input_values": self.compiled.input_values(data),
+            "condition_result": self.triggered,
+            "action_applied": rule['action'] if self.triggered else None,
+            "execution_time_ms": self.execution_time_ms
+        }
+
+
+class StageTrace:
+    __slots__ = ('stage', 'status', 'rules', 'triggered_count', 'execution_time_ms')
+
+    def __init__(self, stage: Dict[str, Any], status: str, rules: Sequence[RuleTrace],
+                 triggered_count: int, execution_time_ms: float):
+        self.stage = stage
+        self.status = status
+        self.rules = rules
+        self.triggered_count = triggered_count
+        self.execution_time_ms = execution_time_ms
+
+
+class Outcome:
+    """Mutable decision state of one proposal as it moves through the phases"""
+    __slots__ = (
+        'stp_decision', 'case_type', 'reason_flag', 'scorecard_value', 'triggered_rules',
+        'validation_errors', 'reason_codes', 'reason_messages', 'stage_trace', 'risk_loading'
+    )
+
+    def __init__(self):
+        self.stp_decision = "PASS"
+        self.case_type = CASE_NORMAL
+        self.reason_flag = REASON_STP_PASS_SKIP
+        self.scorecard_value = 0
+        self.triggered_rules: List[str] = []
+        self.validation_errors: List[str] = []
+        self.reason_codes: List[str] = []
+        self.reason_messages: List[str] = []
+        self.stage_trace: List[StageTrace] = []
+        self.risk_loading: Optional[Dict[str, Any]] = None
+
+    def fail(self):
+        self.stp_decision = "FAIL"
+        self.reason_flag = REASON_STP_FAIL_PRINT
+
+    def trace_json(self, data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """(stage_trace, rule_trace) as JSON-ready dicts; rule entries are shared by both lists"""
+        stage_trace = []
+        rule_trace = []
+        for entry in self.stage_trace:
+            rules_executed = [r.to_json(data) for r in entry.rules]
+            rule_trace.extend(rules_executed)
+            stage = entry.stage
+            stage_trace.append({
+                "stage_id": stage['id'],
+                "stage_name": stage['name'],
+                "execution_order": stage['execution_order'],
+                "status": entry.status,
+                "rules_executed": rules_executed,
+                "triggered_rules_count": entry.triggered_count,
+                "execution_time_ms": entry.execution_time_ms
+            })
+        return stage_trace, rule_trace
+
+
+def _apply_action(rule: Dict[str, Any], outcome: Outcome) -> Tuple[bool, bool]:
+    """Apply a triggered rule's action; returns (fails, hard stop)"""
+    action = rule['action'] or {}
+    fails = False
+    outcome.triggered_rules.append(rule['name'])
+    if rule['category'] == CATEGORY_VALIDATION and action.get('reason_message'):
+        outcome.validation_errors.append(action['reason_message'])
+    if action.get('decision') == "FAIL":
+        outcome.fail()
+        fails = True
+    if action.get('case_type') is not None:
+        outcome.case_type = action['case_type']
+    if action.get('score_impact') is not None:
+        outcome.scorecard_value += action['score_impact']
+    if action.get('reason_code'):
+        outcome.reason_codes.append(action['reason_code'])
+    if action.get('reason_message'):
+        outcome.reason_messages.append(action['reason_message'])
+    if action.get('is_hard_stop'):
+        outcome.fail()
+        outcome.case_type = CASE_DIRECT_FAIL
+        return True, True
+    return fails, False
+
+
+def _run_stage(matcher, stage_id: Optional[str], data: Dict[str, Any], memo: Memo, product_type: Any,
+               outcome: Outcome, rules_executed: Optional[List[RuleTrace]], triggered_rules: Optional[List[Dict[str, Any]]]):
+    """Walk one stage's applicable rules; returns (triggered count, has fail, hard stopped).
+
+    rules_executed collects rule trace records, or is None when not tracing
+    rules; triggered_rules, unless None, collects the rules that triggered.
+    """
+    triggered_count = 0
+    has_fail = False
+    for rule, compiled in matcher.walk(stage_id, product_type, lambda: outcome.case_type):
+        if rules_executed is not None:
+            rule_start = time.time()
+            triggered = compiled.condition(data, memo)
+            rules_executed.append(RuleTrace(rule, compiled, triggered, (time.time() - rule_start) * 1000))
+        else:
+            triggered = compiled.condition(data, memo)
+        if not triggered:
+            continue
+
+        triggered_count += 1
+        if triggered_rules is not None:
+            triggered_rules.append(rule)
+        fails, hard_stop = _apply_action(rule, outcome)
+        has_fail = has_fail or fails
+        if hard_stop:
+            return triggered_count, True, True
+    return triggered_count, has_fail, False
+
+
+def _replay_stage(triggered_rules: Sequence[Dict[str, Any]], outcome: Outcome):
+    """Apply a stage's triggered rules as _run_stage did; returns what it returned"""
+    has_fail = False
+    for rule in triggered_rules:
+        fails, hard_stop = _apply_action(rule, outcome)
+        has_fail = has_fail or fails
+        if hard_stop:
+            return len(triggered_rules), True, True
+    return len(triggered_rules), has_fail, False
+
+
+def apply_rules(stages: Sequence[Dict[str, Any]], rule_index, data: Dict[str, Any], memo: Memo, product_type: Any,
+                outcome: Outcome, trace: TraceLevel = TraceLevel.NONE, cache: Optional[OutcomeCache] = None,
+                version: int = 0):
+    """Run enabled stages in order, then unassigned rules, honouring stop_on_fail and hard stops.
+
+    memo is a fresh AtomTable.memo() of the ruleset the rules were compiled with.
+    cache, if given, holds stage outcomes of ruleset version (see stage_cache);
+    a full trace, which lists every rule a stage tests, never uses it.
+    """
+    traced = trace != TraceLevel.NONE
+    full = trace == TraceLevel.FULL
+    cached = cache is not None and cache.enabled and not full
+    # A full trace records every applicable rule, so it never takes a shortcut
+    matcher = rule_index if full else rule_index.matcher(data, memo, product_type)
+    stopped = False
+    for stage in list(stages) + [None]:
+        if stage is None:
+            # Unassigned rules run last, only when nothing stopped processing
+            if stopped or not rule_index.stage_size(None):
+                break
+            stage, stage_id, stop_on_fail = UNASSIGNED_STAGE, None, False
+        elif stopped:
+            if traced:
+                outcome.stage_trace.append(StageTrace(stage, "skipped", (), 0, 0))
+            continue
+        else:
+            stage_id, stop_on_fail = stage['id'], stage['stop_on_fail']
+
+        stage_start = time.time() if traced else 0.0
+        rules_executed = [] if full else None
+        key = None
+        if cached:
+            projection = rule_index.stage_projection(stage_id).key(data)
+            if projection is not None:
+                key = (rule_index, stage_id, outcome.case_type, projection)
+        triggered_rules = cache.get(version, 'stage', key) if key is not None else MISS
+        if triggered_rules is not MISS:
+            triggered_count, has_fail, stopped = _replay_stage(triggered_rules, outcome)
+        else:
+            triggered_rules = [] if key is not None else None
+            triggered_count, has_fail, stopped = _run_stage(
+                matcher, stage_id, data, memo, product_type, outcome, rules_executed, triggered_rules
+            )
+            if key is not None:
+                cache.put(version, 'stage', key, tuple(triggered_rules))
+        if has_fail and stop_on_fail:
+            stopped = True
+        if traced:
+            outcome.stage_trace.append(StageTrace(
+                stage, "failed" if has_fail else "passed", rules_executed or (), triggered_count,
+                round((time.time() - stage_start) * 1000, 2)
+            ))
+
+
+def apply_scorecards(scorecards: Sequence[CompiledScorecard], data: Dict[str, Any], product_type: Any, outcome: Outcome,
+                     parameter_scores: Optional[Dict[Any, int]] = None):
+    """Legacy scorecards: add banded parameter scores, then move the case type by threshold.
+
+    parameter_scores, if given, maps parameters to scores already known for
+    the proposal and collects the ones computed here.
+    """
+    for scorecard in scorecards:
+        if scorecard.product != product_type:
+            continue
+        if parameter_scores is None:
+            outcome.scorecard_value += scorecard.score(data)
+        else:
+            for param in scorecard.parameters:
+                score = parameter_scores.get(param)
+                if score is None:
+                    score = parameter_scores[param] = param.score(data)
+                outcome.scorecard_value += score
+        if outcome.scorecard_value >= scorecard.threshold_direct_accept:
+            if outcome.case_type == CASE_NORMAL:
+                outcome.case_type = CASE_DIRECT_ACCEPT
+        elif outcome.scorecard_value < scorecard.threshold_refer:
+            outcome.case_type = CASE_GCRP
+
+
+def apply_grids(grids: Sequence[CompiledGrid], data: Dict[str, Any], product_type: Any, outcome: Outcome,
+                grid_cells: Optional[Dict[Any, Any]] = None):
+    """Legacy grids: the cell the row and column values fall in may decline, refer or score.
+
+    grid_cells, if given, maps grids to cells already known for the proposal
+    and collects the ones looked up here.
+    """
+    for grid in grids:
+        if not grid.applies_to(product_type):
+            continue
+        if grid_cells is None:
+            cell = grid.lookup(data)
+        elif grid in grid_cells:
+            cell = grid_cells[grid]
+        else:
+            cell = grid_cells[grid] = grid.lookup(data)
+        if cell is None:
+            continue
+        if cell.result == 'DECLINE':
+            outcome.fail()
+            outcome.case_type = CASE_DIRECT_FAIL
+            outcome.reason_messages.append(cell.reason_message)
+        elif cell.result == 'REFER':
+            outcome.case_type = CASE_GCRP
+            outcome.reason_messages.append(cell.reason_message)
+        if cell.score_impact:
+            outcome.scorecard_value += cell.score_impact
+
+
+def apply_risk_loading(risk_index, data: Dict[str, Any], product_type: Any, outcome: Outcome,
+                       cache: Optional[OutcomeCache] = None, version: int = 0, state: Optional['EvaluationState'] = None):
+    """Risk-band loading; a cached loading dict is shared, so treat it as read-only"""
+    if state is not None and state.risk_loading is not None:
+        outcome.risk_loading = state.risk_loading
+        return
+    key = None
+    if cache is not None and cache.enabled:
+        projection = risk_index.projection(product_type).key(data)
+        if projection is not None:
+            key = (risk_index, product_type, projection)
+    loading = cache.get(version, 'risk_loading', key) if key is not None else MISS
+    if loading is MISS:
+        loading = risk_index.loading(data, product_type)
+        if key is not None:
+            cache.put(version, 'risk_loading', key, loading)
+    outcome.risk_loading = loading
+    if state is not None:
+        state.risk_loading = loading
+
+
+class EvaluationState:
+    """What evaluating one proposal computed that evaluating an amended copy can reuse.
+
+    Under one ruleset version and product, atom results (the memo), scorecard
+    parameter scores, grid cells and the risk loading are functions of the
+    fields they read. amended() keeps the ones that read no changed field. The
+    rule walk, scorecard thresholds and grid actions depend on the case type
+    earlier phases left, so they always run again, mostly on known atoms.
+    """
+    __slots__ = ('version', 'product_type', 'memo', 'parameter_scores', 'grid_cells', 'risk_loading')
+
+    def __init__(self, version: int, product_type: Any):
+        self.version = version
+        self.product_type = product_type
+        self.memo: Optional[Memo] = None
+        self.parameter_scores: Dict[Any, int] = {}
+        self.grid_cells: Dict[Any, Any] = {}
+        self.risk_loading: Optional[Dict[str, Any]] = None
+
+    def amended(self, ruleset, product_type: Any, changed: AbstractSet[str]) -> 'EvaluationState':
+        """The state to evaluate the proposal with the changed top-level fields against ruleset"""
+        state = EvaluationState(ruleset.version, product_type)
+        if ruleset.version != self.version or product_type != self.product_type:
+            return state
+        if self.memo is not None:
+            state.memo = bytearray(self.memo)
+            ruleset.pipeline(self.product_type).atoms.forget(state.memo, changed)
+        state.parameter_scores = {
+            param: score for param, score in self.parameter_scores.items() if not source_keys(param.field) & changed
+        }
+        state.grid_cells = {
+            grid: cell for grid, cell in self.grid_cells.items()
+            if not (source_keys(grid.row_field) | source_keys(grid.col_field)) & changed
+        }
+        fields = ruleset.risk_index.projection(self.product_type).fields
+        if not any(source_keys(field) & changed for field in fields):
+            state.risk_loading = self.risk_loading
+        return state
+
+
+def evaluate(ruleset, data: Dict[str, Any], now: float, trace: TraceLevel = TraceLevel.NONE,
+             cache: Optional[OutcomeCache] = None, state: Optional[EvaluationState] = None) -> Outcome:
+    """Evaluate a proposal dict (ProposalData.model_dump()) against a RulesetSnapshot.
+
+    now (a POSIX timestamp) selects the rules in their effective window. cache,
+    if given, memoizes stage and risk-loading outcomes (see stage_cache).
+    state, if given, is a new EvaluationState for this ruleset and the
+    proposal's product, or one amended() from an evaluation of an earlier
+    version of the proposal; it reuses and collects intermediate results.
+    """
+    # product_type may be a ProductTypeEnum member; filters compare on its value
+    product_type = getattr(data['product_type'], 'value', data['product_type'])
+    pipeline = ruleset.pipeline(product_type)
+    outcome = Outcome()
+    memo = state.memo if state is not None and state.memo is not None else pipeline.atoms.memo()
+    if state is not None:
+        state.memo = memo
+    apply_rules(ruleset.stages, pipeline.rule_index(now), data, memo, product_type, outcome,
+                TraceLevel(trace), cache, ruleset.version)
+    apply_scorecards(pipeline.compiled_scorecards, data, product_type, outcome,
+                     state.parameter_scores if state is not None else None)
+    apply_grids(pipeline.compiled_grids, data, product_type, outcome, state.grid_cells if state is not None else None)
+    apply_risk_loading(ruleset.risk_index, data, product_type, outcome, cache, ruleset.version, state)
+    return outcome
+
+
+def to_bulk_result(data: Dict[str, Any], outcome: Outcome, case_type_labels: Dict[int, str],
+                   evaluation_time_ms: float) -> Dict[str, Any]:
+    """The BulkProposalResult dict of an outcome"""
+    risk_loading = outcome.risk_loading
+    return {
+        "proposal_id": data['proposal_id'],
+        "stp_decision": outcome.stp_decision,
+        "case_type": outcome.case_type,
+        "case_type_label": case_type_labels.get(outcome.case_type, "Unknown"),
+        "scorecard_value": outcome.scorecard_value,
+        "triggered_rules": outcome.triggered_rules,
+        "validation_errors": outcome.validation_errors,
+        "reason_codes": list(set(outcome.reason_codes)),
+        "reason_messages": list(set(outcome.reason_messages)),
+        "base_premium": risk_loading['base_premium'],
+        "loaded_premium": risk_loading['loaded_premium'],
+        "loading_percentage": risk_loading['total_loading_percentage'],
+        "risk_score": risk_loading['total_risk_score'],
+        "evaluation_time_ms": evaluation_time_ms
+    }
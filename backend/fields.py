@@ -0,0 +1,199 @@
+"""Field resolution for rules, scorecards, grids and risk bands
+
+A field is either a dotted path into the proposal dict ("bmi",
+"additional_data.height_cm") or the name of a derived field registered in
+DERIVED_FIELDS. Derived fields cover what rule templates test but ProposalData
+does not carry:
+
+- Ratio: one numeric field over another (None when either is missing or not
+  numeric, or the denominator is zero)
+- Alias: a top-level name for a value clients send in additional_data
+- Lookup: a table lookup on another field's value
+
+compile_field_accessor resolves the name once, when the ruleset is compiled,
+so a rule on a derived field costs one extra function call. A derived value is
+computed at most once per proposal: each accessor remembers the value for the
+last proposal dict it was given (proposal dicts are never mutated during
+evaluation). The columnar batch engine builds a derived column with one
+vectorized pass (see DerivedField.column).
+
+Derived names must not shadow ProposalData fields; server.py checks this at
+import.
+"""
+import math
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+FieldAccessor = Callable[[Dict[str, Any]], Any]
+
+
+def compile_path_accessor(field: str) -> FieldAccessor:
+    """Bind a dotted field path (e.g. "additional_data.height_cm") to a getter"""
+    keys = tuple(field.split('.'))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda data: data.get(key)
+
+    def get_nested(data: Dict[str, Any]) -> Any:
+        value = data
+        for key in keys:
+            if isinstance(value, dict):
+                value = value.get(key)
+            else:
+                return None
+        return value
+    return get_nested
+
+
+def _as_float(value: Any) -> float:
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except Exception:
+        return math.nan
+
+
+class DerivedField(ABC):
+    """A value computed from other fields of the proposal"""
+    description = ''
+    sources: Tuple[str, ...] = ()  # the fields compute() reads
+
+    @abstractmethod
+    def compute(self, data: Dict[str, Any]) -> Any:
+        """The field's value for one proposal dict"""
+
+    def column(self, cols) -> List[Any]:
+        """The field's values over a batch (a batch_engine.ColumnStore)"""
+        return [self.compute(row) for row in cols.rows]
+
+    def float_column(self, cols) -> Optional[np.ndarray]:
+        """The field as floats over a batch, if cheaper than converting column()"""
+        return None
+
+    def accessor(self) -> FieldAccessor:
+        last: List[Tuple[Any, Any]] = [(None, None)]
+
+        def get(data: Dict[str, Any]) -> Any:
+            seen, value = last[0]
+            if seen is data:
+                return value
+            value = self.compute(data)
+            last[0] = (data, value)
+            return value
+        return get
+
+
+class Ratio(DerivedField):
+    def __init__(self, numerator: str, denominator: str, description: str = ''):
+        self.numerator, self.denominator = numerator, denominator
+        self.sources = (numerator, denominator)
+        self.description = description or f"{numerator} / {denominator}"
+        self._get_numerator = compile_path_accessor(numerator)
+        self._get_denominator = compile_path_accessor(denominator)
+
+    def compute(self, data: Dict[str, Any]) -> Optional[float]:
+        denominator = _as_float(self._get_denominator(data))
+        if denominator == 0:
+            return None
+        result = _as_float(self._get_numerator(data)) / denominator
+        return None if math.isnan(result) else result
+
+    def float_column(self, cols) -> np.ndarray:
+        numerator, denominator = cols.floats(self.numerator), cols.floats(self.denominator)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = numerator / denominator
+        result[denominator == 0] = np.nan
+        return result
+
+    def column(self, cols) -> List[Any]:
+        return [None if math.isnan(x) else x for x in self.float_column(cols).tolist()]
+
+
+class Alias(DerivedField):
+    def __init__(self, path: str, description: str = ''):
+        self.path = path
+        self.sources = (path,)
+        self.description = description or path
+        self._get = compile_path_accessor(path)
+
+    def compute(self, data: Dict[str, Any]) -> Any:
+        return self._get(data)
+
+    def accessor(self) -> FieldAccessor:
+        # A path is as cheap to walk again as to remember
+        return self._get
+
+    def column(self, cols) -> List[Any]:
+        return cols.values(self.path)
+
+    def float_column(self, cols) -> np.ndarray:
+        return cols.floats(self.path)
+
+
+class Lookup(DerivedField):
+    def __init__(self, source: str, table: Dict[Any, Any], default: Any = None, description: str = ''):
+        self.source, self.table, self.default = source, dict(table), default
+        self.sources = (source,)
+        self.description = description or f"{source} lookup"
+        self._get = compile_path_accessor(source)
+
+    def _lookup(self, value: Any) -> Any:
+        if isinstance(value, Enum):
+            value = value.value
+        try:
+            return self.table.get(value, self.default)
+        except TypeError:
+            return self.default
+
+    def compute(self, data: Dict[str, Any]) -> Any:
+        return self._lookup(self._get(data))
+
+    def column(self, cols) -> List[Any]:
+        return [self._lookup(v) for v in cols.values(self.source)]
+
+
+def _additional(name: str, description: str) -> Alias:
+    return Alias(f"additional_data.{name}", description)
+
+
+DERIVED_FIELDS: Dict[str, DerivedField] = {
+    'sa_to_income_ratio': Ratio('sum_assured', 'applicant_income', "Sum assured as a multiple of annual income"),
+    'premium_to_income_ratio': Ratio('premium', 'applicant_income', "Premium as a fraction of annual income"),
+    'product_family': Lookup('product_type', {
+        'term_life': 'term', 'term_pure': 'term', 'term_returns': 'term',
+        'endowment': 'savings', 'ulip': 'investment',
+    }, description="term / savings / investment, from product_type"),
+    'height_cm': _additional('height_cm', "Height in cm"),
+    'has_weight_changed': _additional('has_weight_changed', "Weight changed in the last year"),
+    'family_history_count': _additional('family_history_count', "Family members with a relevant medical history"),
+    'education_code': _additional('education_code', "Education qualification code"),
+    'mode': _additional('mode', "Proposal sourcing mode"),
+    'nominee_relation': _additional('nominee_relation', "Nominee's relation to the life assured"),
+    'risk_category': _additional('risk_category', "Customer risk category"),
+    'aml_category': _additional('aml_category', "AML risk category"),
+    'is_ofac': _additional('is_ofac', "Matched an OFAC sanctions list"),
+    'is_politically_exposed': _additional('is_politically_exposed', "Politically exposed person"),
+    'is_negative_pincode': _additional('is_negative_pincode', "Pincode is on the negative list"),
+    'is_narcotic': _additional('is_narcotic', "Narcotics history"),
+    'is_criminally_convicted': _additional('is_criminally_convicted', "Criminal conviction"),
+    'is_adventurous': _additional('is_adventurous', "Adventurous / hazardous pursuits"),
+    'is_medical_generated': _additional('is_medical_generated', "Medical examination has been triggered"),
+}
+
+
+def source_keys(field: str) -> FrozenSet[str]:
+    """The top-level proposal keys a field's value is read or computed from"""
+    derived = DERIVED_FIELDS.get(field)
+    if derived is None:
+        return frozenset((field.split('.')[0],))
+    return frozenset(key for source in derived.sources for key in source_keys(source))
+
+
+def compile_field_accessor(field: str) -> FieldAccessor:
+    """Bind a field name - a dotted path or a derived field - to a getter"""
+    derived = DERIVED_FIELDS.get(field)
+    return derived.accessor() if derived is not None else compile_path_accessor(field)
@@ -0,0 +1,196 @@
+"""Compiled grid lookups
+
+Each grid is compiled into two label axes and a NumPy matrix of cell numbers,
+so finding the cell for a proposal is two axis lookups and one matrix read no
+matter how many cells the grid has.
+
+An axis resolves a field value to a label in two steps:
+
+1. exact: str(value) equal to a label (how grids have always matched)
+2. numeric band: labels such as "18-30", "<18.5", ">35", "25L-50L", "1Cr-2Cr",
+   "50L+" or "30" are parsed into intervals, and a numeric value is bisected
+   into them. Ranges are inclusive, except that a range ending where another
+   label's range starts ("18.5-25" / "25-30") leaves that boundary to the
+   later range. Amount suffixes K, L (lakh), Cr (crore) and M are understood.
+
+Where labels overlap, the first label in the axis wins.
+"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from intervals import IntervalLookup
+from rule_compiler import compile_field_accessor
+
+Interval = Tuple[float, bool, float, bool]  # (low, low inclusive, high, high inclusive)
+
+_MULTIPLIERS = {
+    '': 1, 'k': 1e3, 'l': 1e5, 'lac': 1e5, 'lakh': 1e5, 'lakhs': 1e5,
+    'm': 1e6, 'mn': 1e6, 'cr': 1e7, 'crore': 1e7, 'crores': 1e7,
+}
+_AMOUNT = r'(\d+(?:\.\d+)?|\.\d+)\s*([a-z]*)'
+_COMPARISON = re.compile(r'^(<=|>=|<|>|≤|≥)\s*' + _AMOUNT + r'$')
+_RANGE = re.compile(r'^' + _AMOUNT + r'\s*(?:-|–|to)\s*' + _AMOUNT + r'$')
+_AT_LEAST = re.compile(r'^' + _AMOUNT + r'\s*\+$')
+_POINT = re.compile(r'^' + _AMOUNT + r'$')
+
+
+def _amount(number: str, suffix: str) -> Optional[float]:
+    multiplier = _MULTIPLIERS.get(suffix)
+    return None if multiplier is None else float(number) * multiplier
+
+
+def parse_band_label(label: str) -> Optional[Interval]:
+    """Numeric interval of a grid label, or None if it is not a numeric band"""
+    text = label.strip().lower().replace(',', '')
+    match = _COMPARISON.match(text)
+    if match:
+        bound = _amount(match.group(2), match.group(3))
+        if bound is None:
+            return None
+        sign = match.group(1)
+        if sign in ('<', '<=', '≤'):
+            return (-math.inf, True, bound, sign != '<')
+        return (bound, sign != '>', math.inf, True)
+    match = _RANGE.match(text)
+    if match:
+        low, high = _amount(match.group(1), match.group(2)), _amount(match.group(3), match.group(4))
+        if low is None or high is None or low > high:
+            return None
+        return (low, True, high, True)
+    match = _AT_LEAST.match(text)
+    if match:
+        bound = _amount(match.group(1), match.group(2))
+        return None if bound is None else (bound, True, math.inf, True)
+    match = _POINT.match(text)
+    if match:
+        bound = _amount(match.group(1), match.group(2))
+        return None if bound is None else (bound, True, bound, True)
+    return None
+
+
+def _contains(interval: Interval, x: float) -> bool:
+    low, low_inclusive, high, high_inclusive = interval
+    return (low < x or (low_inclusive and low == x)) and (x < high or (high_inclusive and high == x))
+
+
+def _numeric(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        result = float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return None if math.isnan(result) else result
+
+
+class GridAxis:
+    """Maps field values to label positions (-1 when no label matches)"""
+    __slots__ = ('labels', 'exact', 'numeric')
+
+    def __init__(self, labels: Sequence[str]):
+        self.labels = tuple(labels)
+        self.exact: Dict[str, int] = {}
+        intervals: List[Tuple[int, Interval]] = []
+        for position, label in enumerate(self.labels):
+            self.exact.setdefault(label, position)
+            interval = parse_band_label(label)
+            if interval is not None:
+                intervals.append((position, interval))
+
+        # "18.5-25" then "25-30": 25 belongs to the range that starts there
+        starts = {low for _, (low, low_inclusive, _, _) in intervals if low_inclusive}
+        intervals = [
+            (position, (low, low_inclusive, high, high_inclusive and not (high in starts and low < high)))
+            for position, (low, low_inclusive, high, high_inclusive) in intervals
+        ]
+
+        self.numeric: Optional[IntervalLookup[int]] = None
+        if intervals:
+            self.numeric = IntervalLookup(
+                (b for _, (low, _, high, _) in intervals for b in (low, high)),
+                lambda x: next((position for position, interval in intervals if _contains(interval, x)), -1),
+            )
+
+    def index(self, value: Any) -> int:
+        position = self.exact.get(str(value))
+        if position is not None:
+            return position
+        if self.numeric is not None:
+            x = _numeric(value)
+            if x is not None:
+                return self.numeric.get(x)
+        return -1
+
+    def breakpoints(self) -> List[float]:
+        """Numbers at which index() may change: band bounds and labels str() of a number can equal"""
+        points = list(self.numeric.points) if self.numeric is not None else []
+        for label in self.exact:
+            x = _numeric(label)
+            if x is not None and not math.isinf(x):
+                points.append(x)
+        return points
+
+    def indices(self, values: Sequence[Any]) -> np.ndarray:
+        return np.fromiter((self.index(v) for v in values), dtype=np.intp, count=len(values))
+
+
+class GridCell:
+    __slots__ = ('result', 'score_impact', 'reason_message')
+
+    def __init__(self, grid_name: str, cell: Dict[str, Any]):
+        self.result = cell.get('result')
+        self.score_impact = cell.get('score_impact')
+        self.reason_message = None
+        if self.result in ('DECLINE', 'REFER'):
+            self.reason_message = f"Grid {grid_name}: {cell['row_value']} × {cell['col_value']} = {self.result}"
+
+
+class CompiledGrid:
+    __slots__ = ('name', 'products', 'row_field', 'col_field', 'get_row', 'get_col', 'rows', 'cols', 'cells', 'matrix')
+
+    def __init__(self, grid: Dict[str, Any]):
+        self.name = grid['name']
+        self.products = tuple(grid['products'] or ())
+        self.row_field = grid['row_field'] or ''
+        self.col_field = grid['col_field'] or ''
+        self.get_row = compile_field_accessor(self.row_field)
+        self.get_col = compile_field_accessor(self.col_field)
+
+        # Cells only ever matched string labels; labels used by cells but
+        # missing from row_labels / col_labels still get an axis position
+        cells = [c for c in grid['cells'] or [] if isinstance(c.get('row_value'), str) and isinstance(c.get('col_value'), str)]
+        self.rows = GridAxis(self._labels(grid.get('row_labels'), (c['row_value'] for c in cells)))
+        self.cols = GridAxis(self._labels(grid.get('col_labels'), (c['col_value'] for c in cells)))
+        self.cells = tuple(GridCell(self.name, c) for c in cells)
+        self.matrix = np.full((max(len(self.rows.labels), 1), max(len(self.cols.labels), 1)), -1, dtype=np.intp)
+        for number, cell in enumerate(cells):
+            # The first cell listed for a row/column pair wins
+            row, col = self.rows.exact[cell['row_value']], self.cols.exact[cell['col_value']]
+            if self.matrix[row, col] < 0:
+                self.matrix[row, col] = number
+
+    @staticmethod
+    def _labels(labels: Optional[Sequence[Any]], cell_labels) -> List[str]:
+        ordered = dict.fromkeys(label for label in labels or [] if isinstance(label, str))
+        ordered.update(dict.fromkeys(cell_labels))
+        return list(ordered)
+
+    def applies_to(self, product_type: Any) -> bool:
+        return not self.products or product_type in self.products
+
+    def lookup(self, data: Dict[str, Any]) -> Optional[GridCell]:
+        row = self.rows.index(self.get_row(data))
+        if row < 0:
+            return None
+        col = self.cols.index(self.get_col(data))
+        if col < 0:
+            return None
+        number = self.matrix[row, col]
+        return self.cells[number] if number >= 0 else None
+
+
+def compile_grids(grids: Sequence[Dict[str, Any]]) -> Tuple[CompiledGrid, ...]:
+    return tuple(CompiledGrid(g) for g in grids)
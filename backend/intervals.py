@@ -0,0 +1,57 @@
+"""Piecewise-constant lookups over floats
+
+Risk bands, grid labels and scorecard bands all map a numeric value to
+something that only changes at a few boundary points. IntervalLookup
+tabulates such a function once, at every boundary point and for every gap
+between two points, so evaluating it is a single bisect (or one
+np.searchsorted over a whole column).
+"""
+import math
+from bisect import bisect_left
+from typing import Callable, Generic, Iterable, List, TypeVar
+
+import numpy as np
+
+T = TypeVar('T')
+
+
+class IntervalLookup(Generic[T]):
+    """value_at(x) for any float x, from its values at and between points.
+
+    value_at must be constant inside each open gap between consecutive points
+    (and below the first / above the last). Slot 2i is the gap below points[i],
+    slot 2i + 1 is points[i] itself, and the last slot is above every point.
+    Callers keep NaN away from get() and slots().
+    """
+    __slots__ = ('points', 'values', '_points_array')
+
+    def __init__(self, points: Iterable[float], value_at: Callable[[float], T]):
+        self.points = sorted({p for p in points if not math.isnan(p)})
+        self.values: List[T] = []
+        for i in range(len(self.points) + 1):
+            if not self.points:
+                representative = 0.0
+            elif i == 0:
+                representative = math.nextafter(self.points[0], -math.inf)
+            else:
+                upper = self.points[i] if i < len(self.points) else math.inf
+                representative = math.nextafter(self.points[i - 1], upper)
+            self.values.append(value_at(representative))
+            if i < len(self.points):
+                self.values.append(value_at(self.points[i]))
+        self._points_array = np.array(self.points, dtype=np.float64)
+
+    def slot(self, x: float) -> int:
+        i = bisect_left(self.points, x)
+        return 2 * i + 1 if i < len(self.points) and self.points[i] == x else 2 * i
+
+    def get(self, x: float) -> T:
+        return self.values[self.slot(x)]
+
+    def slots(self, xs: np.ndarray) -> np.ndarray:
+        """slot() of every element of a float array"""
+        i = np.searchsorted(self._points_array, xs, side='left')
+        if not self.points:
+            return i * 2
+        exact = self._points_array[np.minimum(i, len(self.points) - 1)] == xs
+        return 2 * i + (exact & (i < len(self.points)))
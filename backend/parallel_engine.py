@@ -0,0 +1,176 @@
+"""Process-pool sharding for the columnar batch engine
+
+Large bulk requests are split into chunks that are evaluated in worker
+processes and merged back in input order. Compiled rulesets hold closures and
+cannot be pickled, so the parent publishes a ruleset's row dicts once per
+ruleset key (a file in a private temp directory) and each worker compiles them
+the first time it sees the key, keeping the compiled form for later tasks.
+Tasks therefore only carry the key, the file path and the proposal rows.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from batch_engine import BatchRuleset, compile_batch_ruleset, evaluate_columnar
+
+logger = logging.getLogger(__name__)
+
+Chunk = Tuple[Any, List[Dict[str, Any]]]  # (caller's tag, proposal dicts)
+
+# Compiled rulesets kept per worker process, most recently used last
+WORKER_CACHE_SIZE = 4
+# Published ruleset files kept in the parent once no request is using them
+PUBLISHED_KEEP = 4
+
+
+class EnumValue(str):
+    """Picklable stand-in for a str-valued Enum member (e.g. ProductTypeEnum).
+
+    Compares and hashes as the member's value and keeps the member's str()
+    text, so conditions evaluate exactly as they do on the member itself,
+    without workers having to import the module that defines the enum.
+    """
+
+    def __new__(cls, value: str, text: str):
+        obj = super().__new__(cls, value)
+        obj.text = text
+        return obj
+
+    @property
+    def value(self) -> str:
+        return str.__str__(self)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __reduce__(self):
+        return (EnumValue, (self.value, self.text))
+
+
+def portable_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace Enum members in top-level row values with EnumValue, in place"""
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, Enum):
+                row[key] = EnumValue(value.value, str(value))
+    return rows
+
+
+_worker_rulesets: "OrderedDict[str, Tuple[BatchRuleset, Dict[int, str]]]" = OrderedDict()
+
+
+def _evaluate_in_worker(key: str, path: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    entry = _worker_rulesets.get(key)
+    if entry is None:
+        with open(path, 'rb') as f:
+            tables, case_type_labels = pickle.load(f)
+        ruleset = compile_batch_ruleset(
+            tables['stages'], tables['rules'], tables['risk_bands'], tables['scorecards'], tables['grids']
+        )
+        entry = (ruleset, case_type_labels)
+        _worker_rulesets[key] = entry
+        while len(_worker_rulesets) > WORKER_CACHE_SIZE:
+            _worker_rulesets.popitem(last=False)
+    else:
+        _worker_rulesets.move_to_end(key)
+    return evaluate_columnar(entry[0], rows, entry[1])
+
+
+class ParallelBatchEvaluator:
+    """Lazily started process pool that evaluates row chunks in input order"""
+
+    def __init__(self, workers: int, chunk_rows: int):
+        self.workers = max(1, workers)
+        self.chunk_rows = max(1, chunk_rows)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dir: Optional[str] = None
+        self._published: "OrderedDict[str, List[Any]]" = OrderedDict()  # key -> [path, active users]
+        self._file_ids = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 1
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the server process has threads and open database handles
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info(f"Started bulk evaluation pool with {self.workers} workers")
+            return self._pool
+
+    def _publish(self, key: str, tables: Dict[str, Any], case_type_labels: Dict[int, str]) -> str:
+        with self._lock:
+            entry = self._published.get(key)
+            if entry is None:
+                if self._dir is None:
+                    self._dir = tempfile.mkdtemp(prefix='stp-rulesets-')
+                path = os.path.join(self._dir, f"ruleset-{next(self._file_ids)}.pkl")
+                with open(path, 'wb') as f:
+                    pickle.dump((tables, case_type_labels), f, protocol=pickle.HIGHEST_PROTOCOL)
+                entry = self._published[key] = [path, 0]
+            entry[1] += 1
+            self._published.move_to_end(key)
+            return entry[0]
+
+    def _release(self, key: str):
+        with self._lock:
+            self._published[key][1] -= 1
+            idle = [k for k, (_, users) in self._published.items() if users == 0]
+            for k in idle[:max(0, len(idle) - PUBLISHED_KEEP)]:
+                path, _ = self._published.pop(k)
+                os.remove(path)
+
+    def map_chunks(
+        self, key: str, tables: Dict[str, Any], case_type_labels: Dict[int, str], chunks: Iterable[Chunk]
+    ) -> Iterator[Chunk]:
+        """Evaluate (tag, rows) chunks in the pool, yielding (tag, results) in input order.
+
+        At most two chunks per worker are in flight, so the input is consumed
+        lazily and memory stays bounded for streamed sources.
+        """
+        path = self._publish(key, tables, case_type_labels)
+        pool = self._get_pool()
+        pending = deque()
+        try:
+            for tag, rows in chunks:
+                pending.append((tag, pool.submit(_evaluate_in_worker, key, path, portable_rows(rows))))
+                if len(pending) >= 2 * self.workers:
+                    tag, future = pending.popleft()
+                    yield tag, future.result()
+            while pending:
+                tag, future = pending.popleft()
+                yield tag, future.result()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+        finally:
+            for _, future in pending:
+                future.cancel()
+            self._release(key)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            if self._dir is not None:
+                shutil.rmtree(self._dir, ignore_errors=True)
+                self._dir = None
+                self._published.clear()
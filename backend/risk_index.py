@@ -0,0 +1,212 @@
+"""Indexed risk-band matching for premium loading
+
+Risk bands are grouped by product (bands without products apply to every
+product) and then by condition field when the ruleset snapshot is built.
+Within a field:
+
+- numeric bands (greater_than, less_than, ..., between) share one sorted array
+  of boundary points; every point and every gap between two points maps to the
+  bands that hold there, so a value is one bisect away from its bands
+- equals / in / in_list bands become a hash map from value to bands, and
+  not_equals bands a map to the bands a value rules out
+- bands a hash cannot decide exactly (unhashable or NaN constants) and
+  unhashable proposal values fall back to band_matches()
+
+Matches are applied in priority order, so totals and applied_bands come out
+exactly as with a linear scan. Operators the loading calculation does not
+support (is_empty, not_in, ...) never match.
+"""
+import math
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from intervals import IntervalLookup
+from rule_compiler import FieldAccessor, compile_field_accessor
+from stage_cache import Projection
+
+NUMERIC_COMPARISONS: Dict[str, Callable[[float, float], bool]] = {
+    'greater_than': lambda a, b: a > b,
+    'less_than': lambda a, b: a < b,
+    'greater_than_or_equal': lambda a, b: a >= b,
+    'less_than_or_equal': lambda a, b: a <= b,
+}
+HASHED_OPERATORS = ('equals', 'not_equals', 'in', 'in_list')
+
+# Lookup key for products that no band names explicitly
+OTHER = object()
+
+
+def band_matches(condition: Dict[str, Any], field_value: Any) -> bool:
+    """The reference operator chain of a risk-band condition"""
+    operator = condition.get('operator', '')
+    value = condition.get('value')
+    value2 = condition.get('value2')
+    if field_value is None:
+        return False
+    try:
+        if operator == 'equals':
+            return field_value == value
+        if operator == 'not_equals':
+            return field_value != value
+        if operator in NUMERIC_COMPARISONS:
+            return NUMERIC_COMPARISONS[operator](float(field_value), float(value))
+        if operator == 'between':
+            return float(value) <= float(field_value) <= float(value2)
+        if operator == 'in_list' or operator == 'in':
+            return field_value in value if isinstance(value, list) else field_value == value
+    except (ValueError, TypeError):
+        return False
+    return False
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        result = float(value)
+    except (ValueError, TypeError):
+        return None
+    return None if math.isnan(result) else result
+
+
+def _hash_key(value: Any) -> Any:
+    # str-valued Enum members compare equal to their value but hash by name
+    return value.value if isinstance(value, Enum) else value
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return not (isinstance(value, float) and math.isnan(value))
+
+
+class _FieldIndex:
+    """Bands of one product testing one field, by band position (priority order)"""
+    __slots__ = ('numeric', 'equal', 'not_equal', 'not_equal_all', 'hashed', 'residual')
+
+    def __init__(self, bands: Sequence[Tuple[int, Dict[str, Any]]]):
+        numeric: List[Tuple[int, Callable[[float], bool]]] = []
+        self.equal: Dict[Any, List[int]] = {}
+        self.not_equal: Dict[Any, List[int]] = {}
+        self.not_equal_all: List[int] = []
+        self.hashed: List[Tuple[int, Dict[str, Any]]] = []
+        self.residual: List[Tuple[int, Dict[str, Any]]] = []
+        points = set()
+
+        for position, condition in bands:
+            operator = condition.get('operator', '')
+            value, value2 = condition.get('value'), condition.get('value2')
+            if operator in NUMERIC_COMPARISONS:
+                bound = _float(value)
+                if bound is None:
+                    continue
+                compare = NUMERIC_COMPARISONS[operator]
+                numeric.append((position, lambda x, compare=compare, bound=bound: compare(x, bound)))
+                points.add(bound)
+            elif operator == 'between':
+                low, high = _float(value), _float(value2)
+                if low is None or high is None:
+                    continue
+                numeric.append((position, lambda x, low=low, high=high: low <= x <= high))
+                points.update((low, high))
+            elif operator in HASHED_OPERATORS:
+                values = value if operator in ('in', 'in_list') and isinstance(value, list) else [value]
+                if not all(_hashable(v) for v in values):
+                    self.residual.append((position, condition))
+                    continue
+                self.hashed.append((position, condition))
+                keys = {_hash_key(v) for v in values}
+                target = self.not_equal if operator == 'not_equals' else self.equal
+                for key in keys:
+                    target.setdefault(key, []).append(position)
+                if operator == 'not_equals':
+                    self.not_equal_all.append(position)
+
+        self.numeric: Optional[IntervalLookup[Tuple[int, ...]]] = None
+        if numeric:
+            self.numeric = IntervalLookup(points, lambda x: tuple(p for p, test in numeric if test(x)))
+
+    def matches(self, field_value: Any, out: List[int]):
+        if self.numeric is not None:
+            x = _float(field_value)
+            if x is not None:
+                out.extend(self.numeric.get(x))
+        if self.hashed:
+            if _hashable(field_value):
+                key = _hash_key(field_value)
+                out.extend(self.equal.get(key, ()))
+                if self.not_equal_all:
+                    excluded = self.not_equal.get(key, ())
+                    out.extend(p for p in self.not_equal_all if p not in excluded)
+            else:
+                out.extend(p for p, condition in self.hashed if band_matches(condition, field_value))
+        for position, condition in self.residual:
+            if band_matches(condition, field_value):
+                out.append(position)
+
+
+class RiskBandIndex:
+    def __init__(self, risk_bands: Sequence[Dict[str, Any]]):
+        """risk_bands in priority order"""
+        self.bands = tuple(risk_bands)
+        self.products = frozenset(p for b in self.bands for p in (b['products'] or []))
+        self._fields: Dict[Any, Tuple[Tuple[FieldAccessor, _FieldIndex], ...]] = {}
+        self._projections: Dict[Any, Projection] = {}
+        for product in list(self.products) + [OTHER]:
+            by_field: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+            for position, band in enumerate(self.bands):
+                if band['products'] and product not in band['products']:
+                    continue
+                condition = band['condition'] or {}
+                by_field.setdefault(condition.get('field', ''), []).append((position, condition))
+            self._fields[product] = tuple(
+                (compile_field_accessor(field), _FieldIndex(bands)) for field, bands in by_field.items()
+            )
+            self._projections[product] = Projection(list(by_field) + ['premium'])
+
+    def projection(self, product_type: Any) -> Projection:
+        """The fields loading() reads for a product"""
+        return self._projections[product_type if product_type in self.products else OTHER]
+
+    def matching(self, data: Dict[str, Any], product_type: Any) -> List[Tuple[Dict[str, Any], Any]]:
+        """(band, field value) of every band whose condition holds, in priority order"""
+        fields = self._fields[product_type if product_type in self.products else OTHER]
+        positions: List[int] = []
+        values: Dict[int, Any] = {}
+        for get_value, index in fields:
+            field_value = get_value(data)
+            if field_value is None:
+                continue
+            start = len(positions)
+            index.matches(field_value, positions)
+            for position in positions[start:]:
+                values[position] = field_value
+        positions.sort()
+        return [(self.bands[p], values[p]) for p in positions]
+
+    def loading(self, data: Dict[str, Any], product_type: Any) -> Dict[str, Any]:
+        """The RiskLoadingResult dict of a proposal"""
+        total_risk_score = 0
+        total_loading_percentage = 0.0
+        applied_bands = []
+        for band, field_value in self.matching(data, product_type):
+            total_risk_score += band['risk_score']
+            total_loading_percentage += band['loading_percentage']
+            applied_bands.append({
+                'band_id': band['id'],
+                'band_name': band['name'],
+                'category': band['category'],
+                'loading_percentage': band['loading_percentage'],
+                'risk_score': band['risk_score'],
+                'condition_field': (band['condition'] or {}).get('field', ''),
+                'field_value': field_value
+            })
+
+        base_premium = float(data['premium'])
+        return {
+            "total_risk_score": total_risk_score,
+            "total_loading_percentage": round(total_loading_percentage, 2),
+            "base_premium": base_premium,
+            "loaded_premium": round(base_premium * (1 + total_loading_percentage / 100), 2),
+            "applied_bands": applied_bands
+        }
@@ -0,0 +1,420 @@
+"""Static ruleset analysis
+
+Normalizes every rule's condition_group once per ruleset snapshot, before it
+is compiled:
+
+- nested groups with their parent's logical operator, and nested groups with a
+  single condition, are flattened into the parent
+- is_negated is pushed down to the atomic conditions (De Morgan). A negated
+  equals / not_equals / in / in_list / not_in / is_empty / is_not_empty becomes
+  its complement operator; other negated atoms keep a one-condition negated
+  group, since e.g. "not greater_than" also holds for a missing value and
+  "less_than_or_equal" does not
+- constants are folded: conditions on fields a proposal can never carry (the
+  value is always None), conditions with the same outcome for every possible
+  value of the field (product_type; a ruleset specialized to one product has
+  one), conditions whose constants never compare (see
+  rule_compiler.never_holds), empty between / in ranges, and AND groups whose
+  numeric ranges or equality sets on one field do not intersect
+
+The normalized tree holds for exactly the proposals the original does. Rules
+are then checked against the rest of the ruleset; rules that can never trigger
+are dead and left out of the compiled form:
+
+- unsatisfiable: the condition folds to false
+- unreachable: products / case_types that no proposal can have when the rule
+  would run, an empty effective window, or a stage that is not evaluated
+- shadowed: an earlier rule always ends evaluation first (an unconditional hard
+  stop, or an unconditional FAIL in a stop_on_fail stage) for every product
+  the rule applies to
+
+Hard stops without case_types are order-independent: whether they apply does
+not depend on what earlier rules did. For each, the analysis also lists the
+earlier rules whose conditions contradict its own, which evaluation can skip
+once the hard stop is known to hold (see order_independent_hard_stops).
+
+Findings, including the ones that do not drop a rule (unknown fields,
+contradictory sub-conditions, always-true conditions, redundant groups), are
+reported by GET /api/ruleset/analysis.
+"""
+import math
+from typing import AbstractSet, Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from activation import EffectiveWindow, effective_window
+from evaluation import CASE_NORMAL
+from fields import DERIVED_FIELDS
+from rule_compiler import NUMERIC_OPERATORS, compile_value_test, is_condition_group, never_holds, normalize_operator, to_float
+
+# Condition groups for folded constants; "in" an empty list never holds
+TRUE_GROUP: Dict[str, Any] = {'logical_operator': 'AND', 'conditions': []}
+FALSE_GROUP: Dict[str, Any] = {'logical_operator': 'AND', 'conditions': [{'field': '', 'operator': 'in', 'value': []}]}
+
+# Operators whose negation is exactly another operator, for every field value
+_COMPLEMENTS = {
+    'equals': 'not_equals',
+    'not_equals': 'equals',
+    'in': 'not_in',
+    'in_list': 'not_in',
+    'not_in': 'in',
+    'is_empty': 'is_not_empty',
+    'is_not_empty': 'is_empty',
+}
+
+# A domain value may be an Enum member in the proposal (product_type), whose
+# str() differs from the value's; only these operators ever look at str()
+_TEXT_OPERATORS = ('contains', 'starts_with')
+
+Node = Union[bool, Dict[str, Any]]
+# (bound, inclusive) at each end; bounds may be infinite
+Interval = Tuple[float, bool, float, bool]
+
+
+class ProposalSchema:
+    """What a proposal dict (ProposalData.model_dump()) can carry"""
+
+    def __init__(self, fields: Iterable[str], open_fields: Iterable[str], products: Iterable[Any]):
+        """fields are the top-level keys; open_fields the ones holding arbitrary
+        mappings (e.g. additional_data); products the possible product_type values"""
+        self.fields = frozenset(fields)
+        self.open_fields = frozenset(open_fields)
+        self.products = frozenset(products)
+        # Fields with a finite set of possible values
+        self.domains = {'product_type': self.products}
+
+    def for_product(self, product: Any) -> 'ProposalSchema':
+        """The schema of the proposals of one product"""
+        return ProposalSchema(self.fields, self.open_fields, [product])
+
+    def can_vary(self, field: str) -> bool:
+        """False if the field resolves to None for every proposal"""
+        if field in DERIVED_FIELDS:
+            return True
+        head, _, rest = field.partition('.')
+        return head in self.fields and (not rest or head in self.open_fields)
+
+
+class Finding:
+    __slots__ = ('kind', 'rule_id', 'rule_name', 'message', 'dropped')
+
+    def __init__(self, kind: str, rule: Dict[str, Any], message: str, dropped: bool = False):
+        self.kind = kind
+        self.rule_id = rule.get('id')
+        self.rule_name = rule.get('name')
+        self.message = message
+        self.dropped = dropped
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "rule_id": self.rule_id,
+            "rule_name": self.rule_name,
+            "message": self.message,
+            "dropped": self.dropped
+        }
+
+
+def _describe(condition: Dict[str, Any]) -> str:
+    operator = normalize_operator(condition.get('operator'))
+    if operator == 'between':
+        return f"between {condition.get('value')!r} and {condition.get('value2')!r}"
+    if operator in ('is_empty', 'is_not_empty'):
+        return operator
+    return f"{operator} {condition.get('value')!r}"
+
+
+def _interval(condition: Dict[str, Any]) -> Optional[Interval]:
+    """Values a numeric condition holds for (constants that never compare are folded before)"""
+    operator = normalize_operator(condition.get('operator'))
+    if operator == 'between':
+        return (to_float(condition.get('value')), True, to_float(condition.get('value2')), True)
+    if operator not in NUMERIC_OPERATORS:
+        return None
+    bound = to_float(condition.get('value'))
+    if operator.startswith('greater_than'):
+        return (bound, operator == 'greater_than_or_equal', math.inf, True)
+    return (-math.inf, True, bound, operator == 'less_than_or_equal')
+
+
+def _intersect(a: Interval, b: Interval) -> Interval:
+    low, low_in = (a[0], a[1]) if a[0] > b[0] else (b[0], b[1]) if b[0] > a[0] else (a[0], a[1] and b[1])
+    high, high_in = (a[2], a[3]) if a[2] < b[2] else (b[2], b[3]) if b[2] < a[2] else (a[2], a[3] and b[3])
+    return (low, low_in, high, high_in)
+
+
+def _is_empty(interval: Interval) -> bool:
+    low, low_in, high, high_in = interval
+    if math.isnan(low) or math.isnan(high):
+        return True
+    return low > high or (low == high and not (low_in and high_in))
+
+
+def _equal_set(condition: Dict[str, Any]) -> Optional[Set[Any]]:
+    """Values an equality / membership condition holds for, if they are all hashable"""
+    operator = normalize_operator(condition.get('operator'))
+    value = condition.get('value')
+    if operator == 'equals' or (operator in ('in', 'in_list') and not isinstance(value, list)):
+        values = [value]
+    elif operator in ('in', 'in_list'):
+        values = value
+    else:
+        return None
+    try:
+        return set(values)
+    except TypeError:
+        return None
+
+
+class ConditionNormalizer:
+    """Normalizes one condition_group, collecting what it found on the way"""
+
+    def __init__(self, schema: ProposalSchema):
+        self.schema = schema
+        self.unknown_fields: List[str] = []
+        self.contradictions: List[str] = []
+        self.redundant_groups = 0
+
+    def normalize(self, group: Dict[str, Any]) -> Dict[str, Any]:
+        """The equivalent normalized condition group"""
+        node = self._group(group or {}, False, nested=False)
+        if node is True:
+            return TRUE_GROUP
+        if node is False:
+            return FALSE_GROUP
+        if is_condition_group(node):
+            return node
+        return {'logical_operator': 'AND', 'conditions': [node]}
+
+    def _group(self, group: Dict[str, Any], negate: bool, nested: bool) -> Node:
+        conditions = group.get('conditions', [])
+        if not conditions:
+            return not negate  # an empty group is true, negated or not
+        if nested and len(conditions) == 1:
+            self.redundant_groups += 1
+        negate = negate != bool(group.get('is_negated', False))
+        is_and = (group.get('logical_operator', 'AND') == 'AND') != negate
+        operator = 'AND' if is_and else 'OR'
+
+        children: List[Dict[str, Any]] = []
+        folded: Optional[bool] = None
+        for item in conditions:
+            child = self._group(item, negate, nested=True) if is_condition_group(item) else self._atom(item, negate)
+            if child is True or child is False:
+                if child != is_and:
+                    folded = child  # false in an AND, true in an OR
+                continue
+            if is_condition_group(child) and not child.get('is_negated') and child['logical_operator'] == operator:
+                self.redundant_groups += 1
+                children.extend(child['conditions'])
+            else:
+                children.append(child)
+        if folded is not None:
+            return folded
+        if is_and and self._contradicts(children):
+            return False
+        if not children:
+            return is_and
+        if len(children) == 1:
+            return children[0]
+        return {'logical_operator': operator, 'conditions': children}
+
+    def _atom(self, condition: Dict[str, Any], negate: bool) -> Node:
+        field = condition.get('field', '')
+        operator = normalize_operator(condition.get('operator'))
+        if never_holds(condition):
+            return negate
+        if not self.schema.can_vary(field):
+            self.unknown_fields.append(field)
+            test = compile_value_test(operator, condition.get('value'), condition.get('value2'))
+            return bool(test(None)) != negate
+        domain = self.schema.domains.get(field)
+        if domain and operator not in _TEXT_OPERATORS:
+            test = compile_value_test(operator, condition.get('value'), condition.get('value2'))
+            outcomes = {bool(test(value)) for value in domain}
+            if len(outcomes) == 1:
+                return outcomes.pop() != negate
+        interval = _interval(condition)
+        if interval is not None and _is_empty(interval):
+            self.contradictions.append(f"{field} {_describe(condition)} never holds")
+            return negate
+        if operator in ('in', 'in_list', 'not_in') and condition.get('value') == []:
+            return (operator == 'not_in') != negate
+        if not negate:
+            return condition
+        complement = _COMPLEMENTS.get(operator)
+        if complement is not None:
+            return {**condition, 'operator': complement}
+        return {'logical_operator': 'AND', 'is_negated': True, 'conditions': [condition]}
+
+    def _contradicts(self, children: Sequence[Dict[str, Any]]) -> bool:
+        """True if the AND of these conditions' numeric ranges or equality sets on a field is empty"""
+        message = _contradiction(children)
+        if message is None:
+            return False
+        self.contradictions.append(message)
+        return True
+
+
+def _contradiction(children: Sequence[Dict[str, Any]]) -> Optional[str]:
+    """Why the AND of these conditions can never hold, if a field's numeric ranges or equality sets do not intersect"""
+    ranges: Dict[str, Tuple[Interval, List[Dict[str, Any]]]] = {}
+    equal: Dict[str, Tuple[Set[Any], List[Dict[str, Any]]]] = {}
+    for child in children:
+        if is_condition_group(child):
+            continue
+        field = child.get('field', '')
+        interval = _interval(child)
+        if interval is not None:
+            current, seen = ranges.get(field, ((-math.inf, True, math.inf, True), []))
+            ranges[field] = (_intersect(current, interval), seen + [child])
+            continue
+        values = _equal_set(child)
+        if values is not None:
+            current_values, seen = equal.get(field, (values, []))
+            equal[field] = (current_values & values, seen + [child])
+    for field, (interval, seen) in ranges.items():
+        if _is_empty(interval):
+            return f"{field} cannot be {' and '.join(_describe(c) for c in seen)}"
+    for field, (values, seen) in equal.items():
+        if not values:
+            return f"{field} cannot be {' and '.join(_describe(c) for c in seen)}"
+    return None
+
+
+def analyze_condition(rule: Dict[str, Any], schema: ProposalSchema) -> Tuple[Dict[str, Any], List[Finding]]:
+    """(normalized condition_group, findings) of a rule or rule template on its own"""
+    normalizer = ConditionNormalizer(schema)
+    group = rule.get('condition_group') or {}
+    normalized = normalizer.normalize(group)
+    findings = [
+        Finding('unknown_field', rule, f"Field {field!r} is never set on a proposal; the condition is constant")
+        for field in dict.fromkeys(normalizer.unknown_fields)
+    ]
+    findings.extend(Finding('contradiction', rule, message) for message in normalizer.contradictions)
+    if normalizer.redundant_groups:
+        findings.append(Finding('redundant_group', rule, f"{normalizer.redundant_groups} nested group(s) can be merged into their parent"))
+    if normalized is FALSE_GROUP:
+        findings.append(Finding('unsatisfiable', rule, "The condition can never hold", dropped=True))
+    elif normalized is TRUE_GROUP and group.get('conditions'):
+        findings.append(Finding('always_true', rule, "The condition always holds"))
+    if rule.get('products') and not schema.products & set(rule['products']):
+        findings.append(Finding('unreachable', rule, f"No product matches products {list(rule['products'])}", dropped=True))
+    return normalized, findings
+
+
+class RulesetAnalysis:
+    __slots__ = ('rules', 'live_rules', 'dead', 'findings')
+
+    def __init__(self, rules: Sequence[Dict[str, Any]], dead: FrozenSet[str], findings: Sequence[Finding]):
+        # The rules with normalized condition groups, in input order
+        self.rules = tuple(rules)
+        self.live_rules = tuple(r for r in self.rules if r['id'] not in dead)
+        self.dead = dead
+        self.findings = tuple(findings)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "rules_analyzed": len(self.rules),
+            "dropped_rules": [r['id'] for r in self.rules if r['id'] in self.dead],
+            "findings": [f.to_json() for f in self.findings]
+        }
+
+
+def analyze_ruleset(stages: Sequence[Dict[str, Any]], rules: Sequence[Dict[str, Any]], schema: ProposalSchema,
+                    windows: Optional[Sequence[EffectiveWindow]] = None) -> RulesetAnalysis:
+    """Normalize and check enabled rules against enabled stages (in execution order).
+
+    windows, parallel to rules, are their effective windows if already parsed.
+    """
+    if windows is None:
+        windows = [effective_window(r) for r in rules]
+    window_of = {r['id']: window for r, window in zip(rules, windows)}
+    normalized: List[Dict[str, Any]] = []
+    findings: List[Finding] = []
+    dead: Set[str] = set()
+    for rule in rules:
+        group, rule_findings = analyze_condition(rule, schema)
+        normalized.append({**rule, 'condition_group': group})
+        findings.extend(rule_findings)
+        dead.update(f.rule_id for f in rule_findings if f.dropped)
+
+    # Case types a rule can see: the initial one and whatever live rule actions set
+    case_types = {CASE_NORMAL} | {
+        (r.get('action') or {}).get('case_type') for r in normalized if r['id'] not in dead
+    }
+    stage_ids = {s['id'] for s in stages}
+    for rule in normalized:
+        if rule['id'] in dead:
+            continue
+        window = window_of[rule['id']]
+        if rule['stage_id'] is not None and rule['stage_id'] not in stage_ids:
+            reason = "its stage is disabled or missing"
+        elif rule.get('case_types') and not case_types & set(rule['case_types']):
+            reason = f"no rule sets any of case_types {list(rule['case_types'])}"
+        elif window.start > window.end:
+            reason = "its effective window is empty"
+        else:
+            continue
+        findings.append(Finding('unreachable', rule, f"The rule never runs: {reason}", dropped=True))
+        dead.add(rule['id'])
+
+    # Walk the evaluation order, tracking the products evaluation has certainly ended for
+    ended: Set[Any] = set()
+    for stage in list(stages) + [None]:
+        stage_id = stage['id'] if stage else None
+        # Stable sort: equal priorities keep snapshot order, as RuleIndex does
+        ordered = sorted((r for r in normalized if r['stage_id'] == stage_id and r['id'] not in dead),
+                         key=lambda r: r['priority'])
+        failing: Set[Any] = set()
+        for rule in ordered:
+            products = schema.products & set(rule.get('products') or schema.products)
+            if products <= ended:
+                findings.append(Finding('shadowed', rule, "An earlier rule always ends evaluation before this one", dropped=True))
+                dead.add(rule['id'])
+                continue
+            action = rule.get('action') or {}
+            certain = (rule['condition_group'] is TRUE_GROUP and not rule.get('case_types')
+                       and window_of[rule['id']].is_unbounded)
+            if certain and action.get('is_hard_stop'):
+                ended |= products
+            elif certain and action.get('decision') == "FAIL" and stage and stage['stop_on_fail']:
+                failing |= products
+        ended |= failing
+    return RulesetAnalysis(normalized, frozenset(dead), findings)
+
+
+def _necessary_conditions(group: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Atomic conditions a normalized condition group cannot be true without"""
+    conditions = group.get('conditions', [])
+    if group.get('is_negated') or (len(conditions) > 1 and group.get('logical_operator') != 'AND'):
+        return []
+    return [c for c in conditions if not is_condition_group(c)]
+
+
+def order_independent_hard_stops(stages: Sequence[Dict[str, Any]], rules: Sequence[Dict[str, Any]],
+                                 dead: AbstractSet[str]) -> List[Tuple[str, FrozenSet[str]]]:
+    """Hard stops whose outcome no earlier rule can change, in evaluation order,
+    each with the earlier rules that can never trigger together with it.
+
+    rules have normalized condition groups (see analyze_ruleset). A live hard
+    stop without case_types applies whatever earlier rules did to the case
+    type, so once its condition is known to hold, the only earlier rules that
+    matter are the ones whose condition can hold along with it. Evaluation
+    tests these hard stops first (see RuleIndex.matcher).
+    """
+    stops: List[Tuple[str, FrozenSet[str]]] = []
+    earlier: List[Tuple[str, List[Dict[str, Any]], Set[str]]] = []
+    for stage in list(stages) + [None]:
+        stage_id = stage['id'] if stage else None
+        ordered = sorted((r for r in rules if r['stage_id'] == stage_id and r['id'] not in dead),
+                         key=lambda r: r['priority'])
+        for rule in ordered:
+            conditions = _necessary_conditions(rule['condition_group'])
+            fields = {c.get('field', '') for c in conditions}
+            if (rule.get('action') or {}).get('is_hard_stop') and not rule.get('case_types'):
+                excluded = frozenset(
+                    rule_id for rule_id, other, other_fields in earlier
+                    if fields & other_fields and _contradiction(conditions + other) is not None
+                )
+                stops.append((rule['id'], excluded))
+            earlier.append((rule['id'], conditions, fields))
+    return stops
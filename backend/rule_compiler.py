@@ -0,0 +1,473 @@
+"""Rule compiler - turns condition_group JSON into executable predicates
+
+Compiling resolves everything that does not depend on the proposal once per
+ruleset version: operator lookup, field path splitting, numeric coercion of
+constant thresholds, lowering of string constants and list membership sets.
+Operators keep the semantics of compile_value_test; an empty condition group
+is true, negated or not, and any logical operator other than AND means OR.
+
+Identical atomic conditions - the same field, operator and constants, as rule
+templates repeat them across many rules - are compiled once into a shared
+AtomTable. Each atom owns a slot in a per-evaluation memo (see
+AtomTable.memo), so it is evaluated at most once per proposal, and only when
+some rule actually reaches it. Numeric comparisons on the same field are
+resolved together by one bisect (see ThresholdIndex).
+"""
+import logging
+import operator as op
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fields import DERIVED_FIELDS, FieldAccessor, compile_field_accessor, source_keys
+from intervals import IntervalLookup
+
+logger = logging.getLogger(__name__)
+
+# Predicates take the proposal dict and the evaluation's atom memo
+Memo = bytearray
+Predicate = Callable[[Dict[str, Any], Memo], bool]
+
+# Atom memo slot states
+_UNKNOWN, _FALSE, _TRUE = 0, 1, 2
+
+
+def _always_false(data: Dict[str, Any], memo: Memo) -> bool:
+    return False
+
+
+def _always_true(data: Dict[str, Any], memo: Memo) -> bool:
+    return True
+
+
+NUMERIC_OPERATORS = {
+    'greater_than': op.gt,
+    'less_than': op.lt,
+    'greater_than_or_equal': op.ge,
+    'less_than_or_equal': op.le,
+}
+
+ValueTest = Callable[[Any], bool]
+
+
+def to_float(value: Any) -> Optional[float]:
+    """Coerce a constant threshold, or None if it can never compare"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_operator(operator: Any) -> Any:
+    """OperatorEnum members and their string values compile the same way"""
+    return getattr(operator, 'value', operator)
+
+
+def _never(a: Any) -> bool:
+    return False
+
+
+def _numeric_test(threshold: Any, compare: Callable[[float, float], bool]) -> ValueTest:
+    bound = to_float(threshold)
+    if bound is None:
+        return _never
+
+    def test(a: Any) -> bool:
+        if a is None:
+            return False
+        try:
+            return compare(float(a), bound)
+        except Exception as e:
+            logger.error(f"Error evaluating condition: {e}")
+            return False
+    return test
+
+
+def _membership_test(values: Any, negate: bool) -> ValueTest:
+    if not isinstance(values, list):
+        if negate:
+            return lambda a: a != values
+        return lambda a: a == values
+
+    items = tuple(values)
+    try:
+        members = frozenset(items)
+    except TypeError:
+        members = items  # unhashable constants, fall back to a linear scan
+
+    def test(a: Any) -> bool:
+        try:
+            found = a in members
+        except TypeError:
+            found = a in items
+        return not found if negate else found
+    return test
+
+
+def compile_value_test(operator: Any, value: Any, value2: Any = None) -> ValueTest:
+    """Compile an operator and its constants into a test on the field value"""
+    operator = normalize_operator(operator)
+
+    if operator == 'equals':
+        return lambda a: a == value
+    if operator == 'not_equals':
+        return lambda a: a != value
+    if operator in NUMERIC_OPERATORS:
+        return _numeric_test(value, NUMERIC_OPERATORS[operator])
+    if operator in ('in', 'in_list'):
+        return _membership_test(value, negate=False)
+    if operator == 'not_in':
+        return _membership_test(value, negate=True)
+    if operator == 'between':
+        low, high = to_float(value), to_float(value2)
+        if low is None or high is None:
+            return _never
+
+        def between(a: Any) -> bool:
+            if a is None:
+                return False
+            try:
+                return low <= float(a) <= high
+            except Exception as e:
+                logger.error(f"Error evaluating condition: {e}")
+                return False
+        return between
+    if operator == 'contains':
+        if not value:
+            return _never
+        needle = str(value).lower()
+        return lambda a: needle in str(a).lower() if a else False
+    if operator == 'starts_with':
+        if not value:
+            return _never
+        prefix = str(value).lower()
+        return lambda a: str(a).lower().startswith(prefix) if a else False
+    if operator == 'is_empty':
+        return lambda a: a is None or a == "" or a == []
+    if operator == 'is_not_empty':
+        return lambda a: a is not None and a != "" and a != []
+
+    logger.warning(f"Unknown operator: {operator}")
+    return _never
+
+
+def never_holds(condition: Dict[str, Any]) -> bool:
+    """True if the condition's operator or constants make it false for every field value"""
+    test = compile_value_test(condition.get('operator'), condition.get('value'), condition.get('value2'))
+    return test is _never
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable stand-in for a JSON constant; equal only for interchangeable constants"""
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, tuple((k, _freeze(v)) for k, v in value.items()))
+    hash(value)
+    return (type(value), value)
+
+
+def atom_key(condition: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """Identity of an atomic condition, or None if its constants cannot be keyed"""
+    operator = normalize_operator(condition.get('operator'))
+    value, value2 = condition.get('value'), condition.get('value2')
+    if operator == 'in_list':
+        operator = 'in'
+    if operator in ('contains', 'starts_with'):
+        # Only the lowered string form of the constant is ever used
+        value = str(value).lower() if value else None
+    try:
+        return (condition.get('field', ''), operator, _freeze(value), _freeze(value2) if operator == 'between' else None)
+    except TypeError:
+        return None
+
+
+def _field_test(condition: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """The condition as a test on the proposal dict, or None if it never holds"""
+    test = compile_value_test(condition.get('operator'), condition.get('value'), condition.get('value2'))
+    if test is _never:
+        return None
+    field = condition.get('field', '')
+    if '.' not in field and field not in DERIVED_FIELDS:
+        return lambda data: test(data.get(field))
+    get = compile_field_accessor(field)
+    return lambda data: test(get(data))
+
+
+class ThresholdIndex:
+    """Every numeric comparison / between atom on one field, resolved together.
+
+    The atoms' bounds split the number line into segments (see IntervalLookup),
+    each mapped to the memo states of all the atoms there, and the atoms occupy
+    consecutive memo slots from start. Resolving the field is one bisect and
+    one slice assignment into the memo, however many thresholds rules put on it.
+    """
+    __slots__ = ('field', 'get_value', 'tests', 'points', 'start', 'lookup', 'missing')
+
+    def __init__(self, field: str):
+        self.field = field
+        self.get_value = compile_field_accessor(field)
+        self.tests: List[Callable[[float], bool]] = []
+        self.points: List[float] = []
+        self.start = 0
+
+    def add(self, test: Callable[[float], bool], bounds: Tuple[float, ...]) -> int:
+        self.tests.append(test)
+        self.points.extend(bounds)
+        return len(self.tests) - 1
+
+    def seal(self, start: int):
+        self.start = start
+        self.lookup = IntervalLookup(
+            self.points, lambda x: bytes(_TRUE if test(x) else _FALSE for test in self.tests)
+        )
+        self.missing = bytes([_FALSE]) * len(self.tests)
+
+    def resolve(self, data: Dict[str, Any], memo: Memo):
+        value = self.get_value(data)
+        states = self.missing
+        if value is not None:
+            try:
+                x = float(value)
+            except Exception as e:
+                logger.error(f"Error evaluating condition: {e}")
+            else:
+                if x == x:  # NaN compares false with every bound
+                    states = self.lookup.get(x)
+        memo[self.start:self.start + len(states)] = states
+
+
+def _threshold_test(condition: Dict[str, Any]) -> Optional[Tuple[Callable[[float], bool], Tuple[float, ...]]]:
+    """(test on the float value, bounds) of a numeric condition with usable bounds"""
+    operator = normalize_operator(condition.get('operator'))
+    if operator in NUMERIC_OPERATORS:
+        bound = to_float(condition.get('value'))
+        if bound is not None:
+            compare = NUMERIC_OPERATORS[operator]
+            return (lambda x: compare(x, bound)), (bound,)
+    elif operator == 'between':
+        low, high = to_float(condition.get('value')), to_float(condition.get('value2'))
+        if low is not None and high is not None:
+            return (lambda x: low <= x <= high), (low, high)
+    return None
+
+
+class AtomTable:
+    """Atomic conditions shared by every rule of a ruleset, one memo slot each.
+
+    Numeric comparisons are grouped per field into ThresholdIndex instances,
+    laid out after the other atoms once the table is sealed - by the first
+    memo() or slot() call, after which no more atoms can be added.
+    """
+
+    def __init__(self):
+        self._slots: Dict[Tuple[Any, ...], Predicate] = {}
+        # key -> (threshold index or None, position in it or absolute slot)
+        self._numbers: Dict[Tuple[Any, ...], Tuple[Optional[ThresholdIndex], int]] = {}
+        self._thresholds: Dict[str, ThresholdIndex] = {}
+        self._conditions: Dict[int, Dict[str, Any]] = {}  # slot of a single atom -> its condition
+        # Top-level proposal key -> memo slot ranges of the atoms reading it
+        self._key_slots: Dict[str, List[Tuple[int, int]]] = {}
+        self._sealed = False
+        self.size = 0
+
+    def _seal(self):
+        if not self._sealed:
+            self._sealed = True
+            for slot, condition in self._conditions.items():
+                for key in source_keys(condition.get('field', '')):
+                    self._key_slots.setdefault(key, []).append((slot, slot + 1))
+            for index in self._thresholds.values():
+                index.seal(self.size)
+                for key in source_keys(index.field):
+                    self._key_slots.setdefault(key, []).append((index.start, index.start + len(index.tests)))
+                self.size += len(index.tests)
+
+    def memo(self) -> Memo:
+        """A fresh memo for evaluating one proposal"""
+        self._seal()
+        return bytearray(self.size)
+
+    def atom(self, condition: Dict[str, Any]) -> Predicate:
+        if self._sealed:
+            raise RuntimeError("AtomTable is sealed")
+        key = atom_key(condition)
+        predicate = self._slots.get(key) if key is not None else None
+        if predicate is None:
+            threshold = _threshold_test(condition)
+            if threshold is not None:
+                field = condition.get('field', '')
+                index = self._thresholds.get(field)
+                if index is None:
+                    index = self._thresholds[field] = ThresholdIndex(field)
+                position = index.add(*threshold)
+                predicate, number = self._threshold_atom(index, position), (index, position)
+            else:
+                field_test = _field_test(condition)
+                if field_test is None:
+                    predicate, number = _always_false, None
+                else:
+                    predicate, number = self._memoized(field_test), (None, self.size - 1)
+                    self._conditions[self.size - 1] = condition
+            if key is not None:
+                self._slots[key] = predicate
+                if number is not None:
+                    self._numbers[key] = number
+        return predicate
+
+    def slot(self, condition: Dict[str, Any]) -> Optional[int]:
+        """Memo slot of a compiled, shared atom (None for unkeyable or never-true atoms)"""
+        self._seal()
+        key = atom_key(condition)
+        number = None if key is None else self._numbers.get(key)
+        if number is None:
+            return None
+        index, position = number
+        return position if index is None else index.start + position
+
+    def forget(self, memo: Memo, keys: Iterable[str]):
+        """Reset what a memo knows about the atoms reading any of these top-level
+        proposal keys, so they are evaluated again for an amended proposal"""
+        self._seal()
+        for key in keys:
+            for start, stop in self._key_slots.get(key, ()):
+                memo[start:stop] = bytes(stop - start)
+
+    def breakpoints(self, key: str) -> Tuple[List[float], bool]:
+        """(points, complete) for a numeric top-level proposal key.
+
+        Every atom reading key itself holds the same way throughout each open
+        gap between consecutive points. complete is False if some atom reads
+        key through a derived or nested field, or with a string test.
+        """
+        points: List[float] = []
+        complete = True
+        for index in self._thresholds.values():
+            if index.field == key:
+                points.extend(index.points)
+            elif key in source_keys(index.field):
+                complete = False
+        for condition in self._conditions.values():
+            field = condition.get('field', '')
+            operator = normalize_operator(condition.get('operator'))
+            if field != key:
+                complete = complete and key not in source_keys(field)
+            elif operator in ('equals', 'not_equals', 'in', 'in_list', 'not_in'):
+                value = condition.get('value')
+                values = value if isinstance(value, list) and operator in ('in', 'in_list', 'not_in') else [value]
+                points.extend(float(v) for v in values if isinstance(v, (int, float)) and v == v)
+            elif operator not in ('is_empty', 'is_not_empty'):
+                complete = False
+        return points, complete
+
+    @staticmethod
+    def mark_true(memo: Memo, slot: int):
+        """Record an atom as known to hold for the proposal being evaluated"""
+        memo[slot] = _TRUE
+
+    def _memoized(self, field_test: Callable[[Dict[str, Any]], bool]) -> Predicate:
+        slot = self.size
+        self.size += 1
+
+        def atom(data: Dict[str, Any], memo: Memo) -> bool:
+            state = memo[slot]
+            if state:
+                return state == _TRUE
+            result = bool(field_test(data))
+            memo[slot] = _TRUE if result else _FALSE
+            return result
+        return atom
+
+    @staticmethod
+    def _threshold_atom(index: ThresholdIndex, position: int) -> Predicate:
+        def atom(data: Dict[str, Any], memo: Memo) -> bool:
+            slot = index.start + position
+            state = memo[slot]
+            if not state:
+                index.resolve(data, memo)
+                state = memo[slot]
+            return state == _TRUE
+        return atom
+
+
+def is_condition_group(item: Dict[str, Any]) -> bool:
+    return 'logical_operator' in item or 'conditions' in item
+
+
+def condition_fields(group: Dict[str, Any]) -> List[str]:
+    """Every field a (possibly nested) condition group reads, in order of appearance"""
+    fields: List[str] = []
+    for item in group.get('conditions', []):
+        if is_condition_group(item):
+            fields.extend(condition_fields(item))
+        else:
+            fields.append(item.get('field', ''))
+    return list(dict.fromkeys(fields))
+
+
+def compile_condition_group(group: Dict[str, Any], atoms: AtomTable) -> Predicate:
+    """Compile a (possibly nested) condition group into one predicate.
+
+    An empty group is always true, negated or not, matching the interpreter.
+    """
+    conditions = group.get('conditions', [])
+    if not conditions:
+        return _always_true
+
+    children = tuple(
+        compile_condition_group(item, atoms) if is_condition_group(item) else atoms.atom(item)
+        for item in conditions
+    )
+    negated = bool(group.get('is_negated', False))
+    is_and = group.get('logical_operator', 'AND') == 'AND'
+
+    if len(children) == 1:
+        only = children[0]
+        if negated:
+            return lambda data, memo: not only(data, memo)
+        return only
+
+    if is_and:
+        def all_of(data: Dict[str, Any], memo: Memo) -> bool:
+            for child in children:
+                if not child(data, memo):
+                    return negated
+            return not negated
+        return all_of
+
+    def any_of(data: Dict[str, Any], memo: Memo) -> bool:
+        for child in children:
+            if child(data, memo):
+                return not negated
+        return negated
+    return any_of
+
+
+class CompiledRule:
+    """Executable form of a rule's condition_group"""
+    __slots__ = ('rule_id', 'condition', 'input_fields')
+
+    def __init__(self, rule_id: str, condition: Predicate, input_fields: Tuple[Tuple[str, FieldAccessor], ...]):
+        self.rule_id = rule_id
+        self.condition = condition
+        # Top-level condition fields, reported as input_values in the rule trace
+        self.input_fields = input_fields
+
+    def input_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: get(data) for field, get in self.input_fields}
+
+
+def compile_rule(rule: Dict[str, Any], atoms: AtomTable,
+                 condition_group: Optional[Dict[str, Any]] = None) -> CompiledRule:
+    """Compile a rule's condition_group, sharing atoms with the rest of the ruleset.
+
+    condition_group, if given, is an equivalent group to compile instead (see
+    rule_analyzer); input values are still those of the rule's own group.
+    """
+    own_group = rule.get('condition_group') or {}
+    input_fields: List[Tuple[str, FieldAccessor]] = []
+    for cond in own_group.get('conditions', []):
+        if isinstance(cond, dict) and 'field' in cond:
+            input_fields.append((cond['field'], compile_field_accessor(cond['field'])))
+    group = own_group if condition_group is None else condition_group
+    return CompiledRule(rule['id'], compile_condition_group(group, atoms), tuple(input_fields))
@@ -0,0 +1,176 @@
+"""Candidate-rule index for single-proposal evaluation
+
+Maps (stage_id, product_type, case_type) to the priority-ordered rules of that
+stage that can apply to such a proposal, so evaluation never scans or filters
+rules that target other products or case types. Built once per ruleset
+snapshot.
+
+Dead rules (see rule_analyzer) can never trigger. Only walks that record a
+full rule trace, which lists every applicable rule, still visit them.
+
+Order-independent hard stops (see rule_analyzer.order_independent_hard_stops)
+are tested before any stage is walked. When one holds, evaluation will end at
+it unless an earlier rule that can trigger along with it ends it first, so the
+walk visits only those earlier rules and the hard stop itself; the stages,
+triggered rules and stage trace come out as when every rule is walked.
+"""
+from bisect import bisect_right
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from rule_compiler import CompiledRule, Memo, condition_fields
+from stage_cache import Projection
+
+IndexedRule = Tuple[Dict[str, Any], CompiledRule]
+
+# Lookup key for products / case types that no rule names explicitly
+OTHER = object()
+
+
+class Candidates:
+    """Applicable rules of one stage in priority order, with their stage positions"""
+    __slots__ = ('rules', 'ordinals')
+
+    def __init__(self, rules: Tuple[IndexedRule, ...], ordinals: Tuple[int, ...]):
+        self.rules = rules
+        self.ordinals = ordinals
+
+
+EMPTY = Candidates((), ())
+
+
+class RuleIndex:
+    def __init__(self, stage_ids: Iterable[Optional[str]], rules: Iterable[Dict[str, Any]],
+                 compiled_rules: Dict[str, CompiledRule], active: Optional[Sequence[bool]] = None,
+                 dead: AbstractSet[str] = frozenset(), hard_stops: Sequence[Tuple[str, AbstractSet[str]]] = ()):
+        """stage_ids are the evaluated stages (None for unassigned rules); rules of
+        other stages are never evaluated and are left out. active, parallel to
+        rules, marks the rules currently in their effective window (default all);
+        inactive rules still count towards stage_size. dead holds the ids of
+        rules that can never trigger, which matcher() leaves out. hard_stops are
+        order-independent hard stops in evaluation order, each with the earlier
+        rules that cannot trigger along with it."""
+        rules = list(rules)
+        if active is None:
+            active = [True] * len(rules)
+        by_stage: Dict[Optional[str], List[Dict[str, Any]]] = {stage_id: [] for stage_id in stage_ids}
+        self._stage_sizes = dict.fromkeys(by_stage, 0)
+        for rule, is_active in zip(rules, active):
+            if rule['stage_id'] in by_stage:
+                self._stage_sizes[rule['stage_id']] += 1
+                if is_active:
+                    by_stage[rule['stage_id']].append(rule)
+        rules = [rule for rule, is_active in zip(rules, active) if is_active]
+        self._projections = {
+            stage_id: Projection(f for rule in stage_rules for f in condition_fields(rule['condition_group'] or {}))
+            for stage_id, stage_rules in by_stage.items()
+        }
+
+        self.products = frozenset(p for r in rules for p in (r.get('products') or []))
+        self.case_types = frozenset(c for r in rules for c in (r.get('case_types') or []))
+        product_keys = list(self.products) + [OTHER]
+        case_type_keys = list(self.case_types) + [OTHER]
+
+        self._table: Dict[Tuple[Any, Any, Any], Candidates] = {}
+        self._ordered: Dict[Optional[str], Tuple[IndexedRule, ...]] = {}
+        for stage_id, stage_rules in by_stage.items():
+            # Stable sort: equal priorities keep snapshot (database) order
+            ordered = sorted(stage_rules, key=lambda r: r['priority'])
+            self._ordered[stage_id] = tuple((rule, compiled_rules[rule['id']]) for rule in ordered)
+            for product in product_keys:
+                for case_type in case_type_keys:
+                    picked = [
+                        (ordinal, rule) for ordinal, rule in enumerate(ordered)
+                        if (not rule.get('products') or product in rule['products'])
+                        and (not rule.get('case_types') or case_type in rule['case_types'])
+                    ]
+                    self._table[(stage_id, product, case_type)] = Candidates(
+                        tuple((rule, compiled_rules[rule['id']]) for _, rule in picked),
+                        tuple(ordinal for ordinal, _ in picked)
+                    )
+
+        # Hard stops to test first, by product key, each with the tables to walk
+        # when it holds: once it is tested, no earlier hard stop held and the
+        # rules it excludes cannot trigger. When none holds, none is walked.
+        active_ids = {rule['id']: rule for rule in rules if rule['stage_id'] in by_stage}
+        hard_stops = [(rule_id, excluded) for rule_id, excluded in hard_stops
+                      if rule_id in active_ids and rule_id not in dead]
+        self._hard_stops: Dict[Any, Tuple[Tuple[Callable[[Dict[str, Any], Memo], bool], _LiveRules], ...]] = {}
+        tested: Set[str] = set()
+        stopping = []
+        for rule_id, excluded in hard_stops:
+            stopping.append((active_ids[rule_id], compiled_rules[rule_id], self._without(dead | excluded | tested)))
+            tested.add(rule_id)
+        for product in product_keys:
+            self._hard_stops[product] = tuple(
+                (compiled.condition, walk) for rule, compiled, walk in stopping
+                if not rule.get('products') or product in rule['products']
+            )
+        self._live = self._without(dead | tested) if dead or tested else self
+
+    def _without(self, removed: AbstractSet[str]) -> '_LiveRules':
+        # Ordinals stay positions in the stage, so walks can switch tables
+        table: Dict[Tuple[Any, Any, Any], Candidates] = {}
+        for key, candidates in self._table.items():
+            kept = [i for i, (rule, _) in enumerate(candidates.rules) if rule['id'] not in removed]
+            table[key] = Candidates(tuple(candidates.rules[i] for i in kept), tuple(candidates.ordinals[i] for i in kept))
+        return _LiveRules(self.products, self.case_types, table)
+
+    def stage_size(self, stage_id: Optional[str]) -> int:
+        """Number of rules in a stage, applicable or not"""
+        return self._stage_sizes.get(stage_id, 0)
+
+    def stage_projection(self, stage_id: Optional[str]) -> Projection:
+        """The fields the stage's rules read; with the case type, they decide what the stage does"""
+        return self._projections.get(stage_id) or Projection(())
+
+    def hard_stop(self, data: Dict[str, Any], memo: Memo, product_type: Any) -> Optional['_LiveRules']:
+        """The rules to walk if an order-independent hard stop holds for the proposal"""
+        product = product_type if product_type in self.products else OTHER
+        for condition, walk in self._hard_stops.get(product, ()):
+            if condition(data, memo):
+                return walk
+        return None
+
+    def matcher(self, data: Dict[str, Any], memo: Memo, product_type: Any):
+        """What walks the stages for one proposal; this index walks every applicable
+        rule that is not dead, or the rules that matter once a hard stop holds"""
+        stop = self.hard_stop(data, memo, product_type)
+        return self._live if stop is None else stop
+
+    def lookup(self, stage_id: Optional[str], product_type: Any, case_type: Any) -> Candidates:
+        product = product_type if product_type in self.products else OTHER
+        case_type = case_type if case_type in self.case_types else OTHER
+        return self._table.get((stage_id, product, case_type), EMPTY)
+
+    def walk(self, stage_id: Optional[str], product_type: Any, current_case_type: Callable[[], Any]) -> Iterator[IndexedRule]:
+        """Yield a stage's applicable rules in priority order.
+
+        Rule actions can change the case type mid-stage, which changes which of
+        the remaining rules apply; current_case_type() is re-read after every
+        yielded rule and the walk continues in the matching candidate list.
+        """
+        case_type = current_case_type()
+        candidates = self.lookup(stage_id, product_type, case_type)
+        i = 0
+        while i < len(candidates.rules):
+            yield candidates.rules[i]
+            ordinal = candidates.ordinals[i]
+            i += 1
+            if current_case_type() != case_type:
+                case_type = current_case_type()
+                candidates = self.lookup(stage_id, product_type, case_type)
+                i = bisect_right(candidates.ordinals, ordinal)
+
+
+class _LiveRules:
+    """A RuleIndex's candidate tables without its dead rules"""
+    __slots__ = ('products', 'case_types', '_table')
+
+    def __init__(self, products: AbstractSet[Any], case_types: AbstractSet[Any],
+                 table: Dict[Tuple[Any, Any, Any], Candidates]):
+        self.products = products
+        self.case_types = case_types
+        self._table = table
+
+    lookup = RuleIndex.lookup
+    walk = RuleIndex.walk
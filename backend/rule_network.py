@@ -0,0 +1,241 @@
+"""Discrimination network for single-proposal rule matching
+
+An alternative to RuleIndex for rulesets with thousands of rules, where
+walking every applicable rule of a stage dominates evaluation. When the index
+is built, each rule is gated on one of its necessary atoms - conditions its
+condition_group cannot be true without, i.e. those reached only through
+non-negated AND groups. Equality atoms are preferred as gates, then between,
+then comparisons, and among those the atom the fewest rules share. Gates are
+indexed by field:
+
+- equals / in / in_list atoms with hashable constants go into a hash map from
+  field value to atoms
+- numeric comparisons and between go into an IntervalLookup from the field
+  value to the atoms that hold there
+
+Evaluating a proposal reads each indexed field once and collects the gates
+that hold. Only the rules behind those gates, plus rules without any
+indexable necessary atom, are walked - in the same priority order and with the
+same product / case type applicability as RuleIndex - so the work done grows
+with the rules that can match rather than with the ruleset. Gates found true
+are written to the proposal's atom memo, so walked rules do not test them
+again.
+
+Decisions are identical to RuleIndex. A full rule trace lists every applicable
+rule, triggered or not, so traced evaluations (see evaluation.apply_rules)
+walk the plain RuleIndex. The network does not test hard stops first (see
+RuleIndex.matcher): its gates already skip most rules whose conditions
+contradict a hard stop's.
+"""
+import math
+from enum import Enum
+from heapq import merge
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from intervals import IntervalLookup
+from rule_compiler import (
+    NUMERIC_OPERATORS, AtomTable, CompiledRule, Memo, compile_field_accessor, is_condition_group,
+    normalize_operator, to_float
+)
+from rule_index import IndexedRule, RuleIndex
+
+
+class MatchingEngine(str, Enum):
+    COMPILED = "compiled"
+    NETWORK = "network"
+
+
+def necessary_atoms(group: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Atomic conditions that must all hold for the condition group to be true"""
+    conditions = group.get('conditions', [])
+    if not conditions or group.get('is_negated', False):
+        return []
+    if len(conditions) > 1 and group.get('logical_operator', 'AND') != 'AND':
+        return []
+    atoms: List[Dict[str, Any]] = []
+    for item in conditions:
+        atoms.extend(necessary_atoms(item) if is_condition_group(item) else [item])
+    return atoms
+
+
+def _hash_key(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return not (isinstance(value, float) and math.isnan(value))
+
+
+def _float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        result = float(value)
+    except Exception:
+        return None
+    return None if math.isnan(result) else result
+
+
+class _FieldNode:
+    """Indexed atoms testing one field, by network atom number"""
+    __slots__ = ('get_value', 'equal', 'numeric')
+
+    def __init__(self, field: str, equal: Dict[Any, List[int]], numeric: Sequence[Tuple[int, Callable[[float], bool]]],
+                 points: Iterable[float]):
+        self.get_value = compile_field_accessor(field)
+        self.equal = equal
+        self.numeric: Optional[IntervalLookup[Tuple[int, ...]]] = None
+        if numeric:
+            self.numeric = IntervalLookup(points, lambda x: tuple(a for a, test in numeric if test(x)))
+
+    def holding(self, data: Dict[str, Any], out: List[int]):
+        value = self.get_value(data)
+        if self.equal and _hashable(value):
+            out.extend(self.equal.get(_hash_key(value), ()))
+        if self.numeric is not None:
+            x = _float(value)
+            if x is not None:
+                out.extend(self.numeric.get(x))
+
+
+class _NetworkRule:
+    __slots__ = ('rule', 'compiled', 'products', 'case_types')
+
+    def __init__(self, rule: Dict[str, Any], compiled: CompiledRule):
+        self.rule = rule
+        self.compiled = compiled
+        self.products = frozenset(rule.get('products') or ())
+        self.case_types = frozenset(rule.get('case_types') or ())
+
+
+# Network atom identity: (memo slot, field, kind, constants)
+AtomKey = Tuple[Any, ...]
+_NEVER = object()
+
+
+def _describe(condition: Dict[str, Any], atoms: AtomTable) -> Any:
+    """(key, selectivity rank) of an indexable condition, None if it cannot be
+    indexed, or _NEVER if it can never hold"""
+    field = condition.get('field', '')
+    operator = normalize_operator(condition.get('operator'))
+    value, value2 = condition.get('value'), condition.get('value2')
+    if operator in NUMERIC_OPERATORS:
+        bound = to_float(value)
+        return _NEVER if bound is None else ((atoms.slot(condition), field, operator, (bound,)), 2)
+    if operator == 'between':
+        low, high = to_float(value), to_float(value2)
+        return _NEVER if low is None or high is None else ((atoms.slot(condition), field, operator, (low, high)), 1)
+    if operator in ('equals', 'in', 'in_list'):
+        values = value if operator != 'equals' and isinstance(value, list) else [value]
+        if not all(_hashable(v) and not isinstance(v, Enum) for v in values):
+            return None
+        return (atoms.slot(condition), field, 'in', tuple(dict.fromkeys(values))), 0
+    return None
+
+
+class NetworkRuleIndex(RuleIndex):
+    def __init__(self, stage_ids: Iterable[Optional[str]], rules: Iterable[Dict[str, Any]],
+                 compiled_rules: Dict[str, CompiledRule], atoms: AtomTable,
+                 active: Optional[Sequence[bool]] = None, dead: AbstractSet[str] = frozenset()):
+        """As RuleIndex; atoms is the table compiled_rules were compiled against.
+        Dead rules stay in the plain index only."""
+        super().__init__(stage_ids, rules, compiled_rules, active)
+        live: Dict[Optional[str], Tuple[IndexedRule, ...]] = {
+            stage_id: tuple(entry for entry in ordered if entry[0]['id'] not in dead)
+            for stage_id, ordered in self._ordered.items()
+        }
+        self.stage_rules: Dict[Optional[str], Tuple[_NetworkRule, ...]] = {
+            stage_id: tuple(_NetworkRule(rule, compiled) for rule, compiled in ordered)
+            for stage_id, ordered in live.items()
+        }
+
+        # Each rule is gated on one necessary atom: an equality test if it has
+        # one, otherwise the one fewest other rules share
+        described: List[Tuple[Optional[str], int, List[Tuple[AtomKey, int]]]] = []
+        sharing: Dict[AtomKey, int] = {}
+        unindexed: Dict[Optional[str], List[int]] = {stage_id: [] for stage_id in live}
+        for stage_id, ordered in live.items():
+            for ordinal, (rule, _) in enumerate(ordered):
+                indexable = []
+                for condition in necessary_atoms(rule.get('condition_group') or {}):
+                    description = _describe(condition, atoms)
+                    if description is _NEVER:
+                        break  # the rule can never trigger
+                    if description is not None:
+                        indexable.append(description)
+                else:
+                    if not indexable:
+                        unindexed[stage_id].append(ordinal)
+                        continue
+                    described.append((stage_id, ordinal, indexable))
+                    for key, _ in indexable:
+                        sharing[key] = sharing.get(key, 0) + 1
+        self.unindexed = {stage_id: tuple(ordinals) for stage_id, ordinals in unindexed.items()}
+
+        gates: Dict[AtomKey, List[Tuple[Optional[str], int]]] = {}
+        for stage_id, ordinal, indexable in described:
+            key, _ = min(indexable, key=lambda d: (d[1], sharing[d[0]]))
+            gates.setdefault(key, []).append((stage_id, ordinal))
+
+        # Network atom number -> memo slot and gated (stage, ordinal) pairs
+        self.atom_slots: List[Optional[int]] = []
+        self.atom_rules: List[Tuple[Tuple[Optional[str], int], ...]] = []
+        equal: Dict[str, Dict[Any, List[int]]] = {}
+        numeric: Dict[str, List[Tuple[int, Callable[[float], bool]]]] = {}
+        points: Dict[str, List[float]] = {}
+        for (slot, field, kind, constants), gated in gates.items():
+            number = len(self.atom_slots)
+            self.atom_slots.append(slot)
+            self.atom_rules.append(tuple(gated))
+            if kind == 'in':
+                for constant in constants:
+                    equal.setdefault(field, {}).setdefault(constant, []).append(number)
+                continue
+            if kind == 'between':
+                low, high = constants
+                test = lambda x, low=low, high=high: low <= x <= high
+            else:
+                test = lambda x, compare=NUMERIC_OPERATORS[kind], bound=constants[0]: compare(x, bound)
+            numeric.setdefault(field, []).append((number, test))
+            points.setdefault(field, []).extend(constants)
+
+        self.fields = tuple(
+            _FieldNode(field, equal.get(field, {}), numeric.get(field, ()), points.get(field, ()))
+            for field in dict.fromkeys(list(equal) + list(numeric))
+        )
+
+    def matcher(self, data: Dict[str, Any], memo: Memo, product_type: Any) -> '_NetworkMatch':
+        return _NetworkMatch(self, data, memo)
+
+
+class _NetworkMatch:
+    """The network's candidate rules for one proposal"""
+    __slots__ = ('index', 'candidates')
+
+    def __init__(self, index: NetworkRuleIndex, data: Dict[str, Any], memo: Memo):
+        self.index = index
+        holding: List[int] = []
+        for node in index.fields:
+            node.holding(data, holding)
+        self.candidates: Dict[Optional[str], List[int]] = {}
+        for number in holding:
+            slot = index.atom_slots[number]
+            if slot is not None:
+                AtomTable.mark_true(memo, slot)
+            for stage_id, ordinal in index.atom_rules[number]:
+                self.candidates.setdefault(stage_id, []).append(ordinal)
+
+    def walk(self, stage_id: Optional[str], product_type: Any, current_case_type: Callable[[], Any]) -> Iterator[IndexedRule]:
+        """Yield the stage's candidate rules that apply, in priority order (see RuleIndex.walk)"""
+        stage_rules = self.index.stage_rules.get(stage_id, ())
+        for ordinal in merge(self.index.unindexed.get(stage_id, ()), sorted(self.candidates.get(stage_id, ()))):
+            entry = stage_rules[ordinal]
+            if entry.products and product_type not in entry.products:
+                continue
+            if entry.case_types and current_case_type() not in entry.case_types:
+                continue
+            yield entry.rule, entry.compiled
@@ -0,0 +1,98 @@
+"""Compiled scorecards
+
+Each scorecard parameter is compiled when the ruleset snapshot is built: its
+bands' min / max bounds become the boundary points of an IntervalLookup whose
+values are the weighted band scores, int(score * weight), of the first band
+containing each point or gap. Scoring a parameter is then one bisect for a
+single proposal, or one np.searchsorted over a float column for a batch.
+
+Bands keep their legacy meaning: min and max are inclusive and default to
+-inf / +inf, the first listed band containing the value wins, and a band whose
+bounds or score cannot be compared or multiplied is passed over. Values that
+float() cannot convert, and NaN, score nothing.
+"""
+import math
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from intervals import IntervalLookup
+from rule_compiler import compile_field_accessor, to_float
+
+
+def _band_score(band: Dict[str, Any], weight: Any) -> Optional[int]:
+    try:
+        return int(band.get('score', 0) * weight)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _point(bound: Any) -> Optional[float]:
+    if not isinstance(bound, (int, float)):
+        return None
+    try:
+        return float(bound)
+    except OverflowError:
+        return None
+
+
+class CompiledParameter:
+    """One scorecard parameter: field value -> weighted score of its band"""
+    __slots__ = ('field', 'get_value', 'lookup', 'scores')
+
+    def __init__(self, param: Dict[str, Any]):
+        self.field = param.get('field', '')
+        self.get_value = compile_field_accessor(self.field)
+        weight = param.get('weight', 1)
+        bands = []
+        for band in param.get('bands') or []:
+            score = _band_score(band, weight)
+            if score is not None:
+                bands.append((band.get('min', -math.inf), band.get('max', math.inf), score))
+
+        def first_score(x: float) -> int:
+            for low, high, score in bands:
+                try:
+                    if low <= x <= high:
+                        return score
+                except (TypeError, ValueError):
+                    pass
+            return 0
+
+        points = (_point(bound) for low, high, _ in bands for bound in (low, high))
+        self.lookup = IntervalLookup((p for p in points if p is not None), first_score)
+        self.scores = np.array(self.lookup.values, dtype=np.int64)
+
+    def score(self, data: Dict[str, Any]) -> int:
+        try:
+            x = float(self.get_value(data))
+        except (TypeError, ValueError, OverflowError):
+            return 0
+        return 0 if math.isnan(x) else self.lookup.get(x)
+
+    def score_column(self, xs: np.ndarray) -> np.ndarray:
+        """score() of every value of a float column (NaN where float() failed)"""
+        scores = np.zeros(len(xs), dtype=np.int64)
+        valid = ~np.isnan(xs)
+        scores[valid] = self.scores[self.lookup.slots(xs[valid])]
+        return scores
+
+
+class CompiledScorecard:
+    __slots__ = ('name', 'product', 'parameters', 'threshold_direct_accept', 'threshold_refer')
+
+    def __init__(self, scorecard: Dict[str, Any]):
+        self.name = scorecard['name']
+        self.product = scorecard['product']
+        self.parameters = tuple(CompiledParameter(p) for p in scorecard['parameters'] or [])
+        # A missing threshold never moves the case type
+        accept, refer = to_float(scorecard['threshold_direct_accept']), to_float(scorecard['threshold_refer'])
+        self.threshold_direct_accept = math.inf if accept is None else accept
+        self.threshold_refer = -math.inf if refer is None else refer
+
+    def score(self, data: Dict[str, Any]) -> int:
+        return sum(param.score(data) for param in self.parameters)
+
+
+def compile_scorecards(scorecards: Sequence[Dict[str, Any]]) -> Tuple[CompiledScorecard, ...]:
+    return tuple(CompiledScorecard(s) for s in scorecards)
@@ -1,18 +1,23 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any, Union
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import List, Optional, Dict, Any, Union, Tuple, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+import threading
 import uuid
 from datetime import datetime, timezone
 from enum import Enum
 import json
+import math
 
 from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
@@ -24,6 +29,23 @@ from auth import (
     create_access_token, decode_access_token, check_permission
 )
 from rule_templates import STP_RULE_TEMPLATES, TEMPLATE_CATEGORIES
+from fields import DERIVED_FIELDS
+from rule_compiler import AtomTable, CompiledRule, compile_rule
+from rule_analyzer import (
+    ProposalSchema, RulesetAnalysis, analyze_condition, analyze_ruleset, order_independent_hard_stops
+)
+from batch_engine import BatchRuleset, compile_batch_ruleset, evaluate_columnar
+from parallel_engine import ParallelBatchEvaluator
+from rule_index import RuleIndex
+from rule_network import MatchingEngine, NetworkRuleIndex
+from risk_index import RiskBandIndex
+from grid_index import CompiledGrid
+from scorecard_index import CompiledScorecard
+from activation import ActivationSchedule, effective_window
+from write_behind import DurabilityMode, WriteBehindQueue
+from boundary import field_breakpoints, search_boundaries
+from evaluation import EvaluationState, TraceLevel, evaluate, to_bulk_result
+from stage_cache import MISS, OutcomeCache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -224,6 +246,15 @@ class EvaluationModel(Base):
     evaluation_time_ms = Column(Float, default=0)
     evaluated_at = Column(String(50), default=lambda: datetime.now(timezone.utc).isoformat())
 
+class EvaluationInputModel(Base):
+    """The proposal an evaluation was made from, so it can be amended later"""
+    __tablename__ = "evaluation_inputs"
+    
+    evaluation_id = Column(String(36), primary_key=True)
+    proposal = Column(JSON, nullable=False)  # ProposalData.model_dump(mode='json')
+    ruleset_version = Column(Integer, nullable=False)
+    risk_loading = Column(JSON, nullable=True)
+
 class AuditLogModel(Base):
     __tablename__ = "audit_logs"
     
@@ -269,6 +300,38 @@ class RuleTemplateModel(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(String(50), default=lambda: datetime.now(timezone.utc).isoformat())
 
+class BulkJobModel(Base):
+    """Background bulk evaluation job, checkpointed after every chunk"""
+    __tablename__ = "bulk_jobs"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    source = Column(String(20), nullable=False)  # csv, batch
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), default="queued")  # queued, running, completed, failed, cancelled
+    input_path = Column(String(500), nullable=False)
+    ruleset_version = Column(Integer, nullable=False)
+    ruleset = Column(JSON, nullable=False)  # pinned snapshot tables, see snapshot_tables
+    total_rows = Column(Integer, nullable=True)
+    persist = Column(Boolean, default=False)  # also store results as evaluations
+    rows_processed = Column(Integer, default=0)  # input records consumed; the resume checkpoint
+    result_count = Column(Integer, default=0)
+    pass_count = Column(Integer, default=0)
+    parse_error_count = Column(Integer, default=0)
+    parse_errors = Column(JSON, default=list)  # the first PARSE_ERROR_SAMPLE messages
+    error = Column(Text, nullable=True)
+    processing_time_ms = Column(Float, default=0)
+    created_at = Column(String(50), default=lambda: datetime.now(timezone.utc).isoformat())
+    started_at = Column(String(50), nullable=True)
+    completed_at = Column(String(50), nullable=True)
+    updated_at = Column(String(50), default=lambda: datetime.now(timezone.utc).isoformat())
+
+class BulkJobResultModel(Base):
+    __tablename__ = "bulk_job_results"
+    
+    job_id = Column(String(36), primary_key=True)
+    row_index = Column(Integer, primary_key=True)
+    result = Column(JSON, nullable=False)  # BulkProposalResult fields
+
 # Create tables
 def init_db():
     Base.metadata.create_all(bind=engine)
@@ -541,6 +604,14 @@ class ProposalData(BaseModel):
     is_ailment_ongoing: Optional[bool] = None  # Only if has_medical_history = True
     additional_data: Dict[str, Any] = {}
 
+# Rules resolve derived field names before proposal fields would be reached
+if DERIVED_FIELDS.keys() & ProposalData.model_fields.keys():
+    raise RuntimeError("derived field shadows a ProposalData field")
+
+PROPOSAL_SCHEMA = ProposalSchema(
+    ProposalData.model_fields, open_fields=['additional_data'], products=[p.value for p in ProductTypeEnum]
+)
+
 class RuleExecutionTrace(BaseModel):
     rule_id: str
     rule_name: str
@@ -568,102 +639,40 @@ class EvaluationResult(BaseModel):
     risk_loading: Optional[RiskLoadingResult] = None
     evaluation_time_ms: float
     evaluated_at: str
+    evaluation_id: Optional[str] = None
+
+class AmendRequest(BaseModel):
+    evaluation_id: str
+    changes: Dict[str, Any]  # proposal field -> new value
+
+class AmendResult(EvaluationResult):
+    amended_from: str
+    changes: Dict[str, Dict[str, Any]]  # field -> {before, after}
+    diff: Dict[str, Dict[str, Any]]  # result key -> {before, after} or {added, removed}
+
+class BoundarySearchRequest(BaseModel):
+    proposal: ProposalData
+    field: str  # a numeric proposal field
+    low: float
+    high: float
+    tolerance: float = 0  # bisection resolution for float fields; 0 derives one from the range
+
+class DecisionInterval(BaseModel):
+    low: float
+    high: float
+    low_inclusive: bool
+    high_inclusive: bool
+    stp_decision: str
+    case_type: int
+    case_type_label: str
 
-# ==================== RULE ENGINE ====================
-class RuleEngine:
-    def __init__(self):
-        self.operators = {
-            OperatorEnum.EQUALS: lambda a, b, _: a == b,
-            OperatorEnum.NOT_EQUALS: lambda a, b, _: a != b,
-            OperatorEnum.GREATER_THAN: lambda a, b, _: float(a) > float(b) if a is not None and b is not None else False,
-            OperatorEnum.LESS_THAN: lambda a, b, _: float(a) < float(b) if a is not None and b is not None else False,
-            OperatorEnum.GREATER_THAN_OR_EQUAL: lambda a, b, _: float(a) >= float(b) if a is not None and b is not None else False,
-            OperatorEnum.LESS_THAN_OR_EQUAL: lambda a, b, _: float(a) <= float(b) if a is not None and b is not None else False,
-            OperatorEnum.IN: lambda a, b, _: a in b if isinstance(b, list) else a == b,
-            OperatorEnum.IN_LIST: lambda a, b, _: a in b if isinstance(b, list) else a == b,
-            OperatorEnum.NOT_IN: lambda a, b, _: a not in b if isinstance(b, list) else a != b,
-            OperatorEnum.BETWEEN: lambda a, b, c: float(b) <= float(a) <= float(c) if a is not None and b is not None and c is not None else False,
-            OperatorEnum.CONTAINS: lambda a, b, _: str(b).lower() in str(a).lower() if a and b else False,
-            OperatorEnum.STARTS_WITH: lambda a, b, _: str(a).lower().startswith(str(b).lower()) if a and b else False,
-            OperatorEnum.IS_EMPTY: lambda a, _, __: a is None or a == "" or a == [],
-            OperatorEnum.IS_NOT_EMPTY: lambda a, _, __: a is not None and a != "" and a != [],
-        }
-    
-    def get_field_value(self, data: Dict[str, Any], field: str) -> Any:
-        keys = field.split('.')
-        value = data
-        for key in keys:
-            if isinstance(value, dict):
-                value = value.get(key)
-            else:
-                return None
-        return value
-    
-    def evaluate_condition(self, condition: Dict, data: Dict[str, Any]) -> bool:
-        field_value = self.get_field_value(data, condition.get('field', ''))
-        operator = condition.get('operator')
-        
-        try:
-            operator_enum = OperatorEnum(operator)
-        except ValueError:
-            logger.warning(f"Unknown operator: {operator}")
-            return False
-        
-        operator_func = self.operators.get(operator_enum)
-        if operator_func is None:
-            return False
-        
-        try:
-            return operator_func(field_value, condition.get('value'), condition.get('value2'))
-        except Exception as e:
-            logger.error(f"Error evaluating condition: {e}")
-            return False
-    
-    def evaluate_condition_group(self, group: Dict, data: Dict[str, Any]) -> bool:
-        conditions = group.get('conditions', [])
-        if not conditions:
-            return True
-        
-        results = []
-        for item in conditions:
-            if 'logical_operator' in item or 'conditions' in item:
-                result = self.evaluate_condition_group(item, data)
-            else:
-                result = self.evaluate_condition(item, data)
-            results.append(result)
-        
-        logical_op = group.get('logical_operator', 'AND')
-        if logical_op == 'AND':
-            final_result = all(results) if results else True
-        else:
-            final_result = any(results) if results else False
-        
-        return not final_result if group.get('is_negated', False) else final_result
-    
-    def is_rule_applicable(self, rule: Dict[str, Any], product_type: str, current_case_type: int) -> bool:
-        if not rule.get('is_enabled', True):
-            return False
-        
-        now = datetime.now(timezone.utc).isoformat()
-        effective_from = rule.get('effective_from')
-        effective_to = rule.get('effective_to')
-        
-        if effective_from and now < effective_from:
-            return False
-        if effective_to and now > effective_to:
-            return False
-        
-        products = rule.get('products', [])
-        if products and product_type not in products:
-            return False
-        
-        case_types = rule.get('case_types', [])
-        if case_types and current_case_type not in case_types:
-            return False
-        
-        return True
-
-rule_engine = RuleEngine()
+class BoundarySearchResult(BaseModel):
+    proposal_id: str
+    field: str
+    exact: bool  # False when some reader of the field has no breakpoints and changes were bisected
+    evaluations: int
+    intervals: List[DecisionInterval]
+    search_time_ms: float
 
 # ==================== HELPER FUNCTIONS ====================
 def log_audit(db: Session, action: str, entity_type: str, entity_id: str, entity_name: str, changes: Dict = {}):
@@ -677,14 +686,15 @@ def log_audit(db: Session, action: str, entity_type: str, entity_id: str, entity
     db.add(audit)
     db.commit()
 
+CASE_TYPE_LABELS = {
+    0: "Normal Case",
+    1: "Direct Accept",
+    -1: "Direct Fail",
+    3: "GCRP Case"
+}
+
 def get_case_type_label(case_type: int) -> str:
-    labels = {
-        0: "Normal Case",
-        1: "Direct Accept",
-        -1: "Direct Fail",
-        3: "GCRP Case"
-    }
-    return labels.get(case_type, "Unknown")
+    return CASE_TYPE_LABELS.get(case_type, "Unknown")
 
 def model_to_dict(model) -> Dict:
     return {c.name: getattr(model, c.name) for c in model.__table__.columns}
@@ -707,6 +717,173 @@ def stage_to_response(db: Session, stage: RuleStageModel) -> Dict:
     result['rule_count'] = rule_count
     return result
 
+# ==================== RULESET SNAPSHOT ====================
+# How single-proposal evaluation finds the rules to test: "compiled" walks every
+# applicable rule, "network" only those a discrimination network cannot rule out
+RULE_MATCHING_ENGINE = MatchingEngine(os.environ.get('RULE_MATCHING_ENGINE', MatchingEngine.COMPILED.value))
+
+@dataclass(frozen=True)
+class ProductPipeline:
+    """The rule, scorecard and grid phases of a snapshot, specialized to one product (see rule_analyzer)"""
+    analysis: RulesetAnalysis  # normalized for the product; its dead rules include other products' rules
+    compiled_rules: Dict[str, CompiledRule]  # rule id -> compiled normalized condition_group, product's rules only
+    atoms: AtomTable  # atomic conditions shared by compiled_rules
+    rule_schedule: ActivationSchedule  # candidate RuleIndex of the product's rules effective at a given time
+    compiled_scorecards: Tuple[CompiledScorecard, ...]  # the product's scorecards
+    compiled_grids: Tuple[CompiledGrid, ...]  # grids applying to the product
+
+    def rule_index(self, now: float) -> RuleIndex:
+        """Index of the rules whose effective window contains now (a POSIX timestamp)"""
+        return self.rule_schedule.at(now)
+
+@dataclass(frozen=True)
+class RulesetSnapshot:
+    """Immutable view of everything evaluation reads from the database"""
+    # Rows are plain dicts (see model_to_dict) shared by all concurrent requests: read-only
+    version: int
+    stages: Tuple[Dict[str, Any], ...]  # enabled, ordered by execution_order
+    rules: Tuple[Dict[str, Any], ...]  # enabled
+    scorecards: Tuple[Dict[str, Any], ...]  # enabled
+    compiled_scorecards: Tuple[CompiledScorecard, ...]  # scorecards with bisectable parameter bands
+    grids: Tuple[Dict[str, Any], ...]  # enabled
+    compiled_grids: Tuple[CompiledGrid, ...]  # grids with indexed axes and cell matrix
+    risk_bands: Tuple[Dict[str, Any], ...]  # enabled, ordered by priority
+    risk_index: RiskBandIndex  # risk_bands indexed by product and field
+    analysis: RulesetAnalysis  # normalized condition groups, dead rules and findings
+    pipelines: Dict[str, ProductPipeline]  # product_type value -> specialized rule, scorecard and grid phases
+    batch: BatchRuleset  # mask-compiled form for bulk evaluation
+    
+    def pipeline(self, product_type: str) -> ProductPipeline:
+        return self.pipelines[product_type]
+
+def build_product_pipeline(product: str, stages, rules, windows, batch: BatchRuleset) -> ProductPipeline:
+    analysis = analyze_ruleset(stages, rules, PROPOSAL_SCHEMA.for_product(product), windows)
+    applies = [not r.get('products') or product in r['products'] for r in rules]
+    atoms = AtomTable()
+    compiled_rules = {
+        r['id']: compile_rule(r, atoms, n['condition_group'])
+        for r, n, applicable in zip(rules, analysis.rules, applies) if applicable
+    }
+    stage_ids = [s['id'] for s in stages] + [None]
+    hard_stops = order_independent_hard_stops(stages, analysis.rules, analysis.dead)
+
+    def build_index(active: Sequence[bool]) -> RuleIndex:
+        # Other products' rules are indexed as inactive, so stage sizes stay those of the whole ruleset
+        active = [is_active and applicable for is_active, applicable in zip(active, applies)]
+        if RULE_MATCHING_ENGINE == MatchingEngine.NETWORK:
+            return NetworkRuleIndex(stage_ids, analysis.rules, compiled_rules, atoms, active, analysis.dead)
+        return RuleIndex(stage_ids, analysis.rules, compiled_rules, active, analysis.dead, hard_stops)
+
+    return ProductPipeline(
+        analysis=analysis,
+        compiled_rules=compiled_rules,
+        atoms=atoms,
+        rule_schedule=ActivationSchedule(windows, build_index),
+        compiled_scorecards=tuple(sc for sc in batch.scorecards if sc.product == product),
+        compiled_grids=tuple(g for g in batch.grids if g.applies_to(product))
+    )
+
+def build_ruleset_snapshot(version: int, stages, rules, scorecards, grids, risk_bands) -> RulesetSnapshot:
+    """Compile a snapshot from row dicts (from the database or a pinned job ruleset)"""
+    stages, rules, risk_bands = tuple(stages), tuple(rules), tuple(risk_bands)
+    scorecards, grids = tuple(scorecards), tuple(grids)
+    windows = [effective_window(r) for r in rules]
+    analysis = analyze_ruleset(stages, rules, PROPOSAL_SCHEMA, windows)
+    batch = compile_batch_ruleset(stages, analysis.live_rules, risk_bands, scorecards, grids)
+    return RulesetSnapshot(
+        version=version,
+        stages=stages,
+        rules=rules,
+        scorecards=scorecards,
+        compiled_scorecards=batch.scorecards,
+        grids=grids,
+        compiled_grids=batch.grids,
+        risk_bands=risk_bands,
+        risk_index=RiskBandIndex(risk_bands),
+        analysis=analysis,
+        pipelines={p.value: build_product_pipeline(p.value, stages, rules, windows, batch) for p in ProductTypeEnum},
+        batch=batch
+    )
+
+def load_ruleset_snapshot(db: Session, version: int) -> RulesetSnapshot:
+    """Load the evaluation configuration from the database"""
+    stages = db.query(RuleStageModel).filter(RuleStageModel.is_enabled).order_by(RuleStageModel.execution_order).all()
+    rules = db.query(RuleModel).filter(RuleModel.is_enabled).all()
+    scorecards = db.query(ScorecardModel).filter(ScorecardModel.is_enabled).all()
+    grids = db.query(GridModel).filter(GridModel.is_enabled).all()
+    bands = db.query(RiskBandModel).filter(RiskBandModel.is_enabled).order_by(RiskBandModel.priority).all()
+    return build_ruleset_snapshot(
+        version,
+        stages=[model_to_dict(s) for s in stages],
+        rules=[model_to_dict(r) for r in rules],
+        scorecards=[model_to_dict(s) for s in scorecards],
+        grids=[model_to_dict(g) for g in grids],
+        risk_bands=[model_to_dict(b) for b in bands]
+    )
+
+def snapshot_tables(snapshot: RulesetSnapshot) -> Dict[str, List[Dict[str, Any]]]:
+    """The JSON-serializable row dicts of a snapshot, for pinning it elsewhere"""
+    return {
+        "stages": list(snapshot.stages),
+        "rules": list(snapshot.rules),
+        "scorecards": list(snapshot.scorecards),
+        "grids": list(snapshot.grids),
+        "risk_bands": list(snapshot.risk_bands)
+    }
+
+class RulesetCache:
+    """Process-wide holder of the current RulesetSnapshot, reloaded only after bump()"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 1
+        self._snapshot: Optional[RulesetSnapshot] = None
+    
+    @property
+    def version(self) -> int:
+        return self._version
+    
+    def bump(self) -> int:
+        # Every endpoint that changes rules, stages, scorecards, grids or risk bands calls this after committing
+        with self._lock:
+            self._version += 1
+            return self._version
+    
+    def get(self, db: Session) -> RulesetSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self._version:
+                self._snapshot = load_ruleset_snapshot(db, self._version)
+                logger.info(f"Loaded ruleset snapshot v{self._version}: {len(self._snapshot.rules)} rules, {len(self._snapshot.stages)} stages")
+            return self._snapshot
+
+ruleset_cache = RulesetCache()
+
+# Stage and risk-loading outcomes by the field values they read (see stage_cache); 0 disables
+outcome_cache = OutcomeCache(int(os.environ.get('STAGE_CACHE_SIZE', '10000')))
+# Recent evaluations (EvaluationState, proposal JSON, result summary) by id, for amendments
+evaluation_states = OutcomeCache(int(os.environ.get('AMEND_STATE_SIZE', '1000')))
+
+# ==================== EVALUATION PERSISTENCE ====================
+def insert_evaluation_records(records: List[Dict[str, Any]]):
+    """Insert evaluation rows, and the inputs of those that carry one, in a single transaction"""
+    inputs = [{"evaluation_id": r["id"], **r["input"]} for r in records if "input" in r]
+    with engine.begin() as conn:
+        conn.execute(EvaluationModel.__table__.insert(),
+                     [{key: value for key, value in r.items() if key != "input"} for r in records])
+        if inputs:
+            conn.execute(EvaluationInputModel.__table__.insert(), inputs)
+
+evaluation_writer = WriteBehindQueue(
+    insert_evaluation_records,
+    mode=DurabilityMode(os.environ.get('EVALUATION_WRITE_MODE', DurabilityMode.BATCHED.value)),
+    max_batch=int(os.environ.get('EVALUATION_FLUSH_ROWS', '500')),
+    max_delay=int(os.environ.get('EVALUATION_FLUSH_MS', '200')) / 1000,
+    max_queue=int(os.environ.get('EVALUATION_QUEUE_SIZE', '10000')),
+    transient=(OperationalError,)  # "database is locked" and other retryable driver errors
+)
+
 # ==================== AUTHENTICATION ====================
 security = HTTPBearer(auto_error=False)
 
@@ -1063,6 +1240,7 @@ def create_rule_from_template(
     
     db.add(rule)
     db.commit()
+    ruleset_cache.bump()
     db.refresh(rule)
     
     log_audit(db, "CREATE_FROM_TEMPLATE", "rule", rule.id, rule.name, {"template_id": template.template_id})
@@ -1083,7 +1261,54 @@ def root():
 def health_check():
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
+@api_router.get("/evaluations/writer")
+def get_evaluation_writer_stats():
+    """Write-behind queue state: durability mode, pending, written and dropped records"""
+    return evaluation_writer.stats()
+
+@api_router.get("/evaluations/cache")
+def get_evaluation_cache_stats():
+    """Stage / risk-loading outcome cache: ruleset version, entries, hits and misses by kind"""
+    return outcome_cache.stats()
+
+@api_router.get("/fields/derived")
+def get_derived_fields():
+    """Derived fields rules, scorecards, grids and risk bands can test besides proposal fields"""
+    return [
+        {"field": name, "kind": type(derived).__name__.lower(), "description": derived.description}
+        for name, derived in DERIVED_FIELDS.items()
+    ]
+
+@api_router.get("/ruleset/analysis")
+def get_ruleset_analysis(db: Session = Depends(get_db)):
+    """Static analysis of the enabled rules and active rule templates; dropped rules are left out of evaluation"""
+    ruleset = ruleset_cache.get(db)
+    templates = db.query(RuleTemplateModel).filter(RuleTemplateModel.is_active == True).all()
+    template_findings = []
+    for template in templates:
+        row = model_to_dict(template)
+        _, findings = analyze_condition({**row, 'id': row['template_id']}, PROPOSAL_SCHEMA)
+        template_findings.extend(f.to_json() for f in findings)
+    return {"version": ruleset.version, **ruleset.analysis.to_json(), "template_findings": template_findings}
+
+@api_router.get("/ruleset/version")
+def get_ruleset_version():
+    """Current ruleset version; bumped by every rule/stage/scorecard/grid/risk band change"""
+    return {"version": ruleset_cache.version}
+
 # ==================== RULE CRUD ====================
+@api_router.post("/rules/analyze")
+def analyze_rule(rule_data: RuleCreate, db: Session = Depends(get_db)):
+    """Check a rule before saving it: its findings and normalized condition_group alongside the enabled rules"""
+    ruleset = ruleset_cache.get(db)
+    draft = {**rule_data.model_dump(mode='json'), 'id': f"draft-{uuid.uuid4()}"}
+    analysis = analyze_ruleset(ruleset.stages, ruleset.rules + (draft,), PROPOSAL_SCHEMA)
+    return {
+        "condition_group": analysis.rules[-1]['condition_group'],
+        "dropped": draft['id'] in analysis.dead,
+        "findings": [f.to_json() for f in analysis.findings if f.rule_id == draft['id']]
+    }
+
 @api_router.post("/rules", response_model=RuleResponse)
 def create_rule(rule_data: RuleCreate, db: Session = Depends(get_db)):
     rule = RuleModel(
@@ -1102,6 +1327,7 @@ def create_rule(rule_data: RuleCreate, db: Session = Depends(get_db)):
     )
     db.add(rule)
     db.commit()
+    ruleset_cache.bump()
     db.refresh(rule)
     log_audit(db, "CREATE", "rule", rule.id, rule.name)
     return rule_to_response(db, rule)
@@ -1170,6 +1396,7 @@ def update_rule(rule_id: str, rule_data: RuleUpdate, db: Session = Depends(get_d
             setattr(rule, key, value)
     
     db.commit()
+    ruleset_cache.bump()
     db.refresh(rule)
     log_audit(db, "UPDATE", "rule", rule_id, rule.name, update_data)
     return rule_to_response(db, rule)
@@ -1183,6 +1410,7 @@ def delete_rule(rule_id: str, db: Session = Depends(get_db)):
     name = rule.name
     db.delete(rule)
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "DELETE", "rule", rule_id, name)
     return {"message": "Rule deleted successfully"}
 
@@ -1195,6 +1423,7 @@ def toggle_rule(rule_id: str, db: Session = Depends(get_db)):
     rule.is_enabled = not rule.is_enabled
     rule.updated_at = datetime.now(timezone.utc).isoformat()
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "TOGGLE", "rule", rule_id, rule.name, {"is_enabled": rule.is_enabled})
     return {"id": rule_id, "is_enabled": rule.is_enabled}
 
@@ -1211,6 +1440,7 @@ def create_stage(stage_data: RuleStageCreate, db: Session = Depends(get_db)):
     )
     db.add(stage)
     db.commit()
+    ruleset_cache.bump()
     db.refresh(stage)
     log_audit(db, "CREATE", "stage", stage.id, stage.name)
     return stage_to_response(db, stage)
@@ -1241,6 +1471,7 @@ def update_stage(stage_id: str, stage_data: RuleStageUpdate, db: Session = Depen
             setattr(stage, key, value)
     
     db.commit()
+    ruleset_cache.bump()
     db.refresh(stage)
     log_audit(db, "UPDATE", "stage", stage_id, stage.name, update_data)
     return stage_to_response(db, stage)
@@ -1259,6 +1490,7 @@ def delete_stage(stage_id: str, db: Session = Depends(get_db)):
     name = stage.name
     db.delete(stage)
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "DELETE", "stage", stage_id, name)
     return {"message": "Stage deleted successfully", "rules_unassigned": len(rules)}
 
@@ -1271,6 +1503,7 @@ def toggle_stage(stage_id: str, db: Session = Depends(get_db)):
     stage.is_enabled = not stage.is_enabled
     stage.updated_at = datetime.now(timezone.utc).isoformat()
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "TOGGLE", "stage", stage_id, stage.name, {"is_enabled": stage.is_enabled})
     return {"id": stage_id, "is_enabled": stage.is_enabled}
 
@@ -1298,6 +1531,7 @@ def create_scorecard(scorecard_data: ScorecardCreate, db: Session = Depends(get_
     )
     db.add(scorecard)
     db.commit()
+    ruleset_cache.bump()
     db.refresh(scorecard)
     log_audit(db, "CREATE", "scorecard", scorecard.id, scorecard.name)
     return model_to_dict(scorecard)
@@ -1334,6 +1568,7 @@ def update_scorecard(scorecard_id: str, scorecard_data: ScorecardCreate, db: Ses
     scorecard.updated_at = datetime.now(timezone.utc).isoformat()
     
     db.commit()
+    ruleset_cache.bump()
     db.refresh(scorecard)
     log_audit(db, "UPDATE", "scorecard", scorecard_id, scorecard.name)
     return model_to_dict(scorecard)
@@ -1347,6 +1582,7 @@ def delete_scorecard(scorecard_id: str, db: Session = Depends(get_db)):
     name = scorecard.name
     db.delete(scorecard)
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "DELETE", "scorecard", scorecard_id, name)
     return {"message": "Scorecard deleted successfully"}
 
@@ -1367,6 +1603,7 @@ def create_grid(grid_data: GridCreate, db: Session = Depends(get_db)):
     )
     db.add(grid)
     db.commit()
+    ruleset_cache.bump()
     db.refresh(grid)
     log_audit(db, "CREATE", "grid", grid.id, grid.name)
     return model_to_dict(grid)
@@ -1409,6 +1646,7 @@ def update_grid(grid_id: str, grid_data: GridCreate, db: Session = Depends(get_d
     grid.updated_at = datetime.now(timezone.utc).isoformat()
     
     db.commit()
+    ruleset_cache.bump()
     db.refresh(grid)
     log_audit(db, "UPDATE", "grid", grid_id, grid.name)
     return model_to_dict(grid)
@@ -1422,6 +1660,7 @@ def delete_grid(grid_id: str, db: Session = Depends(get_db)):
     name = grid.name
     db.delete(grid)
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "DELETE", "grid", grid_id, name)
     return {"message": "Grid deleted successfully"}
 
@@ -1441,6 +1680,7 @@ def create_risk_band(band_data: RiskBandCreate, db: Session = Depends(get_db)):
     )
     db.add(band)
     db.commit()
+    ruleset_cache.bump()
     db.refresh(band)
     log_audit(db, "CREATE", "risk_band", band.id, band.name)
     return model_to_dict(band)
@@ -1478,6 +1718,7 @@ def update_risk_band(band_id: str, band_data: RiskBandCreate, db: Session = Depe
     band.updated_at = datetime.now(timezone.utc).isoformat()
     
     db.commit()
+    ruleset_cache.bump()
     db.refresh(band)
     log_audit(db, "UPDATE", "risk_band", band_id, band.name)
     return model_to_dict(band)
@@ -1490,6 +1731,7 @@ def delete_risk_band(band_id: str, db: Session = Depends(get_db)):
     name = band.name
     db.delete(band)
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "DELETE", "risk_band", band_id, name)
     return {"message": "Risk band deleted successfully"}
 
@@ -1501,80 +1743,10 @@ def toggle_risk_band(band_id: str, db: Session = Depends(get_db)):
     band.is_enabled = not band.is_enabled
     band.updated_at = datetime.now(timezone.utc).isoformat()
     db.commit()
+    ruleset_cache.bump()
     log_audit(db, "TOGGLE", "risk_band", band_id, band.name)
     return {"id": band_id, "is_enabled": band.is_enabled}
 
-def calculate_risk_loading(db: Session, proposal: ProposalData) -> RiskLoadingResult:
-    """Calculate premium loading based on risk bands"""
-    bands = db.query(RiskBandModel).filter(RiskBandModel.is_enabled).order_by(RiskBandModel.priority).all()
-    
-    proposal_dict = proposal.model_dump()
-    total_risk_score = 0
-    total_loading_percentage = 0.0
-    applied_bands = []
-    
-    for band in bands:
-        # Check if band applies to this product
-        if band.products and proposal.product_type.value not in band.products:
-            continue
-        
-        condition = band.condition
-        field = condition.get('field', '')
-        operator = condition.get('operator', '')
-        value = condition.get('value')
-        value2 = condition.get('value2')
-        
-        field_value = rule_engine.get_field_value(proposal_dict, field)
-        
-        # Skip if field value is None and we need to compare
-        if field_value is None and operator not in ['is_empty', 'is_not_empty']:
-            continue
-        
-        triggered = False
-        try:
-            if operator == 'equals':
-                triggered = field_value == value
-            elif operator == 'not_equals':
-                triggered = field_value != value
-            elif operator == 'greater_than':
-                triggered = float(field_value) > float(value)
-            elif operator == 'less_than':
-                triggered = float(field_value) < float(value)
-            elif operator == 'greater_than_or_equal':
-                triggered = float(field_value) >= float(value)
-            elif operator == 'less_than_or_equal':
-                triggered = float(field_value) <= float(value)
-            elif operator == 'between':
-                triggered = float(value) <= float(field_value) <= float(value2)
-            elif operator == 'in_list' or operator == 'in':
-                triggered = field_value in value if isinstance(value, list) else field_value == value
-        except (ValueError, TypeError):
-            continue
-        
-        if triggered:
-            total_risk_score += band.risk_score
-            total_loading_percentage += band.loading_percentage
-            applied_bands.append({
-                'band_id': band.id,
-                'band_name': band.name,
-                'category': band.category,
-                'loading_percentage': band.loading_percentage,
-                'risk_score': band.risk_score,
-                'condition_field': field,
-                'field_value': field_value
-            })
-    
-    base_premium = float(proposal.premium)
-    loaded_premium = base_premium * (1 + total_loading_percentage / 100)
-    
-    return RiskLoadingResult(
-        total_risk_score=total_risk_score,
-        total_loading_percentage=round(total_loading_percentage, 2),
-        base_premium=base_premium,
-        loaded_premium=round(loaded_premium, 2),
-        applied_bands=applied_bands
-    )
-
 # ==================== PRODUCT CRUD ====================
 @api_router.post("/products")
 def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
@@ -1646,317 +1818,165 @@ def delete_product(product_id: str, db: Session = Depends(get_db)):
     return {"message": "Product deleted successfully"}
 
 # ==================== UNDERWRITING EVALUATION ====================
-@api_router.post("/underwriting/evaluate", response_model=EvaluationResult)
-def evaluate_proposal(proposal: ProposalData, db: Session = Depends(get_db)):
-    import time
-    start_time = time.time()
-    
-    stp_decision = "PASS"
-    case_type = CaseTypeEnum.NORMAL.value
-    reason_flag = ReasonFlagEnum.STP_PASS_SKIP.value
-    scorecard_value = 0
-    triggered_rules = []
-    validation_errors = []
-    reason_codes = []
-    reason_messages = []
-    rule_trace = []
-    stage_trace = []
-    
-    proposal_dict = proposal.model_dump()
-    
-    # Get all stages ordered by execution_order
-    stages = db.query(RuleStageModel).filter(RuleStageModel.is_enabled).order_by(RuleStageModel.execution_order).all()
-    
-    # Get all enabled rules
-    all_rules = db.query(RuleModel).filter(RuleModel.is_enabled).all()
-    
-    should_stop_processing = False
-    
-    # Process each stage in order
-    for stage in stages:
-        if should_stop_processing:
-            # Add skipped stage to trace
-            stage_trace.append(StageExecutionTrace(
-                stage_id=stage.id,
-                stage_name=stage.name,
-                execution_order=stage.execution_order,
-                status="skipped",
-                rules_executed=[],
-                triggered_rules_count=0,
-                execution_time_ms=0
-            ))
-            continue
-        
-        stage_start = time.time()
-        stage_rules = [r for r in all_rules if r.stage_id == stage.id]
-        stage_rules.sort(key=lambda r: r.priority)
-        
-        stage_rule_trace = []
-        stage_triggered_count = 0
-        stage_has_fail = False
-        
-        for rule in stage_rules:
-            rule_start = time.time()
-            rule_dict = model_to_dict(rule)
-            
-            if not rule_engine.is_rule_applicable(rule_dict, proposal.product_type.value, case_type):
-                continue
-            
-            condition_group = rule.condition_group
-            triggered = rule_engine.evaluate_condition_group(condition_group, proposal_dict)
-            
-            input_vals = {}
-            for cond in condition_group.get('conditions', []):
-                if isinstance(cond, dict) and 'field' in cond:
-                    input_vals[cond['field']] = rule_engine.get_field_value(proposal_dict, cond['field'])
-            
-            trace_entry = RuleExecutionTrace(
-                rule_id=rule.id,
-                rule_name=rule.name,
-                category=rule.category,
-                triggered=triggered,
-                input_values=input_vals,
-                condition_result=triggered,
-                action_applied=rule.action if triggered else None,
-                execution_time_ms=(time.time() - rule_start) * 1000
-            )
-            
-            stage_rule_trace.append(trace_entry)
-            rule_trace.append(trace_entry)
-            
-            if triggered:
-                stage_triggered_count += 1
-                action = rule.action or {}
-                triggered_rules.append(rule.name)
-                
-                # Handle validation errors
-                if rule.category == RuleCategoryEnum.VALIDATION.value and action.get('reason_message'):
-                    validation_errors.append(action['reason_message'])
-                
-                # Handle decisions
-                if action.get('decision') == "FAIL":
-                    stp_decision = "FAIL"
-                    reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                    stage_has_fail = True
-                
-                # Handle case type
-                if action.get('case_type') is not None:
-                    case_type = action['case_type']
-                
-                # Handle score impact
-                if action.get('score_impact') is not None:
-                    scorecard_value += action['score_impact']
-                
-                # Collect reason codes/messages
-                if action.get('reason_code'):
-                    reason_codes.append(action['reason_code'])
-                if action.get('reason_message'):
-                    reason_messages.append(action['reason_message'])
-                
-                # Hard stop handling
-                if action.get('is_hard_stop'):
-                    stp_decision = "FAIL"
-                    case_type = CaseTypeEnum.DIRECT_FAIL.value
-                    reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                    stage_has_fail = True
-                    should_stop_processing = True
-                    break
-        
-        stage_exec_time = (time.time() - stage_start) * 1000
-        
-        # Determine stage status
-        stage_status = "passed"
-        if stage_has_fail:
-            stage_status = "failed"
-            if stage.stop_on_fail:
-                should_stop_processing = True
-        
-        stage_trace.append(StageExecutionTrace(
-            stage_id=stage.id,
-            stage_name=stage.name,
-            execution_order=stage.execution_order,
-            status=stage_status,
-            rules_executed=stage_rule_trace,
-            triggered_rules_count=stage_triggered_count,
-            execution_time_ms=round(stage_exec_time, 2)
-        ))
-    
-    # Process unassigned rules (rules without a stage) - processed last
-    if not should_stop_processing:
-        unassigned_start = time.time()
-        unassigned_rules = [r for r in all_rules if r.stage_id is None]
-        unassigned_rules.sort(key=lambda r: r.priority)
-        
-        if unassigned_rules:
-            unassigned_rule_trace = []
-            unassigned_triggered_count = 0
-            unassigned_has_fail = False
-            
-            for rule in unassigned_rules:
-                rule_start = time.time()
-                rule_dict = model_to_dict(rule)
-                
-                if not rule_engine.is_rule_applicable(rule_dict, proposal.product_type.value, case_type):
-                    continue
-                
-                condition_group = rule.condition_group
-                triggered = rule_engine.evaluate_condition_group(condition_group, proposal_dict)
-                
-                input_vals = {}
-                for cond in condition_group.get('conditions', []):
-                    if isinstance(cond, dict) and 'field' in cond:
-                        input_vals[cond['field']] = rule_engine.get_field_value(proposal_dict, cond['field'])
-                
-                trace_entry = RuleExecutionTrace(
-                    rule_id=rule.id,
-                    rule_name=rule.name,
-                    category=rule.category,
-                    triggered=triggered,
-                    input_values=input_vals,
-                    condition_result=triggered,
-                    action_applied=rule.action if triggered else None,
-                    execution_time_ms=(time.time() - rule_start) * 1000
-                )
-                
-                unassigned_rule_trace.append(trace_entry)
-                rule_trace.append(trace_entry)
-                
-                if triggered:
-                    unassigned_triggered_count += 1
-                    action = rule.action or {}
-                    triggered_rules.append(rule.name)
-                    
-                    if rule.category == RuleCategoryEnum.VALIDATION.value and action.get('reason_message'):
-                        validation_errors.append(action['reason_message'])
-                    
-                    if action.get('decision') == "FAIL":
-                        stp_decision = "FAIL"
-                        reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                        unassigned_has_fail = True
-                    
-                    if action.get('case_type') is not None:
-                        case_type = action['case_type']
-                    
-                    if action.get('score_impact') is not None:
-                        scorecard_value += action['score_impact']
-                    
-                    if action.get('reason_code'):
-                        reason_codes.append(action['reason_code'])
-                    if action.get('reason_message'):
-                        reason_messages.append(action['reason_message'])
-                    
-                    if action.get('is_hard_stop'):
-                        stp_decision = "FAIL"
-                        case_type = CaseTypeEnum.DIRECT_FAIL.value
-                        reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                        break
-            
-            unassigned_exec_time = (time.time() - unassigned_start) * 1000
-            
-            stage_trace.append(StageExecutionTrace(
-                stage_id="unassigned",
-                stage_name="Unassigned Rules",
-                execution_order=999,
-                status="failed" if unassigned_has_fail else "passed",
-                rules_executed=unassigned_rule_trace,
-                triggered_rules_count=unassigned_triggered_count,
-                execution_time_ms=round(unassigned_exec_time, 2)
-            ))
-    
-    # Legacy: Scorecard Evaluation (if no stage rules affected score)
-    scorecards = db.query(ScorecardModel).filter(
-        ScorecardModel.product == proposal.product_type.value,
-        ScorecardModel.is_enabled
-    ).all()
-    
-    for scorecard in scorecards:
-        for param in scorecard.parameters or []:
-            field_value = rule_engine.get_field_value(proposal_dict, param.get('field', ''))
-            for band in param.get('bands', []):
-                min_val = band.get('min', float('-inf'))
-                max_val = band.get('max', float('inf'))
-                try:
-                    if min_val <= float(field_value) <= max_val:
-                        scorecard_value += int(band.get('score', 0) * param.get('weight', 1))
-                        break
-                except (ValueError, TypeError):
-                    pass
-        
-        if scorecard_value >= scorecard.threshold_direct_accept:
-            if case_type == CaseTypeEnum.NORMAL.value:
-                case_type = CaseTypeEnum.DIRECT_ACCEPT.value
-        elif scorecard_value < scorecard.threshold_refer:
-            case_type = CaseTypeEnum.GCRP.value
-    
-    # Legacy: Grid Evaluations
-    grids = db.query(GridModel).filter(GridModel.is_enabled).all()
-    
-    for grid in grids:
-        if grid.products and proposal.product_type.value not in grid.products:
-            continue
-        
-        row_value = str(rule_engine.get_field_value(proposal_dict, grid.row_field or ''))
-        col_value = str(rule_engine.get_field_value(proposal_dict, grid.col_field or ''))
-        
-        for cell in grid.cells or []:
-            if cell.get('row_value') == row_value and cell.get('col_value') == col_value:
-                if cell.get('result') == 'DECLINE':
-                    stp_decision = "FAIL"
-                    case_type = CaseTypeEnum.DIRECT_FAIL.value
-                    reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                    reason_messages.append(f"Grid {grid.name}: {row_value} × {col_value} = DECLINE")
-                elif cell.get('result') == 'REFER':
-                    case_type = CaseTypeEnum.GCRP.value
-                    reason_messages.append(f"Grid {grid.name}: {row_value} × {col_value} = REFER")
-                
-                if cell.get('score_impact'):
-                    scorecard_value += cell['score_impact']
-                break
-    
-    # Calculate Risk Loading
-    risk_loading = calculate_risk_loading(db, proposal)
-    
-    execution_time = (time.time() - start_time) * 1000
-    
-    result = EvaluationResult(
-        proposal_id=proposal.proposal_id,
-        stp_decision=stp_decision,
-        case_type=CaseTypeEnum(case_type),
-        case_type_label=get_case_type_label(case_type),
-        reason_flag=ReasonFlagEnum(reason_flag),
-        scorecard_value=scorecard_value,
-        triggered_rules=triggered_rules,
-        validation_errors=validation_errors,
-        reason_codes=list(set(reason_codes)),
-        reason_messages=list(set(reason_messages)),
-        rule_trace=rule_trace,
-        stage_trace=stage_trace,
-        risk_loading=risk_loading,
-        evaluation_time_ms=round(execution_time, 2),
-        evaluated_at=datetime.now(timezone.utc).isoformat()
-    )
-    
-    # Store evaluation
-    eval_model = EvaluationModel(
-        proposal_id=result.proposal_id,
-        stp_decision=result.stp_decision,
-        case_type=result.case_type.value,
-        case_type_label=result.case_type_label,
-        reason_flag=result.reason_flag.value,
-        scorecard_value=result.scorecard_value,
-        triggered_rules=result.triggered_rules,
-        validation_errors=result.validation_errors,
-        reason_codes=result.reason_codes,
-        reason_messages=result.reason_messages,
-        rule_trace=[t.model_dump() for t in result.rule_trace],
-        evaluation_time_ms=result.evaluation_time_ms,
-        evaluated_at=result.evaluated_at
-    )
-    db.add(eval_model)
-    db.commit()
-    
+def evaluation_result(proposal_id: str, data: Dict[str, Any], outcome, start_time: float) -> Dict[str, Any]:
+    """EvaluationResult-shaped dict of an evaluation pipeline outcome"""
+    stage_trace, rule_trace = outcome.trace_json(data)
+    return {
+        "proposal_id": proposal_id,
+        "stp_decision": outcome.stp_decision,
+        "case_type": outcome.case_type,
+        "case_type_label": get_case_type_label(outcome.case_type),
+        "reason_flag": outcome.reason_flag,
+        "scorecard_value": outcome.scorecard_value,
+        "triggered_rules": outcome.triggered_rules,
+        "validation_errors": outcome.validation_errors,
+        "reason_codes": list(set(outcome.reason_codes)),
+        "reason_messages": list(set(outcome.reason_messages)),
+        "rule_trace": rule_trace,
+        "stage_trace": stage_trace,
+        "risk_loading": outcome.risk_loading,
+        "evaluation_time_ms": round((time_module.time() - start_time) * 1000, 2),
+        "evaluated_at": datetime.now(timezone.utc).isoformat()
+    }
+
+# Result keys an amendment's diff compares
+AMEND_SCALAR_KEYS = ("stp_decision", "case_type", "reason_flag", "scorecard_value", "risk_loading")
+AMEND_LIST_KEYS = ("triggered_rules", "validation_errors", "reason_codes", "reason_messages")
+
+def evaluate_and_record(ruleset, proposal: ProposalData, trace: TraceLevel, start_time: float,
+                        state: Optional[EvaluationState] = None) -> Dict[str, Any]:
+    """Evaluate a proposal, queue its record and input, and keep its state for amendments"""
+    data = proposal.model_dump()
+    if state is None and evaluation_states.enabled:
+        state = EvaluationState(ruleset.version, proposal.product_type.value)
+    outcome = evaluate(ruleset, data, start_time, trace, outcome_cache, state)
+    result = evaluation_result(proposal.proposal_id, data, outcome, start_time)
+    proposal_json = proposal.model_dump(mode='json')
+    
+    # Store evaluation (written behind the response unless EVALUATION_WRITE_MODE=sync)
+    record = {key: result[key] for key in (
+        "proposal_id", "stp_decision", "case_type", "case_type_label", "reason_flag", "scorecard_value",
+        "triggered_rules", "validation_errors", "reason_codes", "reason_messages", "rule_trace",
+        "evaluation_time_ms", "evaluated_at"
+    )}
+    record["id"] = result["evaluation_id"] = str(uuid.uuid4())
+    record["input"] = {"proposal": proposal_json, "ruleset_version": ruleset.version, "risk_loading": result["risk_loading"]}
+    evaluation_writer.submit(record)
+    if state is not None:
+        summary = {key: result[key] for key in AMEND_SCALAR_KEYS + AMEND_LIST_KEYS}
+        evaluation_states.put(ruleset.version, 'evaluation', record["id"], (state, proposal_json, summary))
     return result
 
+@api_router.post("/underwriting/evaluate", response_model=EvaluationResult)
+def evaluate_proposal(proposal: ProposalData, trace: TraceLevel = TraceLevel.FULL, db: Session = Depends(get_db)):
+    """Evaluate one proposal; trace=summary keeps only stage outcomes and trace=none drops the trace"""
+    start_time = time_module.time()
+    result = evaluate_and_record(ruleset_cache.get(db), proposal, trace, start_time)
+    # result already has the EvaluationResult shape; returning a response skips
+    # re-validating every trace entry through the response model
+    return JSONResponse(content=result)
+
+def stored_evaluation(db: Session, evaluation_id: str) -> Tuple[None, Dict[str, Any], Dict[str, Any]]:
+    """(no state, proposal JSON, result summary) of a persisted evaluation"""
+    evaluation_input = db.query(EvaluationInputModel).filter(EvaluationInputModel.evaluation_id == evaluation_id).first()
+    evaluation = db.query(EvaluationModel).filter(EvaluationModel.id == evaluation_id).first()
+    if not evaluation_input or not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    summary = {key: getattr(evaluation, key) for key in AMEND_SCALAR_KEYS + AMEND_LIST_KEYS if key != "risk_loading"}
+    summary["risk_loading"] = evaluation_input.risk_loading
+    return None, evaluation_input.proposal, summary
+
+def evaluation_diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """What changed between two result summaries; list keys compare as sets"""
+    diff = {}
+    for key in AMEND_SCALAR_KEYS:
+        if before[key] != after[key]:
+            diff[key] = {"before": before[key], "after": after[key]}
+    for key in AMEND_LIST_KEYS:
+        added = [item for item in after[key] if item not in before[key]]
+        removed = [item for item in before[key] if item not in after[key]]
+        if added or removed:
+            diff[key] = {"added": added, "removed": removed}
+    return diff
+
+@api_router.post("/underwriting/amend", response_model=AmendResult)
+def amend_evaluation(request: AmendRequest, trace: TraceLevel = TraceLevel.FULL, db: Session = Depends(get_db)):
+    """Re-evaluate an evaluated proposal with some fields changed"""
+    start_time = time_module.time()
+    unknown = sorted(set(request.changes) - set(ProposalData.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown proposal fields: {', '.join(unknown)}")
+    ruleset = ruleset_cache.get(db)
+    prior = evaluation_states.get(ruleset.version, 'evaluation', request.evaluation_id)
+    state, before, summary = stored_evaluation(db, request.evaluation_id) if prior is MISS else prior
+    try:
+        proposal = ProposalData(**{**before, **request.changes})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json(include_url=False)))
+    after = proposal.model_dump(mode='json')
+    changed = {key for key in after if json.dumps(after[key], sort_keys=True) != json.dumps(before.get(key), sort_keys=True)}
+    
+    # Reuses what reads no changed field; the result equals evaluating the amended proposal from scratch
+    result = evaluate_and_record(ruleset, proposal, trace, start_time,
+                                 state.amended(ruleset, proposal.product_type.value, changed) if state is not None else None)
+    result["amended_from"] = request.evaluation_id
+    result["changes"] = {key: {"before": before.get(key), "after": after[key]} for key in sorted(changed)}
+    result["diff"] = evaluation_diff(summary, result)
+    return JSONResponse(content=result)
+
+# ==================== DECISION BOUNDARIES ====================
+# Numeric proposal field -> whether it holds integers
+NUMERIC_PROPOSAL_FIELDS = {
+    name: info.annotation in (int, Optional[int])
+    for name, info in ProposalData.model_fields.items()
+    if info.annotation in (int, float, Optional[int], Optional[float])
+}
+
+@api_router.post("/underwriting/boundaries", response_model=BoundarySearchResult)
+def search_decision_boundaries(request: BoundarySearchRequest, db: Session = Depends(get_db)):
+    """Decisions of a proposal as one numeric field moves through [low, high], as intervals"""
+    start_time = time_module.time()
+    integer = NUMERIC_PROPOSAL_FIELDS.get(request.field)
+    if integer is None:
+        raise HTTPException(status_code=400, detail=f"Not a numeric proposal field: {request.field}")
+    if not (math.isfinite(request.low) and math.isfinite(request.high)) or request.low > request.high:
+        raise HTTPException(status_code=400, detail="low and high must be finite, with low <= high")
+    ruleset = ruleset_cache.get(db)
+    product_type = request.proposal.product_type.value
+    data = request.proposal.model_dump()
+    state = EvaluationState(ruleset.version, product_type)
+    evaluate(ruleset, data, start_time, TraceLevel.NONE, None, state)
+    cache = OutcomeCache(outcome_cache.max_entries)
+    changed = {request.field}
+    evaluations = 0
+    
+    # Each sample amends the base state in the one field, so only what reads it is computed again
+    def decide(x):
+        nonlocal evaluations
+        evaluations += 1
+        outcome = evaluate(ruleset, {**data, request.field: x}, start_time, TraceLevel.NONE, cache,
+                           state.amended(ruleset, product_type, changed))
+        return outcome.stp_decision, outcome.case_type
+    
+    points, complete = field_breakpoints(ruleset.pipeline(product_type), request.field)
+    try:
+        intervals, exact = search_boundaries(decide, request.low, request.high, points, complete,
+                                             integer, request.tolerance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "proposal_id": request.proposal.proposal_id,
+        "field": request.field,
+        "exact": exact,
+        "evaluations": evaluations,
+        "intervals": [
+            {"low": low, "high": high, "low_inclusive": low_inclusive, "high_inclusive": high_inclusive,
+             "stp_decision": stp_decision, "case_type": case_type, "case_type_label": get_case_type_label(case_type)}
+            for (low, low_inclusive, high, high_inclusive), (stp_decision, case_type) in intervals
+        ],
+        "search_time_ms": round((time_module.time() - start_time) * 1000, 2)
+    }
+
 # ==================== AUDIT LOGS ====================
 @api_router.get("/audit-logs")
 def get_audit_logs(
@@ -2852,6 +2872,7 @@ def seed_sample_data(db: Session = Depends(get_db)):
         db.add(rb)
     
     db.commit()
+    ruleset_cache.bump()
     
     return {
         "message": "Sample data seeded successfully",
@@ -2865,9 +2886,9 @@ def seed_sample_data(db: Session = Depends(get_db)):
 
 # ==================== BULK EVALUATION ====================
 from fastapi import File, UploadFile
-from fastapi.responses import StreamingResponse
 import io
 import csv
+import itertools
 import time as time_module
 
 class BulkProposalResult(BaseModel):
@@ -2877,12 +2898,17 @@ class BulkProposalResult(BaseModel):
     case_type_label: str
     scorecard_value: int
     triggered_rules: List[str]
+    validation_errors: List[str] = []
+    reason_codes: List[str] = []
     reason_messages: List[str]
     base_premium: Optional[float] = None
     loaded_premium: Optional[float] = None
     loading_percentage: Optional[float] = None
     risk_score: Optional[int] = None
     evaluation_time_ms: float
+    # Only with trace=summary / trace=full on evaluate-batch
+    stage_trace: Optional[List[StageExecutionTrace]] = None
+    rule_trace: Optional[List[RuleExecutionTrace]] = None
 
 class BulkEvaluationResponse(BaseModel):
     total_proposals: int
@@ -2890,169 +2916,136 @@ class BulkEvaluationResponse(BaseModel):
     fail_count: int
     pass_rate: float
     total_time_ms: float
+    persist_time_ms: Optional[float] = None  # set when results were stored as evaluations
     parse_errors: List[str] = []
+    error: Optional[str] = None  # evaluate-csv only: why the stream ended before the input did
     results: List[BulkProposalResult]
 
-def evaluate_single_proposal_internal(proposal: ProposalData, db: Session) -> Dict:
-    """Internal function to evaluate a single proposal for batch processing"""
-    start_time = time_module.time()
-    
-    stp_decision = "PASS"
-    case_type = CaseTypeEnum.NORMAL.value
-    reason_flag = ReasonFlagEnum.STP_PASS_SKIP.value
-    scorecard_value = 0
-    triggered_rules = []
-    validation_errors = []
-    reason_codes = []
-    reason_messages = []
-    
-    proposal_dict = proposal.model_dump()
-    
-    # Get all stages ordered by execution_order
-    stages = db.query(RuleStageModel).filter(RuleStageModel.is_enabled).order_by(RuleStageModel.execution_order).all()
-    
-    # Get all enabled rules
-    all_rules = db.query(RuleModel).filter(RuleModel.is_enabled).all()
-    
-    should_stop_processing = False
-    
-    # Process each stage in order
-    for stage in stages:
-        if should_stop_processing:
-            continue
-        
-        stage_rules = [r for r in all_rules if r.stage_id == stage.id]
-        stage_rules.sort(key=lambda r: r.priority)
-        
-        stage_has_fail = False
-        
-        for rule in stage_rules:
-            rule_dict = model_to_dict(rule)
-            
-            if not rule_engine.is_rule_applicable(rule_dict, proposal.product_type.value, case_type):
-                continue
-            
-            condition_group = rule.condition_group
-            triggered = rule_engine.evaluate_condition_group(condition_group, proposal_dict)
-            
-            if triggered:
-                action = rule.action or {}
-                triggered_rules.append(rule.name)
-                
-                # Handle validation errors
-                if rule.category == RuleCategoryEnum.VALIDATION.value and action.get('reason_message'):
-                    validation_errors.append(action['reason_message'])
-                
-                # Handle decisions
-                if action.get('decision') == "FAIL":
-                    stp_decision = "FAIL"
-                    reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                    stage_has_fail = True
-                
-                # Handle case type
-                if action.get('case_type') is not None:
-                    case_type = action['case_type']
-                
-                # Handle score impact
-                if action.get('score_impact') is not None:
-                    scorecard_value += action['score_impact']
-                
-                # Collect reason codes/messages
-                if action.get('reason_code'):
-                    reason_codes.append(action['reason_code'])
-                if action.get('reason_message'):
-                    reason_messages.append(action['reason_message'])
-                
-                # Hard stop handling
-                if action.get('is_hard_stop'):
-                    stp_decision = "FAIL"
-                    case_type = CaseTypeEnum.DIRECT_FAIL.value
-                    reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                    stage_has_fail = True
-                    should_stop_processing = True
-                    break
-        
-        if stage_has_fail and stage.stop_on_fail:
-            should_stop_processing = True
-    
-    # Process unassigned rules
-    if not should_stop_processing:
-        unassigned_rules = [r for r in all_rules if r.stage_id is None]
-        unassigned_rules.sort(key=lambda r: r.priority)
-        
-        for rule in unassigned_rules:
-            rule_dict = model_to_dict(rule)
-            
-            if not rule_engine.is_rule_applicable(rule_dict, proposal.product_type.value, case_type):
-                continue
-            
-            condition_group = rule.condition_group
-            triggered = rule_engine.evaluate_condition_group(condition_group, proposal_dict)
-            
-            if triggered:
-                action = rule.action or {}
-                triggered_rules.append(rule.name)
-                
-                if rule.category == RuleCategoryEnum.VALIDATION.value and action.get('reason_message'):
-                    validation_errors.append(action['reason_message'])
-                
-                if action.get('decision') == "FAIL":
-                    stp_decision = "FAIL"
-                    reason_flag = ReasonFlagEnum.STP_FAIL_PRINT.value
-                
-                if action.get('case_type') is not None:
-                    case_type = action['case_type']
-                
-                if action.get('score_impact') is not None:
-                    scorecard_value += action['score_impact']
-                
-                if action.get('reason_code'):
-                    reason_codes.append(action['reason_code'])
-                if action.get('reason_message'):
-                    reason_messages.append(action['reason_message'])
-                
-                if action.get('is_hard_stop'):
-                    stp_decision = "FAIL"
-                    case_type = CaseTypeEnum.DIRECT_FAIL.value
-                    break
-    
-    # Calculate Risk Loading
-    risk_loading = calculate_risk_loading(db, proposal)
-    
-    execution_time = (time_module.time() - start_time) * 1000
-    
+# Bulk requests larger than one chunk are sharded across a process pool;
+# BULK_EVAL_WORKERS=1 evaluates everything in the request thread
+BULK_EVAL_WORKERS = int(os.environ.get('BULK_EVAL_WORKERS', os.cpu_count() or 1))
+BULK_EVAL_CHUNK_ROWS = int(os.environ.get('BULK_EVAL_CHUNK_ROWS', '5000'))
+
+parallel_evaluator = ParallelBatchEvaluator(BULK_EVAL_WORKERS, BULK_EVAL_CHUNK_ROWS)
+
+def chunk_rows(rows: List[Dict], size: int = BULK_EVAL_CHUNK_ROWS) -> Iterator[Tuple[None, List[Dict]]]:
+    for start in range(0, len(rows), size):
+        yield None, rows[start:start + size]
+
+def evaluate_bulk_chunks(ruleset: RulesetSnapshot, chunks: Iterable[Tuple[Any, List[Dict]]],
+                         key: Optional[str] = None) -> Iterator[Tuple[Any, List[Dict]]]:
+    """Evaluate (tag, proposal dicts) chunks in order, in-process or on the pool compiled once per key"""
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if second is None or not parallel_evaluator.enabled:
+        for tag, rows in itertools.chain([first], [] if second is None else [second], chunks):
+            yield tag, evaluate_columnar(ruleset.batch, rows, CASE_TYPE_LABELS)
+        return
+    yield from parallel_evaluator.map_chunks(
+        key or f"v{ruleset.version}", {**snapshot_tables(ruleset), "rules": list(ruleset.analysis.live_rules)},
+        CASE_TYPE_LABELS,
+        itertools.chain([first, second], chunks)
+    )
+
+BULK_PERSIST_CHUNK_ROWS = int(os.environ.get('BULK_PERSIST_CHUNK_ROWS', '1000'))
+
+def bulk_result_to_evaluation_record(result: Dict, evaluated_at: str) -> Dict:
+    """Map a BulkProposalResult dict to an EvaluationModel row"""
+    failed = result["stp_decision"] == "FAIL"
     return {
-        "proposal_id": proposal.proposal_id,
-        "stp_decision": stp_decision,
-        "case_type": case_type,
-        "case_type_label": get_case_type_label(case_type),
-        "scorecard_value": scorecard_value,
-        "triggered_rules": triggered_rules,
-        "reason_messages": list(set(reason_messages)),
-        "base_premium": risk_loading.base_premium,
-        "loaded_premium": risk_loading.loaded_premium,
-        "loading_percentage": risk_loading.total_loading_percentage,
-        "risk_score": risk_loading.total_risk_score,
-        "evaluation_time_ms": round(execution_time, 2)
+        "id": str(uuid.uuid4()),
+        "proposal_id": result["proposal_id"],
+        "stp_decision": result["stp_decision"],
+        "case_type": result["case_type"],
+        "case_type_label": result["case_type_label"],
+        "reason_flag": ReasonFlagEnum.STP_FAIL_PRINT.value if failed else ReasonFlagEnum.STP_PASS_SKIP.value,
+        "scorecard_value": result["scorecard_value"],
+        "triggered_rules": result["triggered_rules"],
+        "validation_errors": result["validation_errors"],
+        "reason_codes": result["reason_codes"],
+        "reason_messages": result["reason_messages"],
+        "rule_trace": result.get("rule_trace", []),
+        "evaluation_time_ms": result["evaluation_time_ms"],
+        "evaluated_at": evaluated_at
     }
 
-def parse_csv_line(line: str) -> List[str]:
-    """Parse a CSV line handling quoted fields"""
-    result = []
-    current = ""
-    in_quotes = False
-    
-    for c in line:
-        if c == '"':
-            in_quotes = not in_quotes
-        elif c == ',' and not in_quotes:
-            result.append(current.strip())
-            current = ""
-        else:
-            current += c
-    result.append(current.strip())
-    
-    return result
+def persist_bulk_results(results: List[Dict]) -> float:
+    """Store bulk results as evaluations, one transaction per chunk; returns elapsed ms"""
+    start_time = time_module.time()
+    evaluated_at = datetime.now(timezone.utc).isoformat()
+    for start in range(0, len(results), BULK_PERSIST_CHUNK_ROWS):
+        insert_evaluation_records([
+            bulk_result_to_evaluation_record(r, evaluated_at)
+            for r in results[start:start + BULK_PERSIST_CHUNK_ROWS]
+        ])
+    return (time_module.time() - start_time) * 1000
+
+def is_blank_csv_row(values: List[str]) -> bool:
+    return not values or (len(values) == 1 and not values[0].strip())
+
+def iter_csv_records(reader) -> Iterator[Tuple[int, List[str]]]:
+    """Non-blank CSV records with the line number each one ends on"""
+    for values in reader:
+        if not is_blank_csv_row(values):
+            yield reader.line_num, values
+
+def read_csv_proposals(reader, headers: List[str], parse_errors: List[str]) -> Iterator[List[ProposalData]]:
+    """Map CSV records to proposals, yielding them in chunks of BULK_EVAL_CHUNK_ROWS"""
+    chunk = []
+    for line_number, values in iter_csv_records(reader):
+        try:
+            chunk.append(map_csv_to_proposal(headers, values, line_number))
+        except Exception as e:
+            parse_errors.append(f"Line {line_number}: {str(e)}")
+            continue
+        if len(chunk) >= BULK_EVAL_CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stream_bulk_evaluation(ruleset: RulesetSnapshot, chunks: Iterable[List[ProposalData]],
+                           parse_errors: List[str], source, persist: bool = False) -> Iterator[str]:
+    """Evaluate proposal chunks as they are parsed and stream the JSON response, summary last"""
+    start_time = time_module.time()
+    persist_time = 0.0
+    total = 0
+    pass_count = 0
+    error = None
+    try:
+        yield '{"results":['
+        row_chunks = ((None, [p.model_dump() for p in chunk]) for chunk in chunks)
+        for _, results in evaluate_bulk_chunks(ruleset, row_chunks):
+            # A chunk is streamed only once it is persisted, so the summary never counts unstored rows
+            if persist:
+                persist_time += persist_bulk_results(results)
+            pass_count += sum(1 for r in results if r["stp_decision"] == "PASS")
+            body = ','.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) for r in results)
+            yield body if total == 0 else ',' + body
+            total += len(results)
+    except Exception as e:
+        # The status line went out with the first chunk; close the document with the error instead
+        logger.exception(f"Bulk evaluation stopped after {total} results")
+        error = str(e)
+    finally:
+        source.close()
+
+    total_time = (time_module.time() - start_time) * 1000 - persist_time
+    summary = {
+        "total_proposals": total,
+        "pass_count": pass_count,
+        "fail_count": total - pass_count,
+        "pass_rate": round((pass_count / total) * 100, 2) if total else 0,
+        "total_time_ms": round(total_time, 2),
+        "persist_time_ms": round(persist_time, 2) if persist else None,
+        "parse_errors": parse_errors
+    }
+    if error is not None:
+        summary["error"] = error
+    yield '],' + json.dumps(summary, ensure_ascii=False, separators=(',', ':'))[1:]
 
 def map_csv_to_proposal(headers: List[str], values: List[str], line_number: int) -> ProposalData:
     """Map CSV values to ProposalData"""
@@ -3135,58 +3128,39 @@ def map_csv_to_proposal(headers: List[str], values: List[str], line_number: int)
     return ProposalData(**proposal_dict)
 
 @api_router.post("/underwriting/evaluate-csv")
-async def evaluate_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Evaluate multiple proposals from a CSV file"""
+def evaluate_csv(file: UploadFile = File(...), persist: bool = False, db: Session = Depends(get_db)):
+    """Evaluate multiple proposals from a CSV file, streamed in chunks with no row limit"""
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
     
-    content = await file.read()
-    lines = content.decode('utf-8').strip().split('\n')
-    
-    if len(lines) < 2:
-        raise HTTPException(status_code=400, detail="CSV file must have at least a header and one data row")
+    # The form closes the upload when this handler returns, but the streamed
+    # response keeps reading it, so take ownership of the spooled file
+    upload, file.file = file.file, io.BytesIO()
+    upload.seek(0)
+    source = io.TextIOWrapper(upload, encoding='utf-8-sig', errors='replace', newline='')
+    reader = csv.reader(source, skipinitialspace=True)
     
-    headers = parse_csv_line(lines[0])
-    proposals = []
-    parse_errors = []
-    
-    for i, line in enumerate(lines[1:], start=2):
-        if not line.strip():
-            continue
-        try:
-            values = parse_csv_line(line)
-            proposal = map_csv_to_proposal(headers, values, i)
-            proposals.append(proposal)
-        except Exception as e:
-            parse_errors.append(f"Line {i}: {str(e)}")
-    
-    if not proposals:
+    try:
+        headers = next((values for values in reader if not is_blank_csv_row(values)), None)
+        parse_errors = []
+        chunks = read_csv_proposals(reader, headers or [], parse_errors)
+        first_chunk = next(chunks, None) if headers else None
+    except Exception:
+        source.close()
+        raise
+    
+    if first_chunk is None:
+        source.close()
+        if not parse_errors:
+            raise HTTPException(status_code=400, detail="CSV file must have at least a header and one data row")
         raise HTTPException(status_code=400, detail="No valid proposals found in CSV")
     
-    if len(proposals) > 1000:
-        raise HTTPException(status_code=400, detail="Maximum 1000 proposals per file")
-    
-    start_time = time_module.time()
-    results = []
-    pass_count = 0
-    
-    for proposal in proposals:
-        result = evaluate_single_proposal_internal(proposal, db)
-        results.append(result)
-        if result["stp_decision"] == "PASS":
-            pass_count += 1
-    
-    total_time = (time_module.time() - start_time) * 1000
-    
-    return {
-        "total_proposals": len(proposals),
-        "pass_count": pass_count,
-        "fail_count": len(proposals) - pass_count,
-        "pass_rate": round((pass_count / len(proposals)) * 100, 2),
-        "total_time_ms": round(total_time, 2),
-        "parse_errors": parse_errors,
-        "results": results
-    }
+    # Pin the ruleset version for the whole file
+    ruleset = ruleset_cache.get(db)
+    return StreamingResponse(
+        stream_bulk_evaluation(ruleset, itertools.chain([first_chunk], chunks), parse_errors, source, persist),
+        media_type="application/json"
+    )
 
 @api_router.get("/underwriting/csv-template")
 def get_csv_template():
@@ -3203,8 +3177,9 @@ def get_csv_template():
     )
 
 @api_router.post("/underwriting/evaluate-batch")
-def evaluate_batch(proposals: List[ProposalData], db: Session = Depends(get_db)):
-    """Evaluate multiple proposals from JSON array"""
+def evaluate_batch(proposals: List[ProposalData], persist: bool = False, trace: TraceLevel = TraceLevel.NONE,
+                   db: Session = Depends(get_db)):
+    """Evaluate multiple proposals from JSON array; persist=true also stores them as evaluations"""
     if not proposals:
         raise HTTPException(status_code=400, detail="No proposals provided")
     
@@ -3212,16 +3187,26 @@ def evaluate_batch(proposals: List[ProposalData], db: Session = Depends(get_db))
         raise HTTPException(status_code=400, detail="Maximum 1000 proposals per batch")
     
     start_time = time_module.time()
+    ruleset = ruleset_cache.get(db)
     results = []
-    pass_count = 0
-    
-    for proposal in proposals:
-        result = evaluate_single_proposal_internal(proposal, db)
-        results.append(result)
-        if result["stp_decision"] == "PASS":
-            pass_count += 1
+    if trace == TraceLevel.NONE:
+        for _, chunk_results in evaluate_bulk_chunks(ruleset, chunk_rows([p.model_dump() for p in proposals])):
+            results.extend(chunk_results)
+    else:
+        # Traces come from the single-proposal pipeline, one row at a time
+        for proposal in proposals:
+            row_start = time_module.time()
+            data = proposal.model_dump()
+            outcome = evaluate(ruleset, data, start_time, trace, outcome_cache)
+            result = to_bulk_result(data, outcome, CASE_TYPE_LABELS, round((time_module.time() - row_start) * 1000, 2))
+            result["stage_trace"], rule_trace = outcome.trace_json(data)
+            if trace == TraceLevel.FULL:
+                result["rule_trace"] = rule_trace
+            results.append(result)
+    pass_count = sum(1 for r in results if r["stp_decision"] == "PASS")
     
     total_time = (time_module.time() - start_time) * 1000
+    persist_time = persist_bulk_results(results) if persist else None
     
     return {
         "total_proposals": len(proposals),
@@ -3229,9 +3214,299 @@ def evaluate_batch(proposals: List[ProposalData], db: Session = Depends(get_db))
         "fail_count": len(proposals) - pass_count,
         "pass_rate": round((pass_count / len(proposals)) * 100, 2),
         "total_time_ms": round(total_time, 2),
+        "persist_time_ms": round(persist_time, 2) if persist else None,
         "results": results
     }
 
+# ==================== BULK EVALUATION JOBS ====================
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+
+JOB_DATA_DIR = Path(os.environ.get('JOB_DATA_DIR', ROOT_DIR / 'job_data'))
+JOB_STATUSES_RESUMABLE = ("failed", "cancelled")
+PARSE_ERROR_SAMPLE = 100
+
+bulk_job_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BULK_JOB_WORKERS', '2')), thread_name_prefix="bulk-job"
+)
+# Jobs with a worker in this process; a cancelled job stays here until its current chunk ends
+active_bulk_jobs = set()
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def job_to_response(job: BulkJobModel) -> Dict:
+    """Job status with progress and throughput; the pinned ruleset is omitted"""
+    result = model_to_dict(job)
+    for key in ("ruleset", "input_path"):
+        result.pop(key)
+    result["fail_count"] = job.result_count - job.pass_count
+    result["pass_rate"] = round((job.pass_count / job.result_count) * 100, 2) if job.result_count else 0
+    result["progress_pct"] = round((job.rows_processed / job.total_rows) * 100, 2) if job.total_rows else None
+    result["rows_per_second"] = round(job.rows_processed / (job.processing_time_ms / 1000), 1) if job.processing_time_ms else 0
+    return result
+
+@contextmanager
+def open_job_input(job: BulkJobModel):
+    """Yield ((line_number, record) iterator, to_proposal) for a job's stored input"""
+    with open(job.input_path, encoding='utf-8-sig', errors='replace', newline='') as f:
+        if job.source == "csv":
+            reader = csv.reader(f, skipinitialspace=True)
+            headers = next((values for values in reader if not is_blank_csv_row(values)), [])
+            yield iter_csv_records(reader), lambda line_number, values: map_csv_to_proposal(headers, values, line_number)
+        else:
+            # Batch jobs are stored as one validated ProposalData JSON document per line
+            yield ((i, line) for i, line in enumerate(f, start=1)), lambda line_number, line: ProposalData.model_validate_json(line)
+
+def create_bulk_job(db: Session, source: str, filename: Optional[str], write_input, persist: bool = False) -> BulkJobModel:
+    """Store the job input, pin the current ruleset and queue the job"""
+    ruleset = ruleset_cache.get(db)
+    job_id = str(uuid.uuid4())
+    JOB_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    input_path = JOB_DATA_DIR / f"{job_id}.{'csv' if source == 'csv' else 'jsonl'}"
+    total_rows = write_input(input_path)
+    
+    job = BulkJobModel(
+        id=job_id,
+        source=source,
+        filename=filename,
+        status="queued",
+        input_path=str(input_path),
+        ruleset_version=ruleset.version,
+        ruleset=snapshot_tables(ruleset),
+        total_rows=total_rows,
+        persist=persist,
+        parse_error_count=0,
+        parse_errors=[]
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    bulk_job_executor.submit(run_bulk_job, job_id)
+    return job
+
+def run_bulk_job(job_id: str):
+    """Evaluate a job's input from its checkpoint, committing results chunk by chunk"""
+    db = SessionLocal()
+    # Claim the job so a duplicate submit or resume cannot run it twice
+    claimed = db.query(BulkJobModel).filter(
+        BulkJobModel.id == job_id, BulkJobModel.status == "queued"
+    ).update({"status": "running", "updated_at": utc_now()})
+    db.commit()
+    if not claimed:
+        db.close()
+        return
+    active_bulk_jobs.add(job_id)
+    try:
+        job = db.query(BulkJobModel).filter(BulkJobModel.id == job_id).first()
+        if job.started_at is None:
+            job.started_at = utc_now()
+        
+        ruleset = build_ruleset_snapshot(job.ruleset_version, **job.ruleset)
+        if job.total_rows is None:
+            with open_job_input(job) as (records, _):
+                job.total_rows = sum(1 for _ in records)
+        db.commit()
+        
+        with open_job_input(job) as (records, to_proposal):
+            records = itertools.islice(records, job.rows_processed, None)
+            
+            def parsed_chunks():
+                while True:
+                    chunk = list(itertools.islice(records, BULK_EVAL_CHUNK_ROWS))
+                    if not chunk:
+                        return
+                    proposals = []
+                    parse_errors = []
+                    for line_number, record in chunk:
+                        try:
+                            proposals.append(to_proposal(line_number, record))
+                        except Exception as e:
+                            parse_errors.append(f"Line {line_number}: {str(e)}")
+                    yield (len(chunk), parse_errors), [p.model_dump() for p in proposals]
+            
+            chunk_start = time_module.time()
+            for (consumed, parse_errors), results in evaluate_bulk_chunks(ruleset, parsed_chunks(), key=f"job:{job_id}"):
+                db.refresh(job)
+                if job.status != "running":
+                    logger.info(f"Bulk job {job_id} stopped at row {job.rows_processed} ({job.status})")
+                    return
+                if results:
+                    db.execute(BulkJobResultModel.__table__.insert(), [
+                        {"job_id": job_id, "row_index": job.result_count + i, "result": r}
+                        for i, r in enumerate(results)
+                    ])
+                    if job.persist:
+                        # Same transaction as the checkpoint, so a resumed job never stores a row twice
+                        evaluated_at = utc_now()
+                        db.execute(EvaluationModel.__table__.insert(), [
+                            bulk_result_to_evaluation_record(r, evaluated_at) for r in results
+                        ])
+                
+                # Committed with the chunk's results, so an interrupted job resumes exactly after it
+                job.rows_processed += consumed
+                job.result_count += len(results)
+                job.pass_count += sum(1 for r in results if r["stp_decision"] == "PASS")
+                if parse_errors:
+                    job.parse_error_count += len(parse_errors)
+                    # Only a capped sample is kept, so the row stops growing once it is full
+                    room = PARSE_ERROR_SAMPLE - len(job.parse_errors or [])
+                    if room > 0:
+                        job.parse_errors = (job.parse_errors or []) + parse_errors[:room]
+                chunk_end = time_module.time()
+                job.processing_time_ms += (chunk_end - chunk_start) * 1000
+                chunk_start = chunk_end
+                job.updated_at = utc_now()
+                db.commit()
+        
+        # Conditional like the claim, so a cancel committed after the last chunk stands
+        completed_at = utc_now()
+        completed = db.query(BulkJobModel).filter(
+            BulkJobModel.id == job_id, BulkJobModel.status == "running"
+        ).update({"status": "completed", "completed_at": completed_at, "updated_at": completed_at})
+        db.commit()
+        if not completed:
+            db.refresh(job)
+            logger.info(f"Bulk job {job_id} finished all rows but was {job.status} first")
+            return
+        Path(job.input_path).unlink(missing_ok=True)
+        logger.info(f"Bulk job {job_id} completed: {job.result_count} results, {job.parse_error_count} parse errors")
+    except Exception as e:
+        logger.exception(f"Bulk job {job_id} failed")
+        db.rollback()
+        db.query(BulkJobModel).filter(BulkJobModel.id == job_id, BulkJobModel.status == "running").update(
+            {"status": "failed", "error": str(e), "updated_at": utc_now()}
+        )
+        db.commit()
+    finally:
+        active_bulk_jobs.discard(job_id)
+        db.close()
+
+def resume_pending_jobs():
+    """Requeue jobs that were queued or running when the server last stopped"""
+    db = SessionLocal()
+    try:
+        jobs = db.query(BulkJobModel).filter(BulkJobModel.status.in_(["queued", "running"])).all()
+        for job in jobs:
+            job.status = "queued"
+        db.commit()
+        for job in jobs:
+            logger.info(f"Resuming bulk job {job.id} from row {job.rows_processed}")
+            bulk_job_executor.submit(run_bulk_job, job.id)
+    finally:
+        db.close()
+
+def get_job_or_404(db: Session, job_id: str) -> BulkJobModel:
+    job = db.query(BulkJobModel).filter(BulkJobModel.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.post("/underwriting/jobs/evaluate-csv", status_code=202)
+def submit_csv_job(file: UploadFile = File(...), persist: bool = False, db: Session = Depends(get_db)):
+    """Queue a CSV file for background evaluation"""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+    
+    def write_input(path: Path) -> Optional[int]:
+        file.file.seek(0)
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(file.file, out)
+        return None  # counted by the worker
+    
+    return job_to_response(create_bulk_job(db, "csv", file.filename, write_input, persist))
+
+@api_router.post("/underwriting/jobs/evaluate-batch", status_code=202)
+def submit_batch_job(proposals: List[ProposalData], persist: bool = False, db: Session = Depends(get_db)):
+    """Queue a JSON array of proposals for background evaluation"""
+    if not proposals:
+        raise HTTPException(status_code=400, detail="No proposals provided")
+    
+    def write_input(path: Path) -> int:
+        with open(path, 'w', encoding='utf-8') as out:
+            for proposal in proposals:
+                out.write(proposal.model_dump_json() + "\n")
+        return len(proposals)
+    
+    return job_to_response(create_bulk_job(db, "batch", None, write_input, persist))
+
+@api_router.get("/underwriting/jobs")
+def list_jobs(
+    status: Optional[str] = None,
+    limit: int = Query(default=50, le=500),
+    db: Session = Depends(get_db)
+):
+    query = db.query(BulkJobModel)
+    if status:
+        query = query.filter(BulkJobModel.status == status)
+    jobs = query.order_by(BulkJobModel.created_at.desc()).limit(limit).all()
+    return [job_to_response(job) for job in jobs]
+
+@api_router.get("/underwriting/jobs/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    return job_to_response(get_job_or_404(db, job_id))
+
+@api_router.get("/underwriting/jobs/{job_id}/results")
+def get_job_results(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Page through a job's results in input order; committed chunks are readable while it runs"""
+    job = get_job_or_404(db, job_id)
+    rows = db.query(BulkJobResultModel.result).filter(
+        BulkJobResultModel.job_id == job_id,
+        BulkJobResultModel.row_index >= offset,
+        BulkJobResultModel.row_index < offset + limit
+    ).order_by(BulkJobResultModel.row_index).all()
+    return {
+        "job_id": job_id,
+        "status": job.status,
+        "ruleset_version": job.ruleset_version,
+        "total": job.result_count,
+        "offset": offset,
+        "limit": limit,
+        "results": [row.result for row in rows]
+    }
+
+@api_router.post("/underwriting/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    """Stop a job after its current chunk; it can be resumed later"""
+    job = get_job_or_404(db, job_id)
+    if job.status not in ("queued", "running"):
+        raise HTTPException(status_code=400, detail=f"Job is {job.status}")
+    job.status = "cancelled"
+    job.updated_at = utc_now()
+    db.commit()
+    return job_to_response(job)
+
+@api_router.post("/underwriting/jobs/{job_id}/resume")
+def resume_job(job_id: str, db: Session = Depends(get_db)):
+    """Continue a failed or cancelled job from its last committed checkpoint"""
+    job = get_job_or_404(db, job_id)
+    if job.status not in JOB_STATUSES_RESUMABLE:
+        raise HTTPException(status_code=400, detail=f"Job is {job.status}")
+    if job_id in active_bulk_jobs:
+        raise HTTPException(status_code=409, detail="Job is still finishing its current chunk")
+    job.status = "queued"
+    job.error = None
+    job.updated_at = utc_now()
+    db.commit()
+    bulk_job_executor.submit(run_bulk_job, job_id)
+    return job_to_response(job)
+
+@api_router.delete("/underwriting/jobs/{job_id}")
+def delete_job(job_id: str, db: Session = Depends(get_db)):
+    job = get_job_or_404(db, job_id)
+    if job.status in ("queued", "running"):
+        raise HTTPException(status_code=400, detail="Cancel the job before deleting it")
+    db.query(BulkJobResultModel).filter(BulkJobResultModel.job_id == job_id).delete()
+    Path(job.input_path).unlink(missing_ok=True)
+    db.delete(job)
+    db.commit()
+    return {"message": "Job deleted"}
+
 # Include the router
 app.include_router(api_router)
 
@@ -3248,3 +3523,9 @@ app.add_middleware(
 def startup_event():
     init_db()
     logger.info("Database tables created/verified")
+    resume_pending_jobs()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    evaluation_writer.close()
+    parallel_evaluator.shutdown()
@@ -0,0 +1,100 @@
+"""Memoized rule stage and risk-loading outcomes
+
+Which rules of a stage trigger, in which order, depends only on the values of
+the fields the stage's rules read and on the case type the stage starts with
+(rules with case_types apply by the current case type). Risk loading depends
+only on the fields its bands read and the premium. Quotes and resubmissions
+evaluate the same values over and over, so evaluation keeps those outcomes in
+a bounded LRU keyed on the ruleset version and that projection of the
+proposal; a stage seen before is replayed from the rules that triggered (see
+evaluation.apply_rules) instead of being walked.
+
+Projection values are keyed with their type, and floats by repr, so values
+that compare equal but that some operator tells apart (1, 1.0 and True;
+0.0 and -0.0) never share an entry. A proposal whose projection holds an
+unhashable value (a list, a dict) is evaluated without the cache.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from fields import compile_field_accessor
+
+MISS = object()
+
+
+def _value_key(value: Any) -> Any:
+    if value.__class__ is float:
+        return float, repr(value)
+    return value.__class__, value
+
+
+class Projection:
+    """The values of a fixed set of fields, as a cache key"""
+    __slots__ = ('fields', '_getters')
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(dict.fromkeys(fields))
+        self._getters = tuple(compile_field_accessor(field) for field in self.fields)
+
+    def key(self, data: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """The proposal's projection, or None if a value is unhashable"""
+        key = tuple(_value_key(get(data)) for get in self._getters)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+
+class OutcomeCache:
+    """Bounded LRU of outcomes computed with one ruleset version.
+
+    Entries of older versions are never returned; the first entry stored for
+    a newer version drops them all.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._version: Optional[int] = None
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, version: int, kind: str, key: Hashable) -> Any:
+        """The value stored for (kind, key) under version, or MISS"""
+        with self._lock:
+            value = self._entries.get((kind, key), MISS) if version == self._version else MISS
+            if value is MISS:
+                self.misses[kind] = self.misses.get(kind, 0) + 1
+            else:
+                self._entries.move_to_end((kind, key))
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+            return value
+
+    def put(self, version: int, kind: str, key: Hashable, value: Any):
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._entries.clear()
+                self._version = version
+            elif version < self._version:
+                return
+            self._entries[(kind, key)] = value
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses)
+            }
@@ -0,0 +1,47 @@
+"""
+Shared fixtures for the API tests
+Fixtures: a proposal factory and the decision projection used to compare evaluation results
+"""
+import pytest
+import uuid
+
+
+@pytest.fixture
+def make_proposal():
+    """Factory for a valid endowment proposal; make_proposal(prefix, **fields) overrides any field"""
+    def make(prefix="TEST", **fields):
+        proposal = {
+            "proposal_id": f"{prefix}_{uuid.uuid4().hex[:8]}",
+            "product_code": "END001",
+            "product_type": "endowment",
+            "applicant_age": 35,
+            "applicant_gender": "M",
+            "applicant_income": 1200000,
+            "sum_assured": 2000000,
+            "premium": 10000
+        }
+        proposal.update(fields)
+        return proposal
+    return make
+
+
+@pytest.fixture
+def decision():
+    """Projection of a single or bulk evaluation result onto the fields both must agree on"""
+    def project(result):
+        loading = result.get('risk_loading')
+        if loading is not None:
+            loading = (loading['total_loading_percentage'], loading['total_risk_score'], loading['loaded_premium'])
+        else:
+            loading = (result.get('loading_percentage'), result.get('risk_score'), result.get('loaded_premium'))
+        return {
+            "stp_decision": result['stp_decision'],
+            "case_type": result['case_type'],
+            "scorecard_value": result['scorecard_value'],
+            "triggered_rules": result['triggered_rules'],
+            "validation_errors": result['validation_errors'],
+            "reason_codes": sorted(result['reason_codes']),
+            "reason_messages": sorted(result['reason_messages']),
+            "risk_loading": loading
+        }
+    return project
@@ -0,0 +1,72 @@
+"""
+Tests for amending an evaluated proposal
+Tests: amended result equals a full evaluation, diff against the prior result, chained amendments,
+unknown evaluations and fields
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestAmend:
+    """Tests for POST /api/underwriting/amend"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda: make_proposal("TEST_AM", applicant_age=38, applicant_gender="F", applicant_income=1500000,
+                                                   sum_assured=3000000, premium=12000, bmi=23.5)
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def amend(self, evaluation_id, changes):
+        return requests.post(f"{BASE_URL}/api/underwriting/amend",
+                             json={"evaluation_id": evaluation_id, "changes": changes})
+
+    def test_amend_matches_full_evaluation(self, decision):
+        """Test that an amendment gives the full evaluation's result and a diff against the prior one"""
+        name = f"TEST_AM {uuid.uuid4().hex[:6]}"
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": name,
+            "category": "stp_decision",
+            "condition_group": {"logical_operator": "AND", "conditions": [
+                {"field": "bmi", "operator": "greater_than", "value": 30}
+            ]},
+            "action": {"decision": "FAIL", "reason_code": "TEST_AM_BMI"},
+            "priority": 1,
+            "products": ["endowment"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+
+        proposal = self.make_proposal()
+        prior = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal).json()
+        assert name not in prior['triggered_rules']
+
+        response = self.amend(prior['evaluation_id'], {"bmi": 32})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        amended = response.json()
+        full = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json={**proposal, "bmi": 32}).json()
+        assert decision(amended) == decision(full)
+        assert amended['amended_from'] == prior['evaluation_id']
+        assert amended['changes'] == {"bmi": {"before": 23.5, "after": 32.0}}
+        assert name in amended['diff']['triggered_rules']['added']
+        assert "TEST_AM_BMI" in amended['diff']['reason_codes']['added']
+
+        response = self.amend(amended['evaluation_id'], {"bmi": 23.5, "applicant_age": 38})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        reverted = response.json()
+        assert decision(reverted) == decision(prior)
+        assert list(reverted['changes']) == ["bmi"]
+        assert name in reverted['diff']['triggered_rules']['removed']
+
+    def test_invalid_amendments(self):
+        """Test unknown evaluations, unknown fields and invalid values"""
+        assert self.amend(str(uuid.uuid4()), {"bmi": 30}).status_code == 404
+        prior = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=self.make_proposal()).json()
+        assert self.amend(prior['evaluation_id'], {"no_such_field": 1}).status_code == 400
+        assert self.amend(prior['evaluation_id'], {"applicant_age": "old"}).status_code == 422
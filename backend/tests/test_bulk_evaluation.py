@@ -6,6 +6,8 @@ import pytest
 import requests
 import os
 import tempfile
+import time
+import uuid
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
@@ -178,10 +180,141 @@ TEST_SMOKER_001,term_pure,40,M,1000000,5000000,30000,25,low,true,20,15,false,,,"
             assert result['loaded_premium'] > result['base_premium'], "Loaded premium should be higher than base"
             
             print(f"Smoker evaluation: base={result['base_premium']}, loaded={result['loaded_premium']}, loading={result['loading_percentage']}%")
-            
+
         finally:
             os.unlink(temp_path)
 
+    def test_evaluate_csv_large_file(self):
+        """Test that files above the old 1000-row cap are evaluated in full, in order"""
+        rows = ["proposal_id,product_type,applicant_age,applicant_gender,applicant_income,sum_assured,premium,bmi,is_smoker"]
+        for i in range(12000):
+            rows.append(f"TEST_BIG_{i},term_pure,{20 + i % 40},M,1000000,5000000,20000,{22 + i % 12},{'true' if i % 7 == 0 else 'false'}")
+
+        response = requests.post(
+            f"{BASE_URL}/api/underwriting/evaluate-csv",
+            files={'file': ('big.csv', "\n".join(rows).encode(), 'text/csv')}
+        )
+
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        data = response.json()
+        assert data['total_proposals'] == 12000
+        assert data['pass_count'] + data['fail_count'] == 12000
+        assert [r['proposal_id'] for r in data['results']] == [f"TEST_BIG_{i}" for i in range(12000)]
+        print(f"Evaluated 12000 rows in {data['total_time_ms']}ms")
+
+    def test_evaluate_csv_quoted_fields(self):
+        """Test quoted fields containing commas and newlines, and per-line parse errors"""
+        csv_content = (
+            'proposal_id,product_type,applicant_age,ailment_details,premium\r\n'
+            'TEST_QUOTED_001,term_pure,35,"asthma, mild\nsince 2010",20000\r\n'
+            'TEST_QUOTED_002,term_pure,not-a-number,,20000\r\n'
+        )
+
+        response = requests.post(
+            f"{BASE_URL}/api/underwriting/evaluate-csv",
+            files={'file': ('quoted.csv', csv_content.encode(), 'text/csv')}
+        )
+
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        data = response.json()
+        assert data['total_proposals'] == 1
+        assert data['results'][0]['proposal_id'] == 'TEST_QUOTED_001'
+        assert len(data['parse_errors']) == 1 and data['parse_errors'][0].startswith('Line 4:')
+
+
+class TestBulkPersistence:
+    """Tests for persist=true on POST /api/underwriting/evaluate-batch and evaluate-csv"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda proposal_id: make_proposal(
+            proposal_id=proposal_id, product_code="TERM001", product_type="term_pure", sum_assured=5000000, premium=25000
+        )
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def stored_decisions(self):
+        evaluations = requests.get(f"{BASE_URL}/api/evaluations", params={"limit": 500}).json()
+        return {e['proposal_id']: e['stp_decision'] for e in evaluations}
+
+    def test_batch_not_persisted_by_default(self):
+        """Test that bulk results are not stored unless requested"""
+        proposal_id = f"TEST_NOPERSIST_{uuid.uuid4().hex[:8]}"
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=[self.make_proposal(proposal_id)])
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert response.json()['persist_time_ms'] is None
+        assert proposal_id not in self.stored_decisions()
+
+    def test_batch_persisted(self):
+        """Test that persist=true stores every result and reports persistence time separately"""
+        ids = [f"TEST_PERSIST_{uuid.uuid4().hex[:8]}" for _ in range(5)]
+        response = requests.post(
+            f"{BASE_URL}/api/underwriting/evaluate-batch",
+            params={"persist": "true"},
+            json=[self.make_proposal(i) for i in ids]
+        )
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        data = response.json()
+        assert data['persist_time_ms'] >= 0
+
+        stored = self.stored_decisions()
+        for result in data['results']:
+            assert stored[result['proposal_id']] == result['stp_decision']
+
+    def test_csv_persisted(self):
+        """Test that persist=true stores CSV results"""
+        proposal_id = f"TEST_PERSIST_CSV_{uuid.uuid4().hex[:8]}"
+        csv_content = f"proposal_id,product_type,applicant_age,premium\n{proposal_id},term_pure,35,20000\n"
+        response = requests.post(
+            f"{BASE_URL}/api/underwriting/evaluate-csv",
+            params={"persist": "true"},
+            files={'file': ('persist.csv', csv_content.encode(), 'text/csv')}
+        )
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert response.json()['persist_time_ms'] >= 0
+        assert proposal_id in self.stored_decisions()
+
+    def test_batch_row_matches_single_evaluation(self):
+        """Test that a persisted bulk FAIL row stores the same reasons as a single evaluation"""
+        name = f"TEST_PERSIST {uuid.uuid4().hex[:6]}"
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": name,
+            "category": "validation",
+            "condition_group": {"logical_operator": "AND", "conditions": [
+                {"field": "applicant_age", "operator": "equals", "value": 77}
+            ]},
+            "action": {"decision": "FAIL", "reason_code": "TEST_PERSIST_AGE", "reason_message": "Age 77 needs review"},
+            "priority": 1,
+            "products": ["term_pure"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+
+        batch_id, single_id = (f"TEST_PERSIST_{uuid.uuid4().hex[:8]}" for _ in range(2))
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", params={"persist": "true"},
+                                 json=[{**self.make_proposal(batch_id), "applicant_age": 77}])
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate",
+                                 json={**self.make_proposal(single_id), "applicant_age": 77})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            stored = {e['proposal_id']: e for e in requests.get(f"{BASE_URL}/api/evaluations", params={"limit": 500}).json()}
+            if {batch_id, single_id} <= stored.keys():
+                break
+            time.sleep(0.1)
+        batch_row, single_row = stored[batch_id], stored[single_id]
+        assert batch_row['stp_decision'] == "FAIL"
+        assert "TEST_PERSIST_AGE" in batch_row['reason_codes']
+        assert "Age 77 needs review" in batch_row['validation_errors']
+        for key in ('stp_decision', 'case_type', 'reason_flag', 'scorecard_value', 'triggered_rules', 'validation_errors'):
+            assert batch_row[key] == single_row[key], key
+        for key in ('reason_codes', 'reason_messages'):
+            assert sorted(batch_row[key]) == sorted(single_row[key]), key
+
 
 class TestExistingEndpoints:
     """Test existing endpoints for pages (Dashboard, Rules, Stages, Risk Bands)"""
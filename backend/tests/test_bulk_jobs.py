@@ -0,0 +1,155 @@
+"""
+Tests for background bulk evaluation jobs
+Tests: submit, progress, result paging, pinned ruleset version, cancel and resume
+"""
+import requests
+import os
+import time
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def wait_for_job(job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"{BASE_URL}/api/underwriting/jobs/{job_id}").json()
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def fetch_all_results(job_id, page_size=1000):
+    results = []
+    while True:
+        page = requests.get(
+            f"{BASE_URL}/api/underwriting/jobs/{job_id}/results",
+            params={"offset": len(results), "limit": page_size}
+        ).json()
+        results.extend(page['results'])
+        if len(page['results']) < page_size:
+            return results
+
+
+class TestBulkJobs:
+    """Tests for /api/underwriting/jobs"""
+
+    def test_batch_job_matches_synchronous_evaluation(self, make_proposal):
+        """Test that a batch job's paged results equal evaluate-batch"""
+        proposals = [
+            make_proposal("TEST_JOB", product_code="TERM001", product_type="term_pure", applicant_age=20 + i % 40,
+                          sum_assured=5000000, premium=20000, bmi=20 + i % 15, is_smoker=i % 5 == 0)
+            for i in range(500)
+        ]
+        response = requests.post(f"{BASE_URL}/api/underwriting/jobs/evaluate-batch", json=proposals)
+        assert response.status_code == 202, f"Expected 202, got {response.status_code}"
+        job = response.json()
+        assert job['status'] == 'queued' and job['total_rows'] == 500
+
+        job = wait_for_job(job['id'])
+        assert job['status'] == 'completed', job.get('error')
+        assert job['rows_processed'] == job['result_count'] == 500
+        assert job['progress_pct'] == 100
+
+        expected = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=proposals).json()
+        strip = lambda r: {k: v for k, v in r.items() if k != 'evaluation_time_ms'}
+        assert [strip(r) for r in fetch_all_results(job['id'], 120)] == [strip(r) for r in expected['results']]
+        assert job['pass_count'] == expected['pass_count']
+
+        requests.delete(f"{BASE_URL}/api/underwriting/jobs/{job['id']}")
+
+    def test_csv_job_reports_parse_errors(self):
+        """Test that a CSV job evaluates valid rows and records invalid ones"""
+        csv_content = "proposal_id,product_type,applicant_age,premium\nTEST_JOB_CSV_1,term_pure,35,20000\nTEST_JOB_CSV_2,term_pure,abc,20000\n"
+        response = requests.post(
+            f"{BASE_URL}/api/underwriting/jobs/evaluate-csv",
+            files={'file': ('job.csv', csv_content.encode(), 'text/csv')}
+        )
+        assert response.status_code == 202, f"Expected 202, got {response.status_code}"
+
+        job = wait_for_job(response.json()['id'])
+        assert job['status'] == 'completed'
+        assert job['total_rows'] == 2 and job['result_count'] == 1
+        assert job['parse_error_count'] == 1 and job['parse_errors'][0].startswith('Line 3:')
+
+        requests.delete(f"{BASE_URL}/api/underwriting/jobs/{job['id']}")
+
+    def test_parse_errors_are_counted_past_the_sample(self):
+        """Test that bad rows across chunks are all counted while only the first 100 messages are kept"""
+        rows = ["proposal_id,product_type,applicant_age,premium"] + [
+            f"TEST_JOB_BAD_{i},term_pure,{'abc' if i % 50 == 0 else 35},20000" for i in range(12000)
+        ]
+        response = requests.post(
+            f"{BASE_URL}/api/underwriting/jobs/evaluate-csv",
+            files={'file': ('bad.csv', "\n".join(rows).encode(), 'text/csv')}
+        )
+        assert response.status_code == 202, f"Expected 202, got {response.status_code}"
+
+        job = wait_for_job(response.json()['id'])
+        assert job['status'] == 'completed'
+        assert job['parse_error_count'] == 240 and job['result_count'] == 11760
+        assert len(job['parse_errors']) == 100 and job['parse_errors'][0].startswith('Line 2:')
+
+        requests.delete(f"{BASE_URL}/api/underwriting/jobs/{job['id']}")
+
+    def test_job_pins_ruleset_version(self):
+        """Test that a rule created after submission does not affect a queued job"""
+        marker = uuid.uuid4().hex
+        version = requests.get(f"{BASE_URL}/api/ruleset/version").json()['version']
+        rows = ["proposal_id,product_type,applicant_age,premium"] + [f"TEST_PIN_{i},term_pure,35,20000" for i in range(20000)]
+        job = requests.post(
+            f"{BASE_URL}/api/underwriting/jobs/evaluate-csv",
+            files={'file': ('pin.csv', "\n".join(rows).encode(), 'text/csv')}
+        ).json()
+        assert job['ruleset_version'] == version
+
+        rule = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": f"TEST_JobPin_{marker[:8]}",
+            "category": "stp_decision",
+            "condition_group": {"logical_operator": "AND", "conditions": [
+                {"field": "proposal_id", "operator": "starts_with", "value": "TEST_PIN_"}
+            ]},
+            "action": {"decision": "FAIL", "reason_message": marker},
+            "priority": 1
+        }).json()
+        try:
+            job = wait_for_job(job['id'])
+            assert job['status'] == 'completed'
+            assert all(marker not in r['reason_messages'] for r in fetch_all_results(job['id']))
+        finally:
+            requests.delete(f"{BASE_URL}/api/rules/{rule['id']}")
+            requests.delete(f"{BASE_URL}/api/underwriting/jobs/{job['id']}")
+
+    def test_cancel_and_resume(self):
+        """Test that a cancelled job resumes from its checkpoint without gaps or duplicates"""
+        rows = ["proposal_id,product_type,applicant_age,premium"] + [f"TEST_RESUME_{i},term_pure,{20 + i % 40},20000" for i in range(30000)]
+        job = requests.post(
+            f"{BASE_URL}/api/underwriting/jobs/evaluate-csv",
+            files={'file': ('resume.csv', "\n".join(rows).encode(), 'text/csv')}
+        ).json()
+
+        response = requests.post(f"{BASE_URL}/api/underwriting/jobs/{job['id']}/cancel")
+        if response.status_code == 200:
+            job = wait_for_job(job['id'])
+            assert job['status'] == 'cancelled'
+            while True:
+                response = requests.post(f"{BASE_URL}/api/underwriting/jobs/{job['id']}/resume")
+                if response.status_code != 409:
+                    break
+                time.sleep(0.1)
+            assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+
+        job = wait_for_job(job['id'])
+        assert job['status'] == 'completed'
+        results = fetch_all_results(job['id'])
+        assert [r['proposal_id'] for r in results] == [f"TEST_RESUME_{i}" for i in range(30000)]
+
+        response = requests.post(f"{BASE_URL}/api/underwriting/jobs/{job['id']}/resume")
+        assert response.status_code == 400, "Completed jobs cannot be resumed"
+        requests.delete(f"{BASE_URL}/api/underwriting/jobs/{job['id']}")
+
+    def test_unknown_job(self):
+        """Test that unknown job ids return 404"""
+        response = requests.get(f"{BASE_URL}/api/underwriting/jobs/{uuid.uuid4()}")
+        assert response.status_code == 404
@@ -0,0 +1,42 @@
+"""
+Tests for the streamed bulk evaluation document
+Tests: a failure after the first chunk still ends in valid JSON with an error and the counts so far
+Runs the stream generator in-process, since a persist failure cannot be forced over HTTP
+"""
+import io
+import json
+import os
+import sys
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server  # noqa: E402
+
+
+class TestBulkStream:
+    """Tests for stream_bulk_evaluation behind POST /api/underwriting/evaluate-csv"""
+
+    def test_persist_failure_closes_document(self, monkeypatch, make_proposal):
+        """Test that a persist failure on the second chunk yields the first chunk, an error and valid JSON"""
+        calls = []
+
+        def persist(results):
+            calls.append(len(results))
+            if len(calls) == 2:
+                raise RuntimeError("database is locked")
+            return 0.0
+
+        monkeypatch.setattr(server, "persist_bulk_results", persist)
+        monkeypatch.setattr(server.parallel_evaluator, "workers", 1)
+        ruleset = server.build_ruleset_snapshot(1, [], [], [], [], [])
+        proposals = [server.ProposalData(**make_proposal(proposal_id=f"TEST_BS_{i}")) for i in range(4)]
+        chunks = [proposals[:2], proposals[2:3], proposals[3:]]
+        source = io.StringIO()
+
+        document = json.loads(''.join(server.stream_bulk_evaluation(ruleset, chunks, [], source, persist=True)))
+        assert document['error'] == "database is locked"
+        assert document['total_proposals'] == 2
+        assert [r['proposal_id'] for r in document['results']] == ["TEST_BS_0", "TEST_BS_1"]
+        assert calls == [2, 1]
+        assert source.closed
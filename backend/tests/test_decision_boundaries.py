@@ -0,0 +1,79 @@
+"""
+Tests for decision-boundary search
+Tests: intervals agree with single evaluations at their ends, a rule threshold becomes an exact boundary,
+integer fields, invalid fields and ranges
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestDecisionBoundaries:
+    """Tests for POST /api/underwriting/boundaries"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda: make_proposal("TEST_DB", applicant_age=41, applicant_gender="F", applicant_income=1500000,
+                                                   sum_assured=3000000, premium=12000, bmi=23.5)
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def search(self, proposal, field, low, high):
+        return requests.post(f"{BASE_URL}/api/underwriting/boundaries",
+                             json={"proposal": proposal, "field": field, "low": low, "high": high})
+
+    def decision(self, proposal, field, value):
+        result = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json={**proposal, field: value}).json()
+        return result['stp_decision'], result['case_type']
+
+    def test_threshold_is_exact_boundary(self):
+        """Test that a sum assured threshold splits the intervals exactly where evaluation changes"""
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": f"TEST_DB {uuid.uuid4().hex[:6]}",
+            "category": "stp_decision",
+            "condition_group": {"logical_operator": "AND", "conditions": [
+                {"field": "sum_assured", "operator": "greater_than", "value": 20000000}
+            ]},
+            "action": {"decision": "FAIL", "reason_code": "TEST_DB_SA"},
+            "priority": 1,
+            "products": ["endowment"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+
+        proposal = self.make_proposal()
+        response = self.search(proposal, "sum_assured", 1000000, 50000000)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        intervals = response.json()['intervals']
+        assert intervals[0]['low'] == 1000000 and intervals[-1]['high'] == 50000000
+        last = intervals[-1]
+        assert (last['low'], last['low_inclusive'], last['stp_decision']) == (20000000, False, "FAIL")
+        assert self.decision(proposal, "sum_assured", 20000000)[0] == "PASS"
+        assert self.decision(proposal, "sum_assured", 20000000.01)[0] == "FAIL"
+        for interval in intervals:
+            for value, inclusive in ((interval['low'], interval['low_inclusive']), (interval['high'], interval['high_inclusive'])):
+                if inclusive:
+                    assert self.decision(proposal, "sum_assured", value) == (interval['stp_decision'], interval['case_type'])
+
+    def test_integer_field(self):
+        """Test that an integer field gets integer interval ends that match evaluation"""
+        proposal = self.make_proposal()
+        response = self.search(proposal, "applicant_age", 0, 90)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        intervals = response.json()['intervals']
+        for previous, interval in zip(intervals, intervals[1:]):
+            assert interval['low'] == previous['high'] + 1
+        for interval in intervals:
+            for value in (int(interval['low']), int(interval['high'])):
+                assert self.decision(proposal, "applicant_age", value) == (interval['stp_decision'], interval['case_type'])
+
+    def test_invalid_searches(self):
+        """Test non-numeric fields and empty ranges"""
+        assert self.search(self.make_proposal(), "applicant_gender", 0, 1).status_code == 400
+        assert self.search(self.make_proposal(), "bmi", 30, 20).status_code == 400
+        assert self.search(self.make_proposal(), "applicant_age", 30.2, 30.8).status_code == 400
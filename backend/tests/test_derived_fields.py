@@ -0,0 +1,79 @@
+"""
+Tests for derived fields
+Tests: registry listing, ratio and additional_data alias rules, zero denominators, batch agrees with single
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestDerivedFields:
+    """Tests for rules on fields from GET /api/fields/derived"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def create_rule(self, condition):
+        name = f"TEST_DF {uuid.uuid4().hex[:6]}"
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": name,
+            "category": "stp_decision",
+            "condition_group": {"logical_operator": "AND", "conditions": [condition]},
+            "action": {"score_impact": 0},
+            "priority": 1,
+            "products": ["endowment"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+        return name
+
+    def triggered(self, name, proposal):
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal, params={"trace": "none"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return name in response.json()['triggered_rules']
+
+    def test_registry(self):
+        """Test that the derived fields are listed with their kind"""
+        response = requests.get(f"{BASE_URL}/api/fields/derived")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        kinds = {f['field']: f['kind'] for f in response.json()}
+        assert kinds['sa_to_income_ratio'] == 'ratio'
+        assert kinds['height_cm'] == 'alias'
+
+    def test_ratio(self, make_proposal):
+        """Test a rule on sum assured over income, and that a zero income never matches"""
+        name = self.create_rule({"field": "sa_to_income_ratio", "operator": "greater_than", "value": 10})
+        assert self.triggered(name, make_proposal("TEST_DF", applicant_income=100000))
+        assert not self.triggered(name, make_proposal("TEST_DF", applicant_income=1000000))
+        assert not self.triggered(name, make_proposal("TEST_DF", applicant_income=0))
+
+    def test_alias(self, make_proposal):
+        """Test a rule on a top-level name for an additional_data value"""
+        name = self.create_rule({"field": "height_cm", "operator": "between", "value": 120, "value2": 140})
+        assert self.triggered(name, make_proposal("TEST_DF", applicant_income=1000000, additional_data={"height_cm": 130}))
+        assert not self.triggered(name, make_proposal("TEST_DF", applicant_income=1000000, additional_data={"height_cm": 175}))
+        assert not self.triggered(name, make_proposal("TEST_DF", applicant_income=1000000))
+
+    def test_batch_matches_single(self, make_proposal):
+        """Test that bulk evaluation resolves derived fields the same way"""
+        ratio = self.create_rule({"field": "sa_to_income_ratio", "operator": "less_than_or_equal", "value": 5})
+        alias = self.create_rule({"field": "height_cm", "operator": "greater_than", "value": 150})
+        proposals = [
+            make_proposal("TEST_DF", applicant_income=income, sum_assured=sum_assured, additional_data=additional_data or {})
+            for income, sum_assured, additional_data in [
+                (1000000, 5000000, {}), (1000000, 5000001, {"height_cm": 151}), (0, 100000, {"height_cm": "160"}),
+                (400000, 100000, {"height_cm": 150}), (100000, 0, None),
+            ]
+        ]
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=proposals)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        for proposal, result in zip(proposals, response.json()['results']):
+            for name in (ratio, alias):
+                assert (name in result['triggered_rules']) == self.triggered(name, proposal)
@@ -0,0 +1,42 @@
+"""
+Tests for write-behind persistence of evaluations
+Tests: evaluations reach /evaluations after the queue flushes, writer stats
+"""
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestEvaluationWriter:
+    """Tests for GET /api/evaluations/writer and queued evaluation records"""
+
+    def test_writer_stats(self):
+        """Test that the writer reports its mode and counters"""
+        response = requests.get(f"{BASE_URL}/api/evaluations/writer")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        stats = response.json()
+        assert stats['mode'] in ('sync', 'batched', 'fire_and_forget')
+        for key in ('pending', 'written', 'dropped', 'flushes'):
+            assert isinstance(stats[key], int)
+
+    def test_evaluations_are_persisted(self, make_proposal):
+        """Test that a burst of evaluations all become visible"""
+        proposals = [
+            make_proposal("TEST_WB", product_code="TERM001", product_type="term_pure", sum_assured=5000000, premium=25000)
+            for _ in range(20)
+        ]
+        ids = [p['proposal_id'] for p in proposals]
+        for proposal in proposals:
+            response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal)
+            assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            stored = {e['proposal_id'] for e in requests.get(f"{BASE_URL}/api/evaluations", params={"limit": 500}).json()}
+            if set(ids) <= stored:
+                break
+            time.sleep(0.1)
+        assert set(ids) <= stored, "All evaluations should be written"
+        assert requests.get(f"{BASE_URL}/api/evaluations/writer").json()['pending'] == 0
@@ -0,0 +1,85 @@
+"""
+Tests for grid evaluation
+Tests: numeric band labels, exact labels, shared band boundaries, batch agrees with single
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestGridLookup:
+    """Tests for grid cells matched during POST /api/underwriting/evaluate"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda x, y: make_proposal("TEST_GRID", product_code="TERM001", product_type="term_pure",
+                                                        additional_data={"grid_test_x": x, "grid_test_y": y})
+        name = f"TEST_GRID {uuid.uuid4().hex[:6]}"
+        cells = [
+            {"row_value": "<18.5", "col_value": "low", "result": "REFER", "score_impact": 0},
+            {"row_value": "18.5-25", "col_value": "low", "result": "ACCEPT", "score_impact": 7},
+            {"row_value": "25-30", "col_value": "low", "result": "REFER", "score_impact": 0},
+            {"row_value": ">30", "col_value": "low", "result": "DECLINE", "score_impact": 0},
+            {"row_value": "18.5-25", "col_value": "25L-1Cr", "result": "DECLINE", "score_impact": 0},
+        ]
+        response = requests.post(f"{BASE_URL}/api/grids", json={
+            "name": name,
+            "grid_type": "test",
+            "row_field": "additional_data.grid_test_x",
+            "col_field": "additional_data.grid_test_y",
+            "row_labels": ["<18.5", "18.5-25", "25-30", ">30"],
+            "col_labels": ["low", "25L-1Cr"],
+            "cells": cells,
+            "products": ["term_pure"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.grid_id = response.json()['id']
+        self.name = name
+        yield
+        requests.delete(f"{BASE_URL}/api/grids/{self.grid_id}")
+
+    def grid_messages(self, result):
+        return [m for m in result['reason_messages'] if m.startswith(f"Grid {self.name}:")]
+
+    def evaluate(self, x, y):
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=self.make_proposal(x, y), params={"trace": "none"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def test_numeric_bands(self):
+        """Test that numeric values fall into band labels"""
+        assert self.grid_messages(self.evaluate(17.2, "low")) == [f"Grid {self.name}: <18.5 × low = REFER"]
+        assert self.grid_messages(self.evaluate(27.3, "low")) == [f"Grid {self.name}: 25-30 × low = REFER"]
+        assert self.grid_messages(self.evaluate(30.5, "low")) == [f"Grid {self.name}: >30 × low = DECLINE"]
+
+    def test_shared_boundary(self):
+        """Test that a value on a shared boundary belongs to the band starting there"""
+        assert self.grid_messages(self.evaluate(25, "low")) == [f"Grid {self.name}: 25-30 × low = REFER"]
+        assert self.grid_messages(self.evaluate(18.5, "low")) == []
+        assert self.grid_messages(self.evaluate(30, "low")) == [f"Grid {self.name}: 25-30 × low = REFER"]
+
+    def test_amount_labels(self):
+        """Test lakh / crore amount labels"""
+        result = self.evaluate(20, 5000000)
+        assert self.grid_messages(result) == [f"Grid {self.name}: 18.5-25 × 25L-1Cr = DECLINE"]
+        assert result['stp_decision'] == "FAIL"
+        assert self.grid_messages(self.evaluate(20, 20000000)) == []
+
+    def test_no_match(self):
+        """Test that values outside every label leave the decision alone"""
+        assert self.grid_messages(self.evaluate(20, "medium")) == []
+        assert self.grid_messages(self.evaluate(None, "low")) == []
+
+    def test_batch_matches_single(self):
+        """Test that bulk evaluation applies the same grid cells"""
+        proposals = [self.make_proposal(x, y) for x, y in ((17.2, "low"), (25, "low"), (20, 5000000), (20, "low"))]
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=proposals)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        for proposal, result in zip(proposals, response.json()['results']):
+            single = self.evaluate(proposal['additional_data']['grid_test_x'], proposal['additional_data']['grid_test_y'])
+            assert self.grid_messages(result) == self.grid_messages(single)
+            assert (result['stp_decision'], result['case_type'], result['scorecard_value']) == \
+                (single['stp_decision'], single['case_type'], single['scorecard_value'])
@@ -0,0 +1,66 @@
+"""
+Tests for the hard-stop prefilter
+Tests: a hard stop found before the stage walk reports the same decision, triggered rules and stage trace
+as a fully traced evaluation
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestHardStopPrefilter:
+    """Tests for order-independent hard stops in POST /api/underwriting/evaluate"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def create_rule(self, condition, action, priority):
+        name = f"TEST_HS {uuid.uuid4().hex[:6]}"
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": name,
+            "category": "stp_decision",
+            "condition_group": {"logical_operator": "AND", "conditions": [condition]},
+            "action": action,
+            "priority": priority,
+            "products": ["endowment"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+        return name
+
+    def evaluate(self, proposal, trace):
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal, params={"trace": trace})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def test_decline_matches_in_order_evaluation(self, make_proposal):
+        """Test that earlier rules that can trigger with the hard stop are still reported, in order"""
+        excluded = self.create_rule({"field": "is_ofac", "operator": "equals", "value": False},
+                                    {"score_impact": 5, "reason_message": "Not on the OFAC list"}, 1)
+        earlier = self.create_rule({"field": "applicant_age", "operator": "greater_than", "value": 30},
+                                   {"score_impact": -3, "reason_code": "TEST_HS_AGE"}, 2)
+        stop = self.create_rule({"field": "is_ofac", "operator": "equals", "value": True},
+                                {"decision": "FAIL", "is_hard_stop": True, "reason_code": "TEST_HS_OFAC"}, 3)
+
+        proposal = make_proposal("TEST_HS", additional_data={"is_ofac": True})
+        summary = self.evaluate(proposal, "summary")
+        full = self.evaluate(proposal, "full")
+        assert summary['stp_decision'] == "FAIL"
+        assert summary['case_type'] == -1
+        assert excluded not in summary['triggered_rules']
+        assert summary['triggered_rules'][-2:] == [earlier, stop]
+        for key in ('stp_decision', 'case_type', 'scorecard_value', 'triggered_rules', 'reason_codes'):
+            assert summary[key] == full[key]
+        assert [(s['stage_id'], s['status'], s['triggered_rules_count']) for s in summary['stage_trace']] == \
+            [(s['stage_id'], s['status'], s['triggered_rules_count']) for s in full['stage_trace']]
+
+        passed = self.evaluate(make_proposal("TEST_HS", additional_data={"is_ofac": False}), "none")
+        assert stop not in passed['triggered_rules']
+        assert {excluded, earlier} <= set(passed['triggered_rules'])
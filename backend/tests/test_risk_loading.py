@@ -0,0 +1,86 @@
+"""
+Tests for risk-band premium loading
+Tests: numeric range, equality and membership bands, priority order, product filters
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+MARKER_FIELD = "additional_data.risk_test_level"
+
+
+class TestRiskLoading:
+    """Tests for risk_loading in POST /api/underwriting/evaluate"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda level, product_type: make_proposal(
+            "TEST_RISK", product_code="TERM001", product_type=product_type, additional_data={"risk_test_level": level}
+        )
+        self.band_ids = []
+        yield
+        for band_id in self.band_ids:
+            requests.delete(f"{BASE_URL}/api/risk-bands/{band_id}")
+
+    def create_band(self, name, operator, value, value2=None, loading=0, score=0, products=None, priority=1):
+        response = requests.post(f"{BASE_URL}/api/risk-bands", json={
+            "name": name,
+            "category": "test",
+            "condition": {"field": MARKER_FIELD, "operator": operator, "value": value, "value2": value2},
+            "loading_percentage": loading,
+            "risk_score": score,
+            "products": products or [],
+            "priority": priority
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.band_ids.append(response.json()['id'])
+
+    def applied(self, level, product_type="term_life"):
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=self.make_proposal(level, product_type),
+                                 params={"trace": "none"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        risk_loading = response.json()['risk_loading']
+        return [b['band_name'] for b in risk_loading['applied_bands'] if b['condition_field'] == MARKER_FIELD], risk_loading
+
+    def test_range_bands(self):
+        """Test inclusive between bounds and strict / non-strict thresholds"""
+        self.create_band("TEST_RL between", "between", 10, 20, loading=5, priority=1)
+        self.create_band("TEST_RL gt", "greater_than", 20, loading=7, priority=2)
+        self.create_band("TEST_RL lte", "less_than_or_equal", 10, loading=3, priority=3)
+
+        assert self.applied(5)[0] == ["TEST_RL lte"]
+        assert self.applied(10)[0] == ["TEST_RL between", "TEST_RL lte"]
+        assert self.applied(15.5)[0] == ["TEST_RL between"]
+        assert self.applied(20)[0] == ["TEST_RL between"]
+        assert self.applied(20.01)[0] == ["TEST_RL gt"]
+        assert self.applied("12")[0] == ["TEST_RL between"]
+
+    def test_equality_bands(self):
+        """Test equals, not_equals and in_list bands"""
+        self.create_band("TEST_RL eq", "equals", "high", loading=10, priority=1)
+        self.create_band("TEST_RL in", "in_list", ["high", "severe"], loading=2, priority=2)
+        self.create_band("TEST_RL ne", "not_equals", "high", loading=1, priority=3)
+
+        assert self.applied("high")[0] == ["TEST_RL eq", "TEST_RL in"]
+        assert self.applied("severe")[0] == ["TEST_RL in", "TEST_RL ne"]
+        assert self.applied("low")[0] == ["TEST_RL ne"]
+
+    def test_totals_and_priority(self):
+        """Test that matched bands are applied in priority order and summed"""
+        self.create_band("TEST_RL second", "greater_than", 0, loading=2.5, score=4, priority=2)
+        self.create_band("TEST_RL first", "equals", 1, loading=10, score=6, priority=1)
+
+        names, risk_loading = self.applied(1)
+        assert names == ["TEST_RL first", "TEST_RL second"]
+        baseline = self.applied(None)[1]
+        assert risk_loading['total_risk_score'] == baseline['total_risk_score'] + 10
+        assert risk_loading['total_loading_percentage'] == pytest.approx(baseline['total_loading_percentage'] + 12.5)
+
+    def test_product_filter(self):
+        """Test that bands limited to other products do not apply"""
+        self.create_band("TEST_RL ulip only", "equals", "x", loading=4, products=["ulip"])
+
+        assert self.applied("x", "ulip")[0] == ["TEST_RL ulip only"]
+        assert self.applied("x", "term_life")[0] == []
@@ -0,0 +1,119 @@
+"""
+Tests for static ruleset analysis
+Tests: dropped unsatisfiable rules, draft rule findings, normalized conditions evaluate the same,
+product_type conditions in per-product rulesets
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def draft(condition_group):
+    return {
+        "name": f"TEST_RA {uuid.uuid4().hex[:6]}",
+        "category": "stp_decision",
+        "condition_group": condition_group,
+        "action": {"score_impact": 0},
+        "products": ["endowment"]
+    }
+
+
+class TestRulesetAnalysis:
+    """Tests for GET /api/ruleset/analysis and POST /api/rules/analyze"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def create_rule(self, condition_group):
+        payload = draft(condition_group)
+        response = requests.post(f"{BASE_URL}/api/rules", json=payload)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+        return payload['name']
+
+    def analyze(self, condition_group):
+        response = requests.post(f"{BASE_URL}/api/rules/analyze", json=draft(condition_group))
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def test_unsatisfiable_rule_is_dropped(self, make_proposal):
+        """Test that contradictory ranges are reported and the rule never triggers"""
+        name = self.create_rule({"logical_operator": "AND", "conditions": [
+            {"field": "applicant_age", "operator": "greater_than", "value": 60},
+            {"field": "applicant_age", "operator": "less_than", "value": 18}
+        ]})
+        response = requests.get(f"{BASE_URL}/api/ruleset/analysis")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        data = response.json()
+        assert self.rule_ids[0] in data['dropped_rules']
+        kinds = {f['kind'] for f in data['findings'] if f['rule_id'] == self.rule_ids[0]}
+        assert {'contradiction', 'unsatisfiable'} <= kinds
+        result = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=make_proposal("TEST_RA", applicant_age=70)).json()
+        assert name not in result['triggered_rules']
+
+    def test_draft_findings(self):
+        """Test findings for a rule that has not been saved"""
+        result = self.analyze({"logical_operator": "AND", "conditions": [
+            {"field": "no_such_field", "operator": "equals", "value": "x"}
+        ]})
+        assert result['dropped']
+        assert {f['kind'] for f in result['findings']} == {'unknown_field', 'unsatisfiable'}
+
+    def test_negation_is_pushed_down(self, make_proposal):
+        """Test that a negated OR of nested groups becomes a flat AND of complements"""
+        group = {"logical_operator": "OR", "is_negated": True, "conditions": [
+            {"logical_operator": "OR", "conditions": [{"field": "applicant_gender", "operator": "equals", "value": "F"}]},
+            {"field": "applicant_age", "operator": "in", "value": [18, 19]},
+            {"field": "applicant_age", "operator": "greater_than", "value": 60}
+        ]}
+        result = self.analyze(group)
+        normalized = result['condition_group']
+        assert normalized['logical_operator'] == 'AND' and not normalized.get('is_negated')
+        assert [c.get('operator') for c in normalized['conditions']] == ['not_equals', 'not_in', None]
+        assert normalized['conditions'][2]['is_negated']
+        assert 'redundant_group' in {f['kind'] for f in result['findings']}
+
+        name = self.create_rule(group)
+        for age, expected in ((35, True), (18, False), (65, False)):
+            result = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=make_proposal("TEST_RA", applicant_age=age)).json()
+            assert (name in result['triggered_rules']) == expected
+
+
+class TestProductSpecialization:
+    """Tests for product_type conditions in per-product rulesets"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def test_product_type_condition(self, make_proposal):
+        """Test that a product_type condition holds exactly for its products"""
+        payload = {**draft({"logical_operator": "AND", "conditions": [
+            {"field": "product_type", "operator": "in", "value": ["endowment", "ulip"]},
+            {"field": "applicant_age", "operator": "greater_than", "value": 30}
+        ]}), "products": []}
+        response = requests.post(f"{BASE_URL}/api/rules", json=payload)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+        for product_type, age, expected in (("endowment", 40, True), ("endowment", 20, False), ("term_life", 40, False)):
+            proposal = make_proposal("TEST_RA", applicant_age=age, product_type=product_type)
+            result = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal).json()
+            assert (payload['name'] in result['triggered_rules']) == expected
+
+    def test_impossible_product_type(self):
+        """Test that a product_type no product has folds the condition to false"""
+        result = requests.post(f"{BASE_URL}/api/rules/analyze", json=draft({"logical_operator": "AND", "conditions": [
+            {"field": "product_type", "operator": "equals", "value": "health"}
+        ]})).json()
+        assert result['dropped']
+        assert 'unsatisfiable' in {f['kind'] for f in result['findings']}
@@ -0,0 +1,66 @@
+"""
+Tests for the cached ruleset snapshot
+Tests: version bumps on configuration changes, evaluation sees changes immediately
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestRulesetSnapshot:
+    """Tests for GET /api/ruleset/version and snapshot invalidation"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.rule_id = None
+        yield
+        if self.rule_id:
+            requests.delete(f"{BASE_URL}/api/rules/{self.rule_id}")
+
+    def test_version_endpoint(self):
+        """Test that the version endpoint returns an integer version"""
+        response = requests.get(f"{BASE_URL}/api/ruleset/version")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert isinstance(response.json()['version'], int), "Version should be an integer"
+
+    def test_rule_changes_bump_version_and_reach_evaluation(self, make_proposal):
+        """Test that create/toggle/delete bump the version and evaluation sees each change"""
+        marker = uuid.uuid4().hex
+        proposal = make_proposal("TEST_SNAP", product_code="TERM001", product_type="term_life", premium=20000,
+                                 additional_data={"snapshot_marker": marker})
+        rule_name = f"TEST_Snapshot_{marker[:8]}"
+        v0 = requests.get(f"{BASE_URL}/api/ruleset/version").json()['version']
+
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": rule_name,
+            "category": "stp_decision",
+            "condition_group": {
+                "logical_operator": "AND",
+                "conditions": [{"field": "additional_data.snapshot_marker", "operator": "equals", "value": marker}]
+            },
+            "action": {"decision": "FAIL", "reason_code": "SNAP001", "reason_message": "Snapshot test"},
+            "priority": 1
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_id = response.json()['id']
+
+        v1 = requests.get(f"{BASE_URL}/api/ruleset/version").json()['version']
+        assert v1 > v0, "Creating a rule should bump the ruleset version"
+
+        result = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal).json()
+        assert rule_name in result['triggered_rules'], "New rule should be evaluated without a restart"
+
+        requests.patch(f"{BASE_URL}/api/rules/{self.rule_id}/toggle")
+        v2 = requests.get(f"{BASE_URL}/api/ruleset/version").json()['version']
+        assert v2 > v1, "Toggling a rule should bump the ruleset version"
+
+        result = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal).json()
+        assert rule_name not in result['triggered_rules'], "Disabled rule should no longer trigger"
+        print(f"PASSED: ruleset version {v0} -> {v1} -> {v2}")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
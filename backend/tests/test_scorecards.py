@@ -0,0 +1,73 @@
+"""
+Tests for scorecard scoring
+Tests: first matching band, inclusive bounds, weights, thresholds, batch agrees with single
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestScorecardScoring:
+    """Tests for scorecard_value in POST /api/underwriting/evaluate"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda x: make_proposal("TEST_SC", additional_data={"sc_test_x": x})
+        self.scorecard_ids = []
+        yield
+        for scorecard_id in self.scorecard_ids:
+            requests.delete(f"{BASE_URL}/api/scorecards/{scorecard_id}")
+
+    def create_scorecard(self, bands, weight=1.0, accept=100000, refer=-100000):
+        response = requests.post(f"{BASE_URL}/api/scorecards", json={
+            "name": f"TEST_SC {uuid.uuid4().hex[:6]}",
+            "product": "endowment",
+            "parameters": [{"name": "x", "field": "additional_data.sc_test_x", "weight": weight, "bands": bands}],
+            "threshold_direct_accept": accept,
+            "threshold_refer": refer
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.scorecard_ids.append(response.json()['id'])
+
+    def evaluate(self, x):
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=self.make_proposal(x), params={"trace": "none"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def scores(self, *values):
+        baseline = self.evaluate(None)['scorecard_value']
+        return [self.evaluate(x)['scorecard_value'] - baseline for x in values]
+
+    def test_bands(self):
+        """Test inclusive bounds, open-ended bands and first match on overlap"""
+        self.create_scorecard([
+            {"max": 10, "score": 1},
+            {"min": 10, "max": 20, "score": 2},
+            {"min": 15, "max": 30, "score": 4},
+            {"min": 40, "score": 8},
+        ])
+        assert self.scores(-5, 10, 10.5, 20, 25, 30, 35, 40, "22", "abc") == [1, 1, 2, 2, 4, 4, 0, 8, 4, 0]
+
+    def test_weight(self):
+        """Test that band scores are weighted and truncated to integers"""
+        self.create_scorecard([{"min": 0, "max": 100, "score": 7}], weight=1.5)
+        assert self.scores(50) == [10]
+
+    def test_thresholds(self):
+        """Test that the scorecard total moves the case type"""
+        self.create_scorecard([{"min": 0, "max": 10, "score": 100000}, {"min": 11, "score": -200000}])
+        assert self.evaluate(5)['case_type'] == 1
+        assert self.evaluate(50)['case_type'] == 3
+
+    def test_batch_matches_single(self):
+        """Test that bulk evaluation scores scorecards the same way"""
+        self.create_scorecard([{"min": 0, "max": 10, "score": 3}, {"min": 5, "max": 50, "score": 9}], weight=0.7)
+        proposals = [self.make_proposal(x) for x in (None, 0, 7, 10.0, 42, "12", 99)]
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=proposals)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        for proposal, result in zip(proposals, response.json()['results']):
+            single = self.evaluate(proposal['additional_data']['sc_test_x'])
+            assert (result['scorecard_value'], result['case_type']) == (single['scorecard_value'], single['case_type'])
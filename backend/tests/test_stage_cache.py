@@ -0,0 +1,66 @@
+"""
+Tests for the stage outcome cache
+Tests: hit/miss counters, repeated field values give identical results, rule changes are never served stale
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestStageCache:
+    """Tests for GET /api/evaluations/cache"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda: make_proposal("TEST_SC", applicant_age=41, applicant_gender="F", applicant_income=1500000,
+                                                   sum_assured=3000000, premium=12000, bmi=23.5)
+        self.rule_ids = []
+        yield
+        for rule_id in self.rule_ids:
+            requests.delete(f"{BASE_URL}/api/rules/{rule_id}")
+
+    def evaluate(self, proposal, trace="none"):
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal, params={"trace": trace})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def stats(self):
+        response = requests.get(f"{BASE_URL}/api/evaluations/cache")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def test_repeated_values_hit(self, decision):
+        """Test that a resubmission is served from the cache with the same result"""
+        if not self.stats()['max_entries']:
+            pytest.skip("STAGE_CACHE_SIZE=0 disables the cache")
+        proposal = self.make_proposal()
+        first = self.evaluate(proposal)
+        before = self.stats()
+        second = self.evaluate({**proposal, "proposal_id": f"TEST_SC_{uuid.uuid4().hex[:8]}"})
+        after = self.stats()
+        assert decision(second) == decision(first)
+        assert after['hits'].get('stage', 0) > before['hits'].get('stage', 0)
+        assert after['hits'].get('risk_loading', 0) > before['hits'].get('risk_loading', 0)
+        assert decision(self.evaluate(proposal, "full")) == decision(first)
+
+    def test_rule_change_is_not_stale(self):
+        """Test that a new rule applies to values the cache has already seen"""
+        proposal = self.make_proposal()
+        self.evaluate(proposal)
+        name = f"TEST_SC {uuid.uuid4().hex[:6]}"
+        response = requests.post(f"{BASE_URL}/api/rules", json={
+            "name": name,
+            "category": "stp_decision",
+            "condition_group": {"logical_operator": "AND", "conditions": [
+                {"field": "applicant_age", "operator": "equals", "value": 41}
+            ]},
+            "action": {"score_impact": 1},
+            "priority": 1,
+            "products": ["endowment"]
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        self.rule_ids.append(response.json()['id'])
+        assert name in self.evaluate(proposal)['triggered_rules']
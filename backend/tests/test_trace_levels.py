@@ -0,0 +1,83 @@
+"""
+Tests for evaluation trace levels
+Tests: trace=none/summary/full on single evaluation, traced batch rows, batch matches single
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+# Fields every proposal in these tests shares, on top of the default proposal
+TRACE_FIELDS = {
+    "product_code": "TERM001",
+    "product_type": "term_life",
+    "applicant_age": 28,
+    "applicant_income": 6000000,
+    "premium": 20000,
+    "bmi": 22.5
+}
+
+
+class TestTraceLevels:
+    """Tests for the trace query parameter"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, make_proposal):
+        self.make_proposal = lambda **fields: make_proposal("TEST_TRACE", **{**TRACE_FIELDS, **fields})
+
+    def evaluate(self, proposal, trace=None):
+        params = {"trace": trace} if trace else None
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=proposal, params=params)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def test_full_is_default(self):
+        """Test that the default response carries stage and rule traces"""
+        result = self.evaluate(self.make_proposal())
+        assert len(result['stage_trace']) > 0
+        assert len(result['rule_trace']) > 0
+        assert 'input_values' in result['rule_trace'][0]
+
+    def test_levels_agree_on_decision(self, decision):
+        """Test that every trace level reaches the same decision"""
+        proposal = self.make_proposal(is_smoker=True, cigarettes_per_day=25, smoking_years=10)
+        full = self.evaluate(proposal, "full")
+        summary = self.evaluate(proposal, "summary")
+        none = self.evaluate(proposal, "none")
+        assert decision(full) == decision(summary) == decision(none)
+
+        assert none['stage_trace'] == [] and none['rule_trace'] == []
+        assert summary['rule_trace'] == []
+        assert [s['status'] for s in summary['stage_trace']] == [s['status'] for s in full['stage_trace']]
+        assert all(s['rules_executed'] == [] for s in summary['stage_trace'])
+
+    def test_invalid_level(self):
+        """Test that an unknown trace level is rejected"""
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate", json=self.make_proposal(), params={"trace": "verbose"})
+        assert response.status_code == 422, f"Expected 422, got {response.status_code}"
+
+    def test_batch_matches_single(self, decision):
+        """Test that bulk results include scorecard and grid phases like single evaluation"""
+        proposals = [
+            self.make_proposal(),
+            self.make_proposal(applicant_age=45, bmi=31.0, applicant_income=400000),
+            self.make_proposal(product_type="term_pure", applicant_age=60)
+        ]
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=proposals)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        for proposal, result in zip(proposals, response.json()['results']):
+            assert decision(result) == decision(self.evaluate(proposal, "none"))
+            assert 'stage_trace' not in result
+
+    def test_traced_batch(self, decision):
+        """Test that trace=summary adds stage traces to bulk results"""
+        proposals = [self.make_proposal(), self.make_proposal(applicant_age=45)]
+        response = requests.post(f"{BASE_URL}/api/underwriting/evaluate-batch", json=proposals, params={"trace": "summary"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        results = response.json()['results']
+        for proposal, result in zip(proposals, results):
+            assert len(result['stage_trace']) > 0
+            assert 'rule_trace' not in result
+            assert decision(result) == decision(self.evaluate(proposal, "none"))
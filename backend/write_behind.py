@@ -0,0 +1,167 @@
+"""Write-behind queue for evaluation records
+
+Evaluations are pushed onto a bounded in-process queue and a dedicated writer
+thread flushes them as multi-row inserts, so request latency no longer pays
+for a commit and concurrent evaluators do not serialize behind the SQLite
+write lock. A flush happens when max_batch records are waiting or max_delay
+seconds after the oldest one arrived, whichever comes first.
+
+Durability modes:
+    sync             - write in the caller's thread before returning (no queue)
+    batched          - queue; callers block while the queue is full, and a
+                       failed flush (typically "database is locked") is retried
+                       with exponential backoff until it succeeds, the batch
+                       staying ahead of everything queued after it. Errors
+                       that are not transient (see transient) cannot succeed
+                       on retry, so the batch is written record by record and
+                       only the records the database rejects are dropped.
+                       Records are otherwise only dropped when the database
+                       still refuses them after close() has waited its timeout
+    fire_and_forget  - queue; records are dropped when the queue is full or a
+                       flush fails
+"""
+import logging
+import queue
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+
+class DurabilityMode(str, Enum):
+    SYNC = "sync"
+    BATCHED = "batched"
+    FIRE_AND_FORGET = "fire_and_forget"
+
+
+class WriteBehindQueue:
+    """Batches records from many threads into calls to write(records)"""
+
+    def __init__(self, write: Callable[[List[Record]], None], mode: DurabilityMode = DurabilityMode.BATCHED,
+                 max_batch: int = 500, max_delay: float = 0.2, max_queue: int = 10000,
+                 retry_delay: float = 0.05, max_retry_delay: float = 2.0,
+                 transient: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.write = write
+        self.mode = DurabilityMode(mode)
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Record]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.transient = transient  # errors worth retrying in batched mode
+        self._closed = False
+        self._close_deadline = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.retries = 0
+
+    def submit(self, record: Record):
+        if self.mode == DurabilityMode.SYNC or self._closed:
+            self._write([record])
+            return
+        self._ensure_writer()
+        if self.mode == DurabilityMode.BATCHED:
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode.value,
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "retries": self.retries
+        }
+
+    def close(self, timeout: float = 10.0):
+        """Flush everything still queued and stop the writer; batched retries give up after timeout"""
+        self._close_deadline = time.monotonic() + timeout
+        self._closed = True
+        writer = self._writer
+        if writer is not None:
+            writer.join(timeout)
+        self._drain()
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="evaluation-writer", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while not self._closed:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _drain(self):
+        while True:
+            batch = []
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch: List[Record]):
+        delay = self.retry_delay
+        attempt = 1
+        while True:
+            try:
+                self._write(batch)
+                return
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} evaluation records (attempt {attempt}): {e}")
+                error = e
+            if self.mode != DurabilityMode.BATCHED or (self._closed and time.monotonic() >= self._close_deadline):
+                break
+            if not isinstance(error, self.transient):
+                if len(batch) == 1:
+                    break
+                for record in batch:
+                    self._flush([record])
+                return
+            # Nothing else is written meanwhile, so the queue fills and submitters block
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+        with self._lock:
+            self.dropped += len(batch)
+
+    def _write(self, batch: List[Record]):
+        self.write(batch)
+        with self._lock:
+            self.written += len(batch)
+            self.flushes += 1
@@ -83,6 +83,10 @@ export const AVAILABLE_FIELDS = [
   { value: 'ailment_details', label: 'Ailment Details', type: 'string', dependsOn: 'has_medical_history' },
   { value: 'ailment_duration_years', label: 'Ailment Duration (Years)', type: 'number', dependsOn: 'has_medical_history' },
   { value: 'is_ailment_ongoing', label: 'Is Ailment Ongoing', type: 'boolean', dependsOn: 'has_medical_history' },
+  // Derived fields (computed by the rule engine, see GET /api/fields/derived)
+  { value: 'sa_to_income_ratio', label: 'Sum Assured / Income', type: 'number' },
+  { value: 'premium_to_income_ratio', label: 'Premium / Income', type: 'number' },
+  { value: 'product_family', label: 'Product Family', type: 'string' },
 ];
 
 // Grid Types
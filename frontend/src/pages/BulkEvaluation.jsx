@@ -17,6 +17,8 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../co
 import { Input } from '../components/ui/input';
 import { Badge } from '../components/ui/badge';
 import { Progress } from '../components/ui/progress';
+import { Switch } from '../components/ui/switch';
+import { Label } from '../components/ui/label';
 import { 
   Table,
   TableBody,
@@ -31,6 +33,7 @@ const BulkEvaluation = () => {
   const [file, setFile] = useState(null);
   const [processing, setProcessing] = useState(false);
   const [results, setResults] = useState(null);
+  const [persist, setPersist] = useState(false);
   const fileInputRef = useRef(null);
 
   const handleFileChange = (e) => {
@@ -75,6 +78,7 @@ const BulkEvaluation = () => {
 
     try {
       const response = await api.post('/underwriting/evaluate-csv', formData, {
+        params: { persist },
         headers: {
           'Content-Type': 'multipart/form-data'
         }
@@ -170,7 +174,7 @@ const BulkEvaluation = () => {
             Upload Proposals
           </CardTitle>
           <CardDescription>
-            Upload a CSV file with proposal data. Maximum 1000 rows per file.
+            Upload a CSV file with proposal data. Large files are processed in chunks, with no row limit.
           </CardDescription>
         </CardHeader>
         <CardContent>
@@ -216,6 +220,15 @@ const BulkEvaluation = () => {
                 </>
               )}
             </Button>
+            <div className="flex items-center gap-2">
+              <Switch
+                id="persist"
+                checked={persist}
+                onCheckedChange={setPersist}
+                data-testid="persist-switch"
+              />
+              <Label htmlFor="persist">Save to evaluation history</Label>
+            </div>
           </div>
         </CardContent>
       </Card>
@@ -465,7 +465,10 @@ const Grids = () => {
               </div>
 
               {/* Labels Configuration */}
-              <div className="grid grid-cols-2 gap-6 pt-4 border-t border-slate-200">
+              <p className="text-xs text-slate-500 pt-4 border-t border-slate-200">
+                Labels match values exactly, or as numeric bands such as "18-30", "&lt;18.5", "&gt;35", "5L-10L" or "1Cr+".
+              </p>
+              <div className="grid grid-cols-2 gap-6">
                 {/* Row Labels */}
                 <div>
                   <Label className="mb-2 block">Row Labels</Label>